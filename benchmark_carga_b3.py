@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+"""
+BENCHMARK - Carga B3 TradeInformationConsolidatedFile
+Compara linhas/segundo da inserção em organizesee_ativosprecos entre os modos
+COPY FROM STDIN, executemany e staging (arquivo bruto + classificação em SQL),
+usando um arquivo sintético. Também compara o parse linha a linha (csv.reader +
+Decimal) com o parser vetorizado em blocos colunares (NumPy).
+
+Os dados são gravados em uma tabela temporária com as mesmas colunas e a mesma
+chave única (ticker, data, fonte) de organizesee_ativosprecos, sem afetar a
+tabela real. Cada modo também mede o reprocessamento do mesmo arquivo, que
+deve virar um no-op pelo upsert. No modo staging, as tabelas de referência de
+FII e Ações são sobrepostas na sessão por tabelas temporárias de mesmo nome
+com os tickers sintéticos.
+
+Uso: python benchmark_carga_b3.py [--linhas=300000] [--execucao[=5]]
+"""
+
+import os
+import sys
+import csv
+import time
+import random
+import string
+import tempfile
+
+# Configurar Django
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'servicos.settings')
+
+import django
+django.setup()
+
+from django.db import connection, transaction
+from rotinas_automaticas.carga_bulk import MODO_COPY, MODO_EXECUTEMANY, MODO_STAGING
+from rotinas_automaticas import parser_b3
+from rotinas_automaticas.carga_b3_trade_information import CargaB3TradeInformation
+from rotinas_automaticas import servico_carga
+
+TABELA_BENCHMARK = 'benchmark_ativosprecos'
+CABECALHO = "RptDt;TckrSymb;ISIN;SgmtNm;MinPric;MaxPric;TradAvrgPric;LastPric;OscnPctg;AdjstdQt;AdjstdQtTax;RefPric;TradQty;FinInstrmQty;NtlFinVol"
+
+
+def gerar_tickers(quantidade, sufixo, letras=4):
+    """Gera tickers sintéticos no formato XXXX3 / XXXX11"""
+    tickers = set()
+    while len(tickers) < quantidade:
+        tickers.add(''.join(random.choices(string.ascii_uppercase, k=letras)) + sufixo)
+    return sorted(tickers)
+
+
+def formatar_decimal(valor):
+    """Formata número com vírgula decimal, como no arquivo da B3"""
+    return f"{valor:.2f}".replace('.', ',')
+
+
+def gerar_arquivo_sintetico(caminho, tickers):
+    """Gera arquivo no layout do TradeInformationConsolidatedFile (um pregão, um registro por ticker)"""
+    tickers = list(tickers)
+    random.shuffle(tickers)
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        arquivo.write("Status do Arquivo: Final\n")
+        arquivo.write(CABECALHO + "\n")
+        for ticker in tickers:
+            preco = random.uniform(1, 500)
+            quantidade = random.randint(100, 900000)
+            # ~40% das linhas sem MaxPric, como opções e instrumentos sem negócio
+            max_pric = formatar_decimal(preco * 1.02) if random.random() < 0.6 else ''
+            arquivo.write(
+                f"2025-09-10;{ticker};BR{ticker}000;CASH;{formatar_decimal(preco * 0.98)};{max_pric};"
+                f"{formatar_decimal(preco)};{formatar_decimal(preco)};0,5;;;{formatar_decimal(preco)};"
+                f"{random.randint(1, 5000)};{quantidade};{formatar_decimal(preco * quantidade)}\n"
+            )
+
+
+def criar_tabela_benchmark():
+    """Cria tabela temporária com as colunas de organizesee_ativosprecos"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABELA_BENCHMARK}")
+        cursor.execute(f"""
+            CREATE TEMP TABLE {TABELA_BENCHMARK} (
+                tipo varchar(100) NOT NULL,
+                ticker varchar(10) NOT NULL,
+                "open" numeric(15, 2),
+                high numeric(15, 2),
+                low numeric(15, 2),
+                "close" numeric(15, 2) NOT NULL,
+                volume numeric(20, 2),
+                data date NOT NULL,
+                fonte varchar(10) NOT NULL,
+                UNIQUE (ticker, data, fonte)
+            )
+        """)
+
+
+def criar_referencias_benchmark(tickers_fii, tickers_acao):
+    """Sobrepõe as tabelas de referência na sessão com tabelas temporárias (pg_temp vem antes no search_path)"""
+    with connection.cursor() as cursor:
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS rotinas_automaticas_fundolistadob3 (codigo varchar(20))")
+        cursor.execute(
+            'CREATE TEMP TABLE IF NOT EXISTS rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario '
+            '("Codigo_Negociacao" text)'
+        )
+        cursor.execute("TRUNCATE rotinas_automaticas_fundolistadob3, rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario")
+        cursor.executemany("INSERT INTO rotinas_automaticas_fundolistadob3 VALUES (%s)", [(t,) for t in tickers_fii])
+        cursor.executemany(
+            "INSERT INTO rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario VALUES (%s)",
+            [(t,) for t in tickers_acao]
+        )
+
+
+def parsear_arquivo(carga, caminho):
+    """Executa o parse linha a linha do loader e retorna os registros aceitos"""
+    registros = []
+    with open(caminho, 'r', encoding='utf-8', errors='ignore') as arquivo:
+        reader = csv.reader(arquivo, delimiter=';')
+        for linha in reader:
+            dados = carga.processar_linha_csv(linha)
+            if dados:
+                registros.append(dados)
+    return registros
+
+
+def gravar_registros(carga, registros):
+    """Grava os registros em lotes no modo configurado e retorna (inseridos, atualizados, tempo)"""
+    batch_size = carga.tamanho_lote
+
+    inicio = time.perf_counter()
+    inseridos = 0
+    atualizados = 0
+    for posicao in range(0, len(registros), batch_size):
+        with transaction.atomic():
+            lote_inseridos, lote_atualizados = carga.inserir_dados_bulk(registros[posicao:posicao + batch_size])
+            inseridos += lote_inseridos
+            atualizados += lote_atualizados
+    return inseridos, atualizados, time.perf_counter() - inicio
+
+
+def parsear_arquivo_vetorizado(caminho, tickers_fii, tickers_acao):
+    """Executa o parser vetorizado em blocos e retorna (blocos, registros aceitos)"""
+    referencia_fii = parser_b3.montar_array_tickers(tickers_fii)
+    referencia_acao = parser_b3.montar_array_tickers(tickers_acao)
+    blocos = []
+    aceitos = 0
+    for linhas, _ in parser_b3.ler_blocos(caminho):
+        bloco = parser_b3.parsear_bloco(linhas, referencia_fii, referencia_acao)
+        aceitos += bloco['linhas_aceitas']
+        blocos.append(bloco)
+    return blocos, aceitos
+
+
+def medir_insercao(carga, registros):
+    """Mede a carga inicial e o reprocessamento do mesmo lote de registros"""
+    criar_tabela_benchmark()
+    _, _, duracao = gravar_registros(carga, registros)
+    inseridos_replay, atualizados_replay, duracao_replay = gravar_registros(carga, registros)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {TABELA_BENCHMARK}")
+        gravados = cursor.fetchone()[0]
+
+    return gravados, duracao, inseridos_replay + atualizados_replay, duracao_replay
+
+
+def medir_staging(carga, caminho):
+    """Mede a carga via staging (COPY do arquivo bruto, sem parse em Python) e o reprocessamento"""
+    criar_tabela_benchmark()
+
+    inicio = time.perf_counter()
+    carga.carregar_arquivo_staging(caminho)
+    duracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    replay = carga.carregar_arquivo_staging(caminho)
+    duracao_replay = time.perf_counter() - inicio
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM {TABELA_BENCHMARK}")
+        gravados = cursor.fetchone()[0]
+
+    return gravados, duracao, replay['linhas_inseridas'] + replay['linhas_atualizadas'], duracao_replay
+
+
+def medir_execucao(modo_execucao, repeticoes):
+    """Mede o custo fixo por arquivo de um modo de execução (processo ou subprocesso)
+
+    Usa um nome de arquivo inexistente: a rotina sobe, carrega as referências e
+    termina sem gravar nada, então o tempo medido é só o overhead da execução.
+    """
+    nome_arquivo = 'TradeInformationConsolidatedFile_19000101_benchmark.csv'
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        servico_carga.carregar_arquivo(nome_arquivo, modo_execucao=modo_execucao)
+        tempos.append(time.perf_counter() - inicio)
+    return sorted(tempos)[len(tempos) // 2]
+
+
+def comparar_modos_execucao(repeticoes):
+    """Compara o overhead por arquivo da carga no processo e em subprocesso"""
+    print(f"Overhead por arquivo (mediana de {repeticoes} execuções, sem dados)")
+    medianas = {}
+    for modo in servico_carga.MODOS_EXECUCAO:
+        medianas[modo] = medir_execucao(modo, repeticoes)
+        print(f"   {modo:<12}{medianas[modo] * 1000:>10.1f} ms")
+
+    processo = medianas[servico_carga.MODO_EXECUCAO_PROCESSO]
+    subprocesso = medianas[servico_carga.MODO_EXECUCAO_SUBPROCESSO]
+    print(f"Economia por arquivo no processo: {(subprocesso - processo) * 1000:.1f} ms")
+
+
+def main():
+    """Executa o benchmark"""
+    total_linhas = 300000
+    for argumento in sys.argv[1:]:
+        if argumento.startswith('--linhas='):
+            total_linhas = int(argumento.split('=', 1)[1])
+        elif argumento.startswith('--execucao'):
+            repeticoes = int(argumento.split('=', 1)[1]) if '=' in argumento else 5
+            comparar_modos_execucao(repeticoes)
+            return
+
+    print("BENCHMARK - CARGA B3 EM organizesee_ativosprecos")
+    print("=" * 60)
+
+    tickers_fii = gerar_tickers(500, '11')
+    tickers_acao = gerar_tickers(1500, '3')
+    tickers_outros = gerar_tickers(max(total_linhas - 2000, 0), 'F', letras=5)
+
+    pasta_temp = tempfile.mkdtemp(prefix='benchmark_b3_')
+    caminho = os.path.join(pasta_temp, 'TradeInformationConsolidatedFile_20250910_1.csv')
+
+    print(f"Gerando arquivo sintético com {total_linhas:,} linhas...")
+    gerar_arquivo_sintetico(caminho, tickers_fii + tickers_acao + tickers_outros)
+    print(f"   {caminho} ({os.path.getsize(caminho) / (1024 * 1024):.1f} MB)")
+
+    carga_parse = CargaB3TradeInformation()
+    carga_parse.lista_tickers_fii = set(tickers_fii)
+    carga_parse.lista_tickers_acao = set(tickers_acao)
+
+    inicio = time.perf_counter()
+    registros = parsear_arquivo(carga_parse, caminho)
+    duracao_parse = time.perf_counter() - inicio
+    print(f"Parse csv.reader: {len(registros):,} registros aceitos em {duracao_parse:.2f}s "
+          f"({total_linhas / duracao_parse:,.0f} linhas/s)")
+
+    if parser_b3.numpy_disponivel():
+        inicio = time.perf_counter()
+        _, aceitos_vetorizado = parsear_arquivo_vetorizado(caminho, tickers_fii, tickers_acao)
+        duracao_vetorizado = time.perf_counter() - inicio
+        print(f"Parse vetorizado: {aceitos_vetorizado:,} registros aceitos em {duracao_vetorizado:.2f}s "
+              f"({total_linhas / duracao_vetorizado:,.0f} linhas/s)")
+        if duracao_vetorizado > 0:
+            print(f"Ganho do parser vetorizado sobre csv.reader: {duracao_parse / duracao_vetorizado:.1f}x")
+    else:
+        print("Parse vetorizado: NumPy nao disponivel")
+
+    resultados = []
+    for modo in [MODO_EXECUTEMANY, MODO_COPY]:
+        carga = CargaB3TradeInformation(modo_insercao=modo)
+        carga.tabela_destino = TABELA_BENCHMARK
+        print(f"\nInserindo {len(registros):,} registros com {modo} (lotes de {carga.tamanho_lote:,})...")
+        gravados, duracao, regravados_replay, duracao_replay = medir_insercao(carga, registros)
+        taxa = gravados / duracao if duracao > 0 else 0
+        resultados.append((modo, gravados, duracao, taxa, duracao_replay))
+        print(f"   {gravados:,} registros gravados em {duracao:.2f}s ({taxa:,.0f} linhas/s)")
+        print(f"   Reprocessamento: {regravados_replay:,} linhas regravadas em {duracao_replay:.2f}s")
+
+    # Staging: parse, classificação e gravação acontecem no banco, então o tempo inclui o parse
+    criar_referencias_benchmark(tickers_fii, tickers_acao)
+    carga = CargaB3TradeInformation(modo_insercao=MODO_STAGING)
+    carga.tabela_destino = TABELA_BENCHMARK
+    print(f"\nCarregando o arquivo com {MODO_STAGING} (COPY bruto + classificação em SQL)...")
+    gravados, duracao, regravados_replay, duracao_replay = medir_staging(carga, caminho)
+    taxa = gravados / duracao if duracao > 0 else 0
+    resultados.append((MODO_STAGING, gravados, duracao, taxa, duracao_replay))
+    print(f"   {gravados:,} registros gravados em {duracao:.2f}s ({taxa:,.0f} linhas/s, parse incluso)")
+    print(f"   Reprocessamento: {regravados_replay:,} linhas regravadas em {duracao_replay:.2f}s")
+
+    print("\n" + "=" * 72)
+    print(f"{'Modo':<15}{'Registros':>12}{'Tempo (s)':>12}{'Linhas/s':>14}{'Replay (s)':>14}")
+    for modo, gravados, duracao, taxa, duracao_replay in resultados:
+        print(f"{modo:<15}{gravados:>12,}{duracao:>12.2f}{taxa:>14,.0f}{duracao_replay:>14.2f}")
+
+    if resultados[0][3] > 0:
+        print(f"\nGanho do COPY sobre executemany: {resultados[1][3] / resultados[0][3]:.1f}x")
+
+    os.remove(caminho)
+    os.rmdir(pasta_temp)
+
+
+if __name__ == "__main__":
+    main()
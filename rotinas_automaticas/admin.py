@@ -48,6 +48,10 @@ from .models import (
     HistoricoExecucao,
     MonitorRotina,
     RegistroExecucao,
+    CheckpointCarga,
+    ArquivoCarregado,
+    CacheDownload,
+    BackfillB3,
     
     # Tabelas Scheduler
     GrupoDiasExecucao,
@@ -55,6 +59,7 @@ from .models import (
     FilaExecucao,
     CargaDiariaRotinas,
     LogScheduler,
+    LiderancaScheduler,
 )
 
 # ================== ADMIN B3 ==================
@@ -69,9 +74,9 @@ class B3InstrumentsConsolidatedAdmin(admin.ModelAdmin):
 
 @admin.register(B3TradeInformation)
 class B3TradeInformationAdmin(admin.ModelAdmin):
-    list_display = ['codinst', 'nomres', 'datref', 'preult', 'voltot', 'data_carga']
-    list_filter = ['datref', 'fonte']
-    search_fields = ['codinst', 'nomres']
+    list_display = ['codinst', 'tipreg', 'datref', 'premin', 'premax', 'preult', 'totneg', 'voltot', 'data_carga']
+    list_filter = ['datref', 'tipreg', 'fonte']
+    search_fields = ['codinst', 'codisi', 'nomres']
     readonly_fields = ['data_carga']
     list_per_page = 50
 
@@ -390,6 +395,74 @@ class RegistroExecucaoAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
 
+@admin.register(CheckpointCarga)
+class CheckpointCargaAdmin(admin.ModelAdmin):
+    list_display = [
+        'arquivo',
+        'tabela_destino',
+        'lotes_confirmados',
+        'linhas_processadas',
+        'offset_bytes',
+        'tamanho_bytes',
+        'atualizado_em'
+    ]
+    search_fields = ['arquivo']
+    readonly_fields = ['criado_em', 'atualizado_em']
+    list_per_page = 50
+
+
+@admin.register(ArquivoCarregado)
+class ArquivoCarregadoAdmin(admin.ModelAdmin):
+    list_display = [
+        'arquivo',
+        'tabela_destino',
+        'data_referencia',
+        'linhas_carregadas',
+        'tamanho_bytes',
+        'carregado_em'
+    ]
+    list_filter = ['tabela_destino']
+    search_fields = ['arquivo', 'sha256']
+    readonly_fields = ['carregado_em']
+    list_per_page = 50
+
+
+@admin.register(CacheDownload)
+class CacheDownloadAdmin(admin.ModelAdmin):
+    list_display = [
+        'chave',
+        'nome_arquivo',
+        'etag',
+        'last_modified',
+        'tamanho_bytes',
+        'acertos',
+        'downloads',
+        'verificado_em'
+    ]
+    search_fields = ['chave', 'nome_arquivo']
+    readonly_fields = ['verificado_em']
+    list_per_page = 50
+
+
+@admin.register(BackfillB3)
+class BackfillB3Admin(admin.ModelAdmin):
+    list_display = [
+        'id',
+        'data_inicio',
+        'data_fim',
+        'status',
+        'pares_concluidos',
+        'total_pares',
+        'pares_com_erro',
+        'linhas_carregadas',
+        'previsao_termino',
+        'atualizado_em'
+    ]
+    list_filter = ['status']
+    readonly_fields = ['criado_em', 'atualizado_em']
+    list_per_page = 50
+
+
 # ================== ADMIN SCHEDULER ==================
 
 @admin.register(GrupoDiasExecucao)
@@ -535,7 +608,8 @@ class FilaExecucaoAdmin(admin.ModelAdmin):
                 'iniciado_em', 
                 'finalizado_em', 
                 'duracao_segundos',
-                'duracao_formatada'
+                'duracao_formatada',
+                'atraso_despacho_segundos'
             ]
         }),
         ('Recovery', {
@@ -654,3 +728,9 @@ class LogSchedulerAdmin(admin.ModelAdmin):
     def mensagem_resumida(self, obj):
         return obj.mensagem[:100] + '...' if len(obj.mensagem) > 100 else obj.mensagem
     mensagem_resumida.short_description = 'Mensagem'
+
+
+@admin.register(LiderancaScheduler)
+class LiderancaSchedulerAdmin(admin.ModelAdmin):
+    list_display = ['nome', 'identidade', 'backend_pid', 'assumido_em', 'heartbeat_em', 'lease_expira_em']
+    readonly_fields = ['nome', 'identidade', 'backend_pid', 'assumido_em', 'heartbeat_em', 'lease_expira_em']
@@ -1,13 +1,24 @@
 from django.apps import AppConfig
 import os
+import threading
 
 
 class RotinasAutomaticasConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "rotinas_automaticas"
     
+    # Limpeza de startup: uma vez por processo, não a cada eleição ganha
+    _limpeza_startup_concluida = False
+    _trava_startup = threading.Lock()
+    
     def ready(self):
         """Executado quando a aplicação está pronta"""
+        from .processos_carga import eh_processo_carga
+        
+        # Filhos do pool de carga só processam arquivos: sem scheduler, monitor ou eleição
+        if eh_processo_carga():
+            return
+        
         # Verificar se estamos no Heroku
         is_heroku = os.environ.get('DYNO') is not None
         
@@ -20,23 +31,14 @@ class RotinasAutomaticasConfig(AppConfig):
         """Inicialização específica para ambiente Heroku"""
         try:
             # Iniciar em um thread separado para não bloquear o servidor
-            import threading
-            
             def iniciar_heroku_async():
                 # Dar tempo para o servidor Gunicorn inicializar completamente
                 import time
                 time.sleep(10)
                 
-                # Primeiro, corrigir URLs das rotinas
-                self._corrigir_urls_heroku()
-                
-                from .heroku_scheduler import iniciar_scheduler_heroku, iniciar_monitor_heroku
-                
-                # Inicializar scheduler
-                iniciar_scheduler_heroku()
-                
-                # Iniciar monitor
-                iniciar_monitor_heroku()
+                # Cada worker do gunicorn passa por aqui: só o líder do cluster
+                # roda a limpeza de startup e o monitor
+                self._iniciar_com_lideranca(self._assumir_lideranca_heroku)
             
             # Iniciar thread
             thread = threading.Thread(target=iniciar_heroku_async)
@@ -46,6 +48,50 @@ class RotinasAutomaticasConfig(AppConfig):
         except Exception as e:
             print(f"❌ Erro na inicialização do Heroku: {e}")
     
+    def _assumir_lideranca_heroku(self):
+        """Limpeza de startup e monitor no Heroku (executados pelo líder do cluster)"""
+        from .heroku_scheduler import iniciar_scheduler_heroku, iniciar_monitor_heroku
+        
+        continuar = self._continuar_mandato()
+        with self._trava_startup:
+            # Reeleições no mesmo processo só retomam o monitor
+            if not RotinasAutomaticasConfig._limpeza_startup_concluida:
+                # Primeiro, corrigir URLs das rotinas
+                if continuar():
+                    self._corrigir_urls_heroku()
+                
+                # Inicializar scheduler
+                iniciar_scheduler_heroku(continuar)
+                if not continuar():
+                    return  # Liderança perdida no meio: a limpeza fica para o próximo mandato
+                RotinasAutomaticasConfig._limpeza_startup_concluida = True
+            
+            # Iniciar monitor
+            iniciar_monitor_heroku()
+    
+    def _iniciar_com_lideranca(self, assumir):
+        """Disputa a liderança do cluster; sem eleição (desativada), assume direto"""
+        from django.conf import settings
+        
+        if not getattr(settings, 'SCHEDULER_LIDERANCA_ATIVA', True):
+            assumir()
+            return
+        
+        from .lideranca_scheduler import iniciar_eleicao
+        iniciar_eleicao(ao_assumir=assumir, ao_perder=self._deixar_lideranca)
+    
+    def _continuar_mandato(self):
+        """Verificação para as tarefas de startup do líder: falsa se a liderança deste mandato for perdida"""
+        from .lideranca_scheduler import mandato_atual, mandato_vigente
+        mandato = mandato_atual()
+        return lambda: mandato_vigente(mandato)
+    
+    def _deixar_lideranca(self):
+        """Contrapartida de assumir: para o monitor; a limpeza de startup em andamento
+        se interrompe na próxima etapa (_continuar_mandato)"""
+        from .monitor_scheduler import parar_monitor
+        parar_monitor()
+    
     def _corrigir_urls_heroku(self):
         """Corrige automaticamente as URLs das rotinas no ambiente Heroku"""
         try:
@@ -113,8 +159,10 @@ class RotinasAutomaticasConfig(AppConfig):
                 itens_erro.delete()
                 logger.info(f"🧹 Removidos {count_erros} itens da fila com erros de conexão")
             
-            # Resetar rotinas travadas
-            FilaExecucao.objects.filter(status='EXECUTANDO').update(status='PENDENTE')
+            # Resetar rotinas travadas: só as que passaram do timeout da rotina (as demais
+            # podem estar rodando no líder anterior ou em outro dyno)
+            from .scheduler_services import ExecutorRotinas
+            ExecutorRotinas().liberar_execucoes_expiradas()
             
             logger.info(f"🚀 Correção concluída: {rotinas_corrigidas} rotinas atualizadas")
             
@@ -134,26 +182,38 @@ class RotinasAutomaticasConfig(AppConfig):
             import time
             time.sleep(2)
             
-            # Inicializar sistema de scheduler
-            from .startup_scheduler import inicializar_scheduler
-            from .monitor_scheduler import iniciar_monitor
-            
-            print("\n🚀 Inicializando sistema de scheduler integrado...")
-            
-            # Carregar rotinas diárias e verificar integridade
-            inicializar_scheduler()
-            
-            # Iniciar monitor em background
-            monitor_iniciado = iniciar_monitor()
-            
-            if monitor_iniciado:
-                print("🔄 Monitor de background ativado")
-            else:
-                print("⚠️  Monitor já estava ativo")
-                
-            print("✅ Sistema de scheduler totalmente integrado ao Django!")
+            # Outro processo no mesmo banco pode já ser o líder
+            self._iniciar_com_lideranca(self._assumir_lideranca_local)
             
         except Exception as e:
             print(f"❌ Erro na inicialização do scheduler: {e}")
             print("   O servidor continuará funcionando, mas o scheduler pode não estar ativo")
             # Não impedir o Django de iniciar
+    
+    def _assumir_lideranca_local(self):
+        """Carga de startup e monitor no ambiente local (executados pelo líder)"""
+        # Inicializar sistema de scheduler
+        from .startup_scheduler import inicializar_scheduler
+        from .monitor_scheduler import iniciar_monitor
+        
+        print("\n🚀 Inicializando sistema de scheduler integrado...")
+        
+        continuar = self._continuar_mandato()
+        with self._trava_startup:
+            # Carregar rotinas diárias e verificar integridade (uma vez por processo)
+            if not RotinasAutomaticasConfig._limpeza_startup_concluida:
+                inicializar_scheduler(continuar)
+                if not continuar():
+                    print("🛑 Liderança perdida durante a inicialização do scheduler")
+                    return
+                RotinasAutomaticasConfig._limpeza_startup_concluida = True
+            
+            # Iniciar monitor em background
+            monitor_iniciado = iniciar_monitor()
+        
+        if monitor_iniciado:
+            print("🔄 Monitor de background ativado")
+        else:
+            print("⚠️  Monitor já estava ativo")
+            
+        print("✅ Sistema de scheduler totalmente integrado ao Django!")
@@ -0,0 +1,212 @@
+"""
+Backfill de Arquivos da B3
+==========================
+
+Carga histórica dos arquivos diários da B3 em um intervalo de datas qualquer
+(tabela BackfillB3):
+- Planejamento: pares (data, arquivo) dos pregões do intervalo (calendario_b3),
+  menos os já carregados em todas as tabelas destino (ledger de arquivos) e os
+  que a B3 não publicou
+- Pipeline: as datas vão em lotes; o download do lote seguinte (paralelo, via
+  download_b3) corre enquanto o lote atual é carregado pelo servico_carga
+- Progresso gravado a cada lote (pares, linhas, throughput e previsão de
+  término); uma execução interrompida é retomada com o mesmo backfill, que
+  replaneja só o que ainda falta
+
+Uso:
+    backfill = criar_backfill(date(2024, 1, 1), date(2024, 12, 31))
+    executar_backfill(backfill)
+
+Linha de comando: python manage.py backfill_b3 --inicio 2024-01-01 --fim 2024-12-31
+API: POST /api/backfill_b3/ {"inicio": "2024-01-01", "fim": "2024-12-31"}
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .models import ArquivoCarregado, BackfillB3
+from . import cache_downloads, calendario_b3, download_b3, servico_carga
+
+# Datas por lote do pipeline (cada data tem um arquivo por tipo)
+DIAS_POR_LOTE_PADRAO = 5
+
+
+def pares_carregados(inicio, fim, arquivos):
+    """Pares (data, arquivo) do intervalo já carregados em todas as tabelas destino
+
+    Os nomes dos arquivos da B3 trazem o tipo e a data: <fileName>_<YYYYMMDD>_<n>.csv.
+    Um arquivo só conta como carregado quando o ledger tem uma linha para cada
+    tabela das cargas registradas para ele (servico_carga.tabelas_destino).
+    """
+    padrao = re.compile(r'^(%s)_(\d{8})' % '|'.join(re.escape(arquivo) for arquivo in arquivos))
+    tabelas_por_nome = {}
+    for nome, tabela in ArquivoCarregado.objects.filter(arquivo__regex=padrao.pattern).values_list('arquivo', 'tabela_destino'):
+        tabelas_por_nome.setdefault(nome, set()).add(tabela)
+    carregados = set()
+    for nome, tabelas in tabelas_por_nome.items():
+        if not set(servico_carga.tabelas_destino(nome)) <= tabelas:
+            continue
+        encontrado = padrao.match(nome)
+        data = datetime.strptime(encontrado.group(2), '%Y%m%d').date()
+        if inicio <= data <= fim:
+            carregados.add((data.strftime("%Y-%m-%d"), encontrado.group(1)))
+    return carregados
+
+
+def planejar_pares(backfill):
+    """Pares (data, arquivo) que ainda faltam no intervalo do backfill, em ordem de data"""
+    arquivos = backfill.arquivos or download_b3.ARQUIVOS_B3
+    carregados = pares_carregados(backfill.data_inicio, backfill.data_fim, arquivos)
+    indisponiveis = set(backfill.pares_indisponiveis)
+    pares = [
+        (data, arquivo)
+        for data in (pregao.strftime("%Y-%m-%d") for pregao in calendario_b3.pregoes_entre(backfill.data_inicio, backfill.data_fim))
+        for arquivo in arquivos
+        if (data, arquivo) not in carregados and f"{data}:{arquivo}" not in indisponiveis
+    ]
+    return pares, len(carregados)
+
+
+def criar_backfill(inicio, fim, arquivos=None):
+    """Cria o registro de um backfill (executado por executar_backfill)"""
+    if inicio > fim:
+        raise ValueError(f"Data inicial {inicio} posterior à final {fim}")
+    return BackfillB3.objects.create(data_inicio=inicio, data_fim=fim, arquivos=list(arquivos or download_b3.ARQUIVOS_B3))
+
+
+def _baixar_lote(pares, pasta_destino, workers, estatisticas_cache):
+    """Download de um lote em uma thread do pipeline (com conexão de banco própria)"""
+    try:
+        return download_b3.baixar_pares_b3(pares, pasta_destino, workers, estatisticas_cache)
+    finally:
+        connection.close()
+
+
+def atualizar_progresso(backfill, inicio, linhas_lidas):
+    """Throughput e previsão de término a partir do andamento da execução atual"""
+    segundos = (timezone.now() - inicio).total_seconds()
+    feitos = backfill.pares_concluidos + backfill.pares_com_erro
+    restantes = backfill.total_pares - feitos
+    backfill.pares_por_minuto = feitos / segundos * 60 if segundos else 0.0
+    backfill.linhas_por_segundo = linhas_lidas / segundos if segundos else 0.0
+    backfill.previsao_termino = (
+        timezone.now() + timedelta(minutes=restantes / backfill.pares_por_minuto)
+        if backfill.pares_por_minuto else None
+    )
+    backfill.save()
+    eta = f"{backfill.previsao_termino:%d/%m/%Y %H:%M}" if backfill.previsao_termino else '-'
+    print(f"[BACKFILL] {feitos}/{backfill.total_pares} pares | {backfill.pares_por_minuto:,.1f} pares/min | "
+          f"{backfill.linhas_por_segundo:,.0f} linhas/s | erros: {backfill.pares_com_erro} | ETA {eta}")
+
+
+def executar_backfill(backfill, workers=None, dias_por_lote=None):
+    """Baixa e carrega os pares que faltam no intervalo; retorna o backfill atualizado"""
+    dias_por_lote = dias_por_lote or DIAS_POR_LOTE_PADRAO
+    pasta_destino = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+    os.makedirs(pasta_destino, exist_ok=True)
+    arquivos = backfill.arquivos or download_b3.ARQUIVOS_B3
+
+    pares, ja_carregados = planejar_pares(backfill)
+    backfill.status = 'EXECUTANDO'
+    backfill.iniciado_em = timezone.now()
+    backfill.finalizado_em = None
+    backfill.total_pares = len(pares)
+    backfill.pares_concluidos = 0
+    backfill.pares_com_erro = 0
+    backfill.pares_ja_carregados = ja_carregados
+    backfill.erro_detalhes = ''
+    backfill.save()
+    print(f"[BACKFILL] {backfill.data_inicio} a {backfill.data_fim}: {len(pares)} pares a carregar, "
+          f"{ja_carregados} já carregados")
+
+    # Lotes de dias_por_lote datas, na ordem das datas
+    tamanho_lote = dias_por_lote * len(arquivos)
+    lotes = [pares[posicao:posicao + tamanho_lote] for posicao in range(0, len(pares), tamanho_lote)]
+    estatisticas_cache = cache_downloads.EstatisticasCache()
+    inicio = timezone.now()
+    linhas_lidas = 0
+    erros = []
+
+    try:
+        with ThreadPoolExecutor(max_workers=1) as pipeline:
+            futuro = pipeline.submit(_baixar_lote, lotes[0], pasta_destino, workers, estatisticas_cache) if lotes else None
+            for posicao, lote in enumerate(lotes):
+                baixados = futuro.result()
+                # Próximo lote baixa enquanto este é carregado
+                if posicao + 1 < len(lotes):
+                    futuro = pipeline.submit(_baixar_lote, lotes[posicao + 1], pasta_destino, workers, estatisticas_cache)
+
+                for data, arquivo, resultado_download in baixados:
+                    if not resultado_download['sucesso']:
+                        if resultado_download.get('indisponivel'):
+                            backfill.pares_indisponiveis.append(f"{data}:{arquivo}")
+                            backfill.pares_concluidos += 1
+                        else:
+                            backfill.pares_com_erro += 1
+                            erros.append(f"{data} {arquivo}: {resultado_download['erro']}")
+                        continue
+
+                    nome_arquivo = resultado_download['nome_arquivo']
+                    if not os.path.exists(os.path.join(pasta_destino, nome_arquivo)):
+                        backfill.pares_concluidos += 1  # Conteúdo já carregado
+                        continue
+
+                    resultado_carga = servico_carga.carregar_arquivo(nome_arquivo)
+                    linhas_lidas += resultado_carga.linhas_processadas
+                    backfill.linhas_carregadas += resultado_carga.linhas_inseridas + resultado_carga.linhas_atualizadas
+                    if resultado_carga.sucesso:
+                        backfill.pares_concluidos += 1
+                    else:
+                        backfill.pares_com_erro += 1
+                        erros.append(f"{data} {arquivo}: {resultado_carga.mensagem}")
+
+                atualizar_progresso(backfill, inicio, linhas_lidas)
+    except Exception as e:
+        backfill.status = 'ERRO'
+        backfill.erro_detalhes = '\n'.join(erros + [f"Execução interrompida: {e}"])
+        backfill.finalizado_em = timezone.now()
+        backfill.save()
+        print(f"[ERROR] Backfill interrompido: {e}. Execute novamente para retomar")
+        return backfill
+
+    backfill.status = 'ERRO' if erros else 'CONCLUIDO'
+    backfill.erro_detalhes = '\n'.join(erros)
+    backfill.finalizado_em = timezone.now()
+    backfill.previsao_termino = None
+    backfill.save()
+    cache = estatisticas_cache.como_dict()
+    print(f"[BACKFILL] {backfill.status}: {backfill.pares_concluidos}/{backfill.total_pares} pares, "
+          f"{backfill.linhas_carregadas:,} linhas, cache {cache['acertos']} acertos / {cache['falhas']} downloads")
+    return backfill
+
+
+def progresso_backfill(backfill):
+    """Situação do backfill para a API"""
+    return {
+        'id': backfill.id,
+        'data_inicio': backfill.data_inicio.isoformat(),
+        'data_fim': backfill.data_fim.isoformat(),
+        'arquivos': backfill.arquivos,
+        'status': backfill.status,
+        'total_pares': backfill.total_pares,
+        'pares_concluidos': backfill.pares_concluidos,
+        'pares_com_erro': backfill.pares_com_erro,
+        'pares_ja_carregados': backfill.pares_ja_carregados,
+        'pares_indisponiveis': len(backfill.pares_indisponiveis),
+        'linhas_carregadas': backfill.linhas_carregadas,
+        'pares_por_minuto': backfill.pares_por_minuto,
+        'linhas_por_segundo': backfill.linhas_por_segundo,
+        'previsao_termino': backfill.previsao_termino.isoformat() if backfill.previsao_termino else None,
+        'iniciado_em': backfill.iniciado_em.isoformat() if backfill.iniciado_em else None,
+        'finalizado_em': backfill.finalizado_em.isoformat() if backfill.finalizado_em else None,
+        'erro_detalhes': backfill.erro_detalhes,
+    }
@@ -0,0 +1,156 @@
+"""
+Cache de Downloads (CVM e B3)
+=============================
+
+Validadores HTTP do último download de cada recurso (tabela CacheDownload),
+para que um conteúdo que a fonte não republicou não seja baixado de novo:
+- CVM: chave pela URL do zip; a requisição leva If-None-Match/If-Modified-Since
+- B3: chave por (fileName, data); datas passadas já em disco ou carregadas
+  dispensam até a requisição do token, e D0 usa a requisição condicional
+- Conteúdo inalterado: 304, mesmo ETag/Last-Modified ou, sem validadores, mesmo
+  Content-Length
+- Estatísticas de acertos/falhas por execução (EstatisticasCache) e acumuladas
+  por recurso
+
+O cache só é gravado depois que o conteúdo foi salvo ou carregado, então um
+download que falhou no meio é refeito na próxima execução.
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import threading
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CacheDownload
+from . import ledger_arquivos
+
+
+def chave_b3(nome_arquivo, data):
+    """Chave do cache de um arquivo da B3 em uma data"""
+    return f"b3:{nome_arquivo}:{data}"
+
+
+def obter_entrada(chave):
+    """Entrada do cache para a chave, ou None (erros de banco não impedem o download)"""
+    try:
+        return CacheDownload.objects.filter(chave=chave).first()
+    except Exception as e:
+        print(f"[WARNING] Erro ao consultar cache de downloads: {str(e)}")
+        return None
+
+
+def conteudo_disponivel(entrada, pasta):
+    """Indica se o conteúdo da entrada ainda está na pasta ou já foi carregado (ledger)"""
+    if entrada is None or not entrada.nome_arquivo:
+        return False
+    if os.path.exists(os.path.join(pasta, entrada.nome_arquivo)):
+        return True
+    if not entrada.sha256:
+        return False
+    try:
+        return ledger_arquivos.consultar_carga(entrada.sha256) is not None
+    except Exception as e:
+        print(f"[WARNING] Erro ao consultar ledger de arquivos: {str(e)}")
+        return False
+
+
+def cabecalhos_condicionais(entrada):
+    """Cabeçalhos da requisição condicional a partir dos validadores gravados"""
+    cabecalhos = {}
+    if entrada is None:
+        return cabecalhos
+    if entrada.etag:
+        cabecalhos['If-None-Match'] = entrada.etag
+    if entrada.last_modified:
+        cabecalhos['If-Modified-Since'] = entrada.last_modified
+    return cabecalhos
+
+
+def tamanho_resposta(resposta):
+    """Content-Length da resposta (None se ausente ou inválido)"""
+    try:
+        return int(resposta.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return None
+
+
+def conteudo_inalterado(entrada, resposta):
+    """Indica se a resposta (lida só até os cabeçalhos) é o mesmo conteúdo já baixado"""
+    if entrada is None:
+        return False
+    if resposta.status_code == 304:
+        return True
+    if resposta.status_code != 200:
+        return False
+
+    etag = resposta.headers.get('ETag', '')
+    last_modified = resposta.headers.get('Last-Modified', '')
+    if etag and entrada.etag:
+        return etag == entrada.etag
+    if last_modified and entrada.last_modified:
+        return last_modified == entrada.last_modified
+    # Sem validadores: o tamanho é o único indício disponível
+    tamanho = tamanho_resposta(resposta)
+    return tamanho is not None and tamanho == entrada.tamanho_bytes
+
+
+def registrar_acerto(entrada):
+    """Soma um download evitado na entrada (incremento no banco: downloads paralelos não perdem acertos)"""
+    try:
+        CacheDownload.objects.filter(pk=entrada.pk).update(acertos=F('acertos') + 1, verificado_em=timezone.now())
+    except Exception as e:
+        print(f"[WARNING] Erro ao atualizar cache de downloads: {str(e)}")
+
+
+def registrar_download(chave, url, resposta, tamanho_bytes=None, nome_arquivo='', sha256=''):
+    """Grava os validadores de um download completo (após o conteúdo ser salvo ou carregado)"""
+    try:
+        entrada, _ = CacheDownload.objects.get_or_create(chave=chave)
+        entrada.url = url
+        entrada.etag = resposta.headers.get('ETag', '')
+        entrada.last_modified = resposta.headers.get('Last-Modified', '')
+        entrada.tamanho_bytes = tamanho_resposta(resposta) or tamanho_bytes
+        entrada.nome_arquivo = nome_arquivo
+        entrada.sha256 = sha256
+        entrada.downloads += 1
+        entrada.baixado_em = timezone.now()
+        entrada.save()
+        return entrada
+    except Exception as e:
+        print(f"[WARNING] Erro ao gravar cache de downloads: {str(e)}")
+        return None
+
+
+class EstatisticasCache:
+    """Acertos e falhas do cache em uma execução do job de download (compartilhável entre threads)"""
+
+    def __init__(self):
+        self.acertos = 0
+        self.falhas = 0
+        self.bytes_evitados = 0
+        self.trava = threading.Lock()
+
+    def acerto(self, entrada=None):
+        with self.trava:
+            self.acertos += 1
+            if entrada is not None:
+                self.bytes_evitados += entrada.tamanho_bytes or 0
+        if entrada is not None:
+            registrar_acerto(entrada)
+
+    def falha(self):
+        with self.trava:
+            self.falhas += 1
+
+    def como_dict(self):
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': round(self.acertos / total, 4) if total else 0.0,
+            'bytes_evitados': self.bytes_evitados,
+        }
@@ -0,0 +1,136 @@
+"""
+Calendário de Pregões da B3
+===========================
+
+Dias de negociação da B3 para downloads, busca de arquivos e planejamento da
+fila do scheduler:
+- Feriados nacionais fixos e os dias sem pregão da B3 (24/12 e 31/12)
+- Feriados móveis calculados a partir da Páscoa: Carnaval (segunda e terça),
+  Sexta-feira Santa e Corpus Christi
+- Consciência Negra (20/11) como feriado nacional a partir de 2024
+- Fechamentos extraordinários em B3_FERIADOS_ADICIONAIS (lista 'YYYY-MM-DD')
+
+Os feriados de cada ano são calculados uma vez e ficam em cache (frozenset),
+então eh_dia_pregao() é uma consulta O(1).
+
+Uso:
+    eh_dia_pregao(date(2025, 3, 3))    # False (Carnaval)
+    ultimos_pregoes(3)                 # ['2025-09-08', '2025-09-09', '2025-09-10']
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from django.conf import settings
+
+# (mês, dia) sem pregão todos os anos
+FERIADOS_FIXOS = [
+    (1, 1),    # Confraternização Universal
+    (4, 21),   # Tiradentes
+    (5, 1),    # Dia do Trabalho
+    (9, 7),    # Independência
+    (10, 12),  # Nossa Senhora Aparecida
+    (11, 2),   # Finados
+    (11, 15),  # Proclamação da República
+    (12, 24),  # Véspera de Natal (sem pregão)
+    (12, 25),  # Natal
+    (12, 31),  # Último dia do ano (sem pregão)
+]
+
+# Consciência Negra virou feriado nacional (Lei 14.759/2023)
+ANO_INICIO_CONSCIENCIA_NEGRA = 2024
+
+# Limite de dias examinados para trás na busca de pregões
+MAXIMO_DIAS_BUSCA = 60
+
+
+def calcular_pascoa(ano):
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)"""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+@lru_cache(maxsize=None)
+def feriados_do_ano(ano):
+    """Datas sem pregão da B3 no ano (fins de semana à parte)"""
+    feriados = {date(ano, mes, dia) for mes, dia in FERIADOS_FIXOS}
+    if ano >= ANO_INICIO_CONSCIENCIA_NEGRA:
+        feriados.add(date(ano, 11, 20))
+
+    pascoa = calcular_pascoa(ano)
+    feriados.update({
+        pascoa - timedelta(days=48),  # Segunda-feira de Carnaval
+        pascoa - timedelta(days=47),  # Terça-feira de Carnaval
+        pascoa - timedelta(days=2),   # Sexta-feira Santa
+        pascoa + timedelta(days=60),  # Corpus Christi
+    })
+
+    for adicional in getattr(settings, 'B3_FERIADOS_ADICIONAIS', []):
+        data = datetime.strptime(adicional, '%Y-%m-%d').date()
+        if data.year == ano:
+            feriados.add(data)
+    return frozenset(feriados)
+
+
+def _como_data(data):
+    """Aceita date, datetime ou texto YYYY-MM-DD"""
+    if isinstance(data, str):
+        return datetime.strptime(data, '%Y-%m-%d').date()
+    if isinstance(data, datetime):
+        return data.date()
+    return data
+
+
+def eh_dia_pregao(data):
+    """Indica se há pregão na B3 na data"""
+    data = _como_data(data)
+    return data.weekday() < 5 and data not in feriados_do_ano(data.year)
+
+
+def pregao_anterior(data):
+    """Último pregão estritamente anterior à data"""
+    data = _como_data(data) - timedelta(days=1)
+    for _ in range(MAXIMO_DIAS_BUSCA):
+        if eh_dia_pregao(data):
+            return data
+        data -= timedelta(days=1)
+    raise ValueError(f"Nenhum pregão nos {MAXIMO_DIAS_BUSCA} dias anteriores a {data}")
+
+
+def pregoes_anteriores(n, data_referencia=None, incluir_referencia=True):
+    """Os n últimos pregões até a data de referência (padrão: hoje), do mais antigo para o mais recente"""
+    data = _como_data(data_referencia) if data_referencia else datetime.now().date()
+    pregoes = []
+    if incluir_referencia and eh_dia_pregao(data):
+        pregoes.append(data)
+    while len(pregoes) < n:
+        data = pregao_anterior(data)
+        pregoes.append(data)
+    return pregoes[::-1]
+
+
+def ultimos_pregoes(n, data_referencia=None):
+    """Os n últimos pregões (incluindo hoje, se for pregão) no formato YYYY-MM-DD"""
+    return [data.strftime("%Y-%m-%d") for data in pregoes_anteriores(n, data_referencia)]
+
+
+def pregoes_entre(inicio, fim):
+    """Pregões entre inicio e fim (inclusive), em ordem"""
+    inicio, fim = _como_data(inicio), _como_data(fim)
+    return [
+        inicio + timedelta(days=deslocamento)
+        for deslocamento in range((fim - inicio).days + 1)
+        if eh_dia_pregao(inicio + timedelta(days=deslocamento))
+    ]
@@ -0,0 +1,183 @@
+"""
+Rotina de Carga: B3 InstrumentsConsolidatedFile
+===============================================
+
+Carrega o cadastro de instrumentos da B3 (InstrumentsConsolidatedFile) na tabela
+'b3_instruments_consolidated':
+- Feed declarado para o MotorCarga (carga_declarativa): colunas localizadas pelo
+  cabeçalho, lotes via COPY + upsert por (codinst, datref), checkpoint, ledger
+  e RegistroExecucao ficam a cargo do motor
+- Cadastro em memória ticker -> (ISIN, segmento, CFI) montado a partir da carga,
+  para classificação com dados oficiais da B3
+
+Uso no processo (views, scheduler):
+    resultado = CargaB3Instruments('InstrumentsConsolidatedFile_20250908_1.csv').executar_carga()
+    cadastro = obter_cadastro_instrumentos()
+    cadastro['PETR4'].isin
+    tickers_fii, tickers_acao = tickers_por_cfi(cadastro)
+
+Linha de comando: rotinas_individuais/carga_declarativa.py --carga=b3_instruments [arquivo]
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import sys
+from collections import namedtuple
+
+from django.db.models import Max
+
+from .models import B3InstrumentsConsolidated
+from .carga_declarativa import EspecificacaoCarga, MotorCarga, converter_texto_maiusculo
+
+ESPECIFICACAO_INSTRUMENTOS = EspecificacaoCarga(
+    nome='b3_instruments',
+    mascara_arquivo='InstrumentsConsolidatedFile_*',
+    modelo=B3InstrumentsConsolidated,
+    chave=['codinst', 'datref'],
+    # Colunas do arquivo -> campos de B3InstrumentsConsolidated. Campos sem coluna
+    # correspondente no arquivo (tipreg, tipmerc, tpativo, setativ) ficam nulos.
+    colunas={
+        'rptdt': 'datref',
+        'tckrsymb': 'codinst',
+        'isin': 'isin',
+        'asstdesc': 'nomres',
+        'crpnnm': 'nomcom',
+        'sgmtnm': 'segmento',
+        'mktnm': 'mercado',
+        'sctyctgynm': 'classi',
+        'cficd': 'codcfi',
+        'tradgstartdt': 'dtini',
+        'tradgenddt': 'dtfim',
+    },
+    mapear_por_nome=False,
+    conversores={'codinst': converter_texto_maiusculo},
+    valores_fixos={'fonte': 'B3'},
+    campo_data='datref',
+    prefixo_processado='InstrumentsConsolidatedFile',
+)
+
+# Cadastro ticker -> dados oficiais da B3 (campos curtos, strings internadas)
+InstrumentoB3 = namedtuple('InstrumentoB3', ['isin', 'segmento', 'cfi'])
+
+# Cadastro carregado no processo: (datref, {ticker: InstrumentoB3})
+_cadastro_processo = None
+
+
+def classificar_por_cfi(cfi):
+    """Classifica o instrumento pelo código CFI (ISO 10962): 'Acao', 'FII' ou None
+
+    ES/EP: ações ordinárias/preferenciais. CB: REITs; CI com ativo 'R' (imobiliário)
+    na 5ª posição: fundos imobiliários.
+    """
+    cfi = (cfi or '').strip().upper()
+    if cfi[:2] in ('ES', 'EP'):
+        return 'Acao'
+    if cfi[:2] == 'CB' or (cfi[:2] == 'CI' and cfi[4:5] == 'R'):
+        return 'FII'
+    return None
+
+
+def _atualizar_cadastro_processo(datref, cadastro):
+    """Substitui o cadastro do processo se a data de referência for a mais recente"""
+    global _cadastro_processo
+    if cadastro and (_cadastro_processo is None or datref >= _cadastro_processo[0]):
+        _cadastro_processo = (datref, cadastro)
+
+
+def obter_cadastro_instrumentos(forcar_consulta=False):
+    """Cadastro ticker -> InstrumentoB3 da data de referência mais recente
+
+    Reaproveita o cadastro montado pela última carga no processo; consulta a tabela
+    só quando há uma data de referência mais nova (ou nenhum cadastro em memória).
+    """
+    datref = B3InstrumentsConsolidated.objects.aggregate(ultima=Max('datref'))['ultima']
+    if datref is None:
+        return {}
+    if not forcar_consulta and _cadastro_processo is not None and _cadastro_processo[0] >= datref:
+        return _cadastro_processo[1]
+
+    instrumentos = B3InstrumentsConsolidated.objects.filter(datref=datref).values_list(
+        'codinst', 'isin', 'segmento', 'codcfi'
+    )
+    cadastro = {
+        sys.intern(codinst): InstrumentoB3(isin, sys.intern(segmento or ''), sys.intern(codcfi or ''))
+        for codinst, isin, segmento, codcfi in instrumentos.iterator(chunk_size=20000)
+    }
+    _atualizar_cadastro_processo(datref, cadastro)
+    return cadastro
+
+
+def tickers_por_cfi(cadastro=None):
+    """Tickers do cadastro B3 classificados pelo CFI: (tickers FII, tickers de ações)
+
+    Complemento das tabelas de referência para instrumentos que ainda não constam nelas.
+    """
+    if cadastro is None:
+        cadastro = obter_cadastro_instrumentos()
+    fiis, acoes = set(), set()
+    for ticker, instrumento in cadastro.items():
+        tipo = classificar_por_cfi(instrumento.cfi)
+        if tipo == 'FII':
+            fiis.add(ticker)
+        elif tipo == 'Acao':
+            acoes.add(ticker)
+    return fiis, acoes
+
+
+def sql_tickers_por_cfi():
+    """Subconsulta (codigo, tipo) com a mesma regra de classificar_por_cfi, para cargas em SQL
+
+    Usa apenas a data de referência mais recente do cadastro; tipo é nulo para CFI sem classificação.
+    """
+    tabela = B3InstrumentsConsolidated._meta.db_table
+    cfi = "upper(btrim(coalesce(codcfi, '')))"
+    return f"""
+        SELECT upper(btrim(codinst)) AS codigo,
+               CASE WHEN left({cfi}, 2) IN ('ES', 'EP') THEN 'Acao'
+                    WHEN left({cfi}, 2) = 'CB' OR (left({cfi}, 2) = 'CI' AND substr({cfi}, 5, 1) = 'R') THEN 'FII'
+               END AS tipo
+        FROM {tabela}
+        WHERE codinst IS NOT NULL AND datref = (SELECT MAX(datref) FROM {tabela})
+    """
+
+
+class CargaB3Instruments(MotorCarga):
+    """Classe para processar arquivos InstrumentsConsolidatedFile da B3"""
+
+    especificacao = ESPECIFICACAO_INSTRUMENTOS
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cadastro = {}
+        self.data_cadastro = None
+        self.posicao_codinst = self.colunas.index('codinst')
+        self.posicao_isin = self.colunas.index('isin')
+        self.posicao_segmento = self.colunas.index('segmento')
+        self.posicao_cfi = self.colunas.index('codcfi')
+
+    def lote_gravado(self, linhas):
+        """Acrescenta as linhas gravadas ao cadastro ticker -> InstrumentoB3 da carga"""
+        for linha in linhas:
+            datref = linha[self.posicao_data]
+            if self.data_cadastro is None or datref > self.data_cadastro:
+                # Arquivo de data mais nova: o cadastro passa a refletir só essa data
+                self.data_cadastro = datref
+                self.cadastro = {}
+            elif datref < self.data_cadastro:
+                continue
+            self.cadastro[sys.intern(linha[self.posicao_codinst])] = InstrumentoB3(
+                linha[self.posicao_isin],
+                sys.intern(linha[self.posicao_segmento] or ''),
+                sys.intern(linha[self.posicao_cfi] or '')
+            )
+
+    def carga_finalizada(self):
+        # Cadastro da carga disponível para o processo sem nova consulta
+        _atualizar_cadastro_processo(self.data_cadastro, self.cadastro)
+
+    def observacoes_arquivo(self, info_arquivo, linhas_por_segundo):
+        return f"Instrumentos no cadastro: {len(self.cadastro):,}; {linhas_por_segundo:,.0f} linhas/s"
+
+    def mensagem_sucesso(self, arquivos):
+        return f"{len(arquivos)} arquivo(s) carregado(s); {len(self.cadastro):,} instrumentos no cadastro"
@@ -0,0 +1,107 @@
+"""
+Rotina de Carga: B3 TradeInformation detalhado (pregão regular e after-hours)
+============================================================================
+
+Carrega os arquivos TradeInformationConsolidatedFile e
+TradeInformationConsolidatedAfterHoursFile com todas as colunas na tabela
+'b3_trade_information' (B3TradeInformation):
+- Feed declarado para o MotorCarga (carga_declarativa): streaming com memória
+  constante, lotes via COPY + upsert por (codinst, datref, tipreg), checkpoint,
+  ledger, RegistroExecucao e taxa de linhas/segundo ficam a cargo do motor
+- tipreg identifica a sessão: REGULAR (pregão) ou AFTER (after-hours)
+
+Os arquivos do pregão regular continuam na pasta de origem após esta carga:
+quem os move para processados é a carga de preços (CargaB3TradeInformation),
+executada em seguida pelo servico_carga. Os arquivos after-hours são movidos aqui.
+
+Uso no processo (views, scheduler):
+    resultado = CargaB3TradeDetalhada('TradeInformationConsolidatedAfterHoursFile_20250910_1.csv').executar_carga()
+    resultado.linhas_por_segundo
+
+Linha de comando:
+    rotinas_individuais/carga_declarativa.py --carga=b3_trade_regular|b3_trade_after_hours [arquivo]
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+from .models import B3TradeInformation
+from .carga_declarativa import EspecificacaoCarga, MotorCarga, converter_texto_maiusculo
+
+# Sessão de negociação gravada em tipreg
+TIPREG_REGULAR = 'REGULAR'
+TIPREG_AFTER = 'AFTER'
+
+PADRAO_ARQUIVO_REGULAR = 'TradeInformationConsolidatedFile'
+PADRAO_ARQUIVO_AFTER = 'TradeInformationConsolidatedAfterHoursFile'
+
+# Colunas do arquivo -> campos de B3TradeInformation.
+# FrstPric, BestBidPric e BestAskPric só existem em algumas versões do arquivo regular.
+MAPA_COLUNAS_TRADE = {
+    'rptdt': 'datref',
+    'tckrsymb': 'codinst',
+    'isin': 'codisi',
+    'sgmtnm': 'segmento',
+    'frstpric': 'preabe',
+    'minpric': 'premin',
+    'maxpric': 'premax',
+    'tradavrgpric': 'premed',
+    'lastpric': 'preult',
+    'refpric': 'preref',
+    'oscnpctg': 'oscilacao',
+    'adjstdqt': 'preaju',
+    'adjstdqttax': 'taxaju',
+    'bestbidpric': 'preofc',
+    'bestaskpric': 'preofv',
+    'tradqty': 'totneg',
+    'fininstrmqty': 'quatot',
+    'ntlfinvol': 'voltot',
+}
+
+
+def tipreg_do_arquivo(nome_arquivo):
+    """Sessão de negociação do arquivo pelo nome"""
+    return TIPREG_AFTER if PADRAO_ARQUIVO_AFTER in nome_arquivo else TIPREG_REGULAR
+
+
+def _especificacao_trade(nome, mascara_arquivo, tipreg, mover_arquivo):
+    return EspecificacaoCarga(
+        nome=nome,
+        mascara_arquivo=mascara_arquivo,
+        modelo=B3TradeInformation,
+        chave=['codinst', 'datref', 'tipreg'],
+        colunas=MAPA_COLUNAS_TRADE,
+        mapear_por_nome=False,
+        conversores={'codinst': converter_texto_maiusculo},
+        valores_fixos={'tipreg': tipreg, 'fonte': 'B3'},
+        campo_data='datref',
+        prefixo_processado=PADRAO_ARQUIVO_AFTER,
+        mover_arquivo=lambda nome_arquivo: mover_arquivo,
+    )
+
+
+# Pregão regular: o arquivo fica para a carga de preços, que o move para processados
+ESPECIFICACAO_TRADE_REGULAR = _especificacao_trade(
+    'b3_trade_regular', f'{PADRAO_ARQUIVO_REGULAR}_*', TIPREG_REGULAR, mover_arquivo=False
+)
+ESPECIFICACAO_TRADE_AFTER = _especificacao_trade(
+    'b3_trade_after_hours', f'{PADRAO_ARQUIVO_AFTER}_*', TIPREG_AFTER, mover_arquivo=True
+)
+
+
+class CargaB3TradeDetalhada(MotorCarga):
+    """Classe para carregar os arquivos TradeInformation (regular e after-hours) em B3TradeInformation
+
+    A especificação (regular ou after-hours) é escolhida pelo nome do arquivo; sem
+    arquivo específico, carrega os arquivos after-hours da pasta de origem.
+    """
+
+    def __init__(self, arquivo_especifico=None, modo_insercao=None, forcar_recarga=False, especificacao=None):
+        if especificacao is None:
+            especificacao = (ESPECIFICACAO_TRADE_REGULAR
+                             if arquivo_especifico and tipreg_do_arquivo(arquivo_especifico) == TIPREG_REGULAR
+                             else ESPECIFICACAO_TRADE_AFTER)
+        super().__init__(arquivo_especifico, modo_insercao, forcar_recarga, especificacao)
+
+    def observacoes_arquivo(self, info_arquivo, linhas_por_segundo):
+        return f"Sessao {tipreg_do_arquivo(info_arquivo['nome'])}; {linhas_por_segundo:,.0f} linhas/s"
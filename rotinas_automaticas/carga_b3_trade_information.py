@@ -0,0 +1,1206 @@
+"""
+Rotina de Carga: B3 TradeInformationConsolidatedFile
+=====================================================
+
+Este módulo processa arquivos TradeInformationConsolidatedFile da B3 e carrega os dados
+na tabela 'organizesee_ativosprecos', filtrando apenas dados relevantes (FII e Ações).
+
+Requisitos:
+- Filtrar linhas com MaxPrice (coluna F) não nulo
+- Classificar ticker como FII ou Ação baseado em tabelas de referência; tickers ausentes
+  delas são classificados pelo código CFI do cadastro de instrumentos da B3
+- Carregar apenas tickers conhecidos (FII ou Ação)
+- Mover arquivos processados para pasta 'processados'
+
+Uso no processo (views, scheduler):
+    resultado = CargaB3TradeInformation('TradeInformationConsolidatedFile_20250908_1.csv').executar_carga()
+    resultado.status, resultado.linhas_inseridas
+
+Linha de comando: rotinas_individuais/carga_b3_TradeInformationConsolidatedFile_sem_emoji.py
+
+Autor: Sistema Automatizado
+Data: 10/09/2025
+"""
+
+import os
+import csv
+import shutil
+import random
+from concurrent.futures import as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import connection, connections, transaction
+
+from .models import FundoListadoB3, AnualFcaCiaAbertaValorMobiliario, RegistroExecucao, CheckpointCarga
+from .indice_tickers import obter_indice_tickers
+from . import ledger_arquivos
+from .carga_bulk import (
+    TABELA_ATIVOS_PRECOS, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS, MODO_COPY, MODO_EXECUTEMANY, MODO_STAGING,
+    MODOS_INSERCAO, upsert_linhas, upsert_linhas_executemany, upsert_buffer, mesclar_selecao, criar_staging_texto,
+    copiar_arquivo, sql_texto_para_numeric, sql_texto_para_data, COLUNA_ORDEM_STAGING
+)
+from . import parser_b3
+from .processos_carga import criar_pool_processos
+
+# Parsers disponíveis para os modos de inserção linha a linha (copy/executemany)
+PARSER_CSV = 'csv'
+PARSER_VETORIZADO = 'vetorizado'
+
+# Colunas do arquivo TradeInformationConsolidatedFile, na ordem do cabeçalho
+COLUNAS_ARQUIVO_TRADE = [
+    'rptdt', 'tckrsymb', 'isin', 'sgmtnm', 'minpric', 'maxpric', 'tradavrgpric', 'lastpric', 'oscnpctg',
+    'adjstdqt', 'adjstdqttax', 'refpric', 'tradqty', 'fininstrmqty', 'ntlfinvol'
+]
+STAGING_ARQUIVO_TRADE = 'stg_b3_trade_information'
+STAGING_TRADE_CLASSIFICADO = 'stg_b3_trade_information_classificado'
+
+# Status do resultado da carga
+STATUS_SUCESSO = 'sucesso'
+STATUS_PARCIAL = 'parcial'  # Parte dos arquivos com erro
+STATUS_ERRO = 'erro'
+
+
+@dataclass
+class ResultadoCarga:
+    """Resultado de uma execução da carga, devolvido por executar_carga()"""
+    status: str
+    mensagem: str
+    arquivos_processados: List[str] = field(default_factory=list)
+    arquivos_com_erro: List[str] = field(default_factory=list)
+    arquivos_ignorados: List[str] = field(default_factory=list)  # Conteúdo já carregado (ledger)
+    linhas_processadas: int = 0
+    linhas_inseridas: int = 0
+    linhas_atualizadas: int = 0
+    linhas_rejeitadas: int = 0
+    linhas_ignoradas: int = 0
+    tickers_nao_carregados: int = 0
+    duracao_segundos: float = 0.0
+    linhas_por_segundo: float = 0.0
+    saida: Optional[str] = None  # stdout da carga, quando executada em subprocesso
+
+    @property
+    def sucesso(self) -> bool:
+        return self.status == STATUS_SUCESSO
+
+
+class CargaB3TradeInformation:
+    """Classe para processar arquivos TradeInformationConsolidatedFile da B3"""
+    
+    def __init__(self, arquivo_especifico=None, modo_insercao=None, parser=None, workers=None, forcar_recarga=False):
+        self.pasta_origem = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+        self.pasta_destino = os.path.join(settings.BASE_DIR, 'static', 'processados')
+        self.pasta_logs = os.path.join(settings.BASE_DIR, 'static', 'logs')
+        self.arquivo_especifico = arquivo_especifico  # Novo parâmetro para arquivo específico
+        self.tabela_destino = TABELA_ATIVOS_PRECOS
+        self.modo_insercao = modo_insercao or getattr(settings, 'CARGA_B3_MODO_INSERCAO', MODO_COPY)
+        if self.modo_insercao not in MODOS_INSERCAO:
+            print(f"Modo de insercao desconhecido: {self.modo_insercao}. Usando {MODO_EXECUTEMANY}")
+            self.modo_insercao = MODO_EXECUTEMANY
+        self.parser = parser or getattr(settings, 'CARGA_B3_PARSER', PARSER_VETORIZADO)
+        if self.parser == PARSER_VETORIZADO and not parser_b3.numpy_disponivel():
+            print("NumPy nao disponivel. Usando parser csv")
+            self.parser = PARSER_CSV
+        # Arquivos carregados em paralelo, um por processo (1 = sequencial)
+        self.workers = max(1, workers or getattr(settings, 'CARGA_ARQUIVOS_WORKERS', 1))
+        self.lista_tickers_fii = set()
+        self.lista_tickers_acao = set()
+        self.arquivos_processados = []
+        self.arquivos_com_erro = []
+        self.arquivos_ignorados = []
+        # Recarregar mesmo arquivos cujo conteúdo já consta no ledger
+        self.forcar_recarga = forcar_recarga
+        self.total_linhas_processadas = 0
+        self.total_linhas_inseridas = 0
+        self.total_linhas_rejeitadas = 0
+        self.total_linhas_atualizadas = 0
+        self.total_linhas_ignoradas = 0
+        self.tickers_nao_carregados = set()
+        self.amostras_arquivo = []
+        self.cabecalho_arquivo = None
+        self.registro_execucao = None
+        self.checkpoint = None
+        
+        # Criar pasta de logs se não existir
+        os.makedirs(self.pasta_logs, exist_ok=True)
+    
+    def criar_registro_execucao(self, nome_arquivo):
+        """Cria registro de execução na tabela"""
+        try:
+            self.registro_execucao = RegistroExecucao.objects.create(
+                job_arquivo_processo=f"carga_b3_TradeInformationConsolidatedFile - {nome_arquivo}",
+                tabela_destino="organizesee_ativosprecos",
+                status_execucao='EXECUTANDO',
+                sistema='B3',
+                grupo='DIARIO'
+            )
+            print(f"   Registro de execução criado - ID: {self.registro_execucao.id}")
+        except Exception as e:
+            print(f"   ERRO ao criar registro de execução: {e}")
+            self.registro_execucao = None
+    
+    def atualizar_registro_execucao(self, status, **kwargs):
+        """Atualiza registro de execução"""
+        if not self.registro_execucao:
+            return
+            
+        try:
+            self.registro_execucao.status_execucao = status
+            
+            # Atualizar campos específicos
+            for campo, valor in kwargs.items():
+                if hasattr(self.registro_execucao, campo):
+                    setattr(self.registro_execucao, campo, valor)
+            
+            # Se for finalização, marcar data/hora
+            if status in ['CONCLUIDA', 'ERRO', 'CANCELADO']:
+                self.registro_execucao.dia_horario_finalizacao = datetime.now()
+            
+            self.registro_execucao.save()
+            
+        except Exception as e:
+            print(f"   ERRO ao atualizar registro de execução: {e}")
+    
+    def gerar_log_estruturado(self, nome_arquivo):
+        """Gera log estruturado do processamento"""
+        try:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nome_arquivo_base = os.path.splitext(nome_arquivo)[0]
+            nome_log = f"log_{nome_arquivo_base}_{timestamp}.txt"
+            caminho_log = os.path.join(self.pasta_logs, nome_log)
+            
+            with open(caminho_log, 'w', encoding='utf-8') as log_file:
+                log_file.write("=" * 80 + "\n")
+                log_file.write("LOG DE PROCESSAMENTO - B3 TRADE INFORMATION CONSOLIDATED FILE\n")
+                log_file.write("=" * 80 + "\n\n")
+                
+                # Informações gerais
+                log_file.write("INFORMAÇÕES GERAIS\n")
+                log_file.write("-" * 40 + "\n")
+                log_file.write(f"Arquivo processado: {nome_arquivo}\n")
+                log_file.write(f"Data de processamento: {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}\n")
+                log_file.write(f"Tabela destino: organizesee_ativosprecos\n")
+                log_file.write(f"Sistema: B3\n")
+                log_file.write(f"Grupo: Diário\n\n")
+                
+                # Cabeçalho do arquivo
+                if self.cabecalho_arquivo:
+                    log_file.write("CABEÇALHO DO ARQUIVO\n")
+                    log_file.write("-" * 40 + "\n")
+                    for i, campo in enumerate(self.cabecalho_arquivo):
+                        log_file.write(f"Coluna {i+1:2d}: {campo}\n")
+                    log_file.write("\n")
+                
+                # Amostras do arquivo (15 linhas randômicas)
+                if self.amostras_arquivo:
+                    log_file.write("AMOSTRAS DO ARQUIVO (15 LINHAS RANDÔMICAS)\n")
+                    log_file.write("-" * 40 + "\n")
+                    for i, amostra in enumerate(self.amostras_arquivo[:15], 1):
+                        log_file.write(f"Linha {i:2d}: {amostra}\n")
+                    log_file.write("\n")
+                
+                # Estatísticas de processamento
+                log_file.write("ESTATÍSTICAS DE PROCESSAMENTO\n")
+                log_file.write("-" * 40 + "\n")
+                log_file.write(f"Total de linhas do arquivo: {self.total_linhas_processadas:,}\n")
+                log_file.write(f"Registros novos inseridos: {self.total_linhas_inseridas:,}\n")
+                log_file.write(f"Registros atualizados: {self.total_linhas_atualizadas:,}\n")
+                log_file.write(f"Registros rejeitados: {self.total_linhas_rejeitadas:,}\n")
+                log_file.write(f"Registros ignorados: {self.total_linhas_ignoradas:,}\n")
+                
+                if self.total_linhas_processadas > 0:
+                    taxa = (self.total_linhas_inseridas / self.total_linhas_processadas) * 100
+                    log_file.write(f"Taxa de aproveitamento: {taxa:.1f}%\n")
+                log_file.write("\n")
+                
+                # Tickers não carregados (filtrados por regra final 3, 4 ou 11)
+                if self.tickers_nao_carregados:
+                    log_file.write("TICKERS NÃO CARREGADOS (REGRA FINAL 3, 4 OU 11)\n")
+                    log_file.write("-" * 40 + "\n")
+                    log_file.write("Tickers que apareceram no arquivo mas não foram carregados\n")
+                    log_file.write("por não estarem nas listas de referência (FII ou Ações):\n\n")
+                    
+                    # Filtrar apenas tickers que terminam com 3, 4 ou 11
+                    tickers_filtrados = [ticker for ticker in self.tickers_nao_carregados 
+                                       if ticker.endswith(('3', '4', '11'))]
+                    
+                    if tickers_filtrados:
+                        for ticker in sorted(tickers_filtrados):
+                            log_file.write(f"   - {ticker}\n")
+                    else:
+                        log_file.write("   Nenhum ticker encontrado com terminação 3, 4 ou 11\n")
+                    
+                    log_file.write(f"\nTotal de tickers não carregados (filtrados): {len(tickers_filtrados)}\n")
+                    log_file.write(f"Total de tickers não carregados (geral): {len(self.tickers_nao_carregados)}\n\n")
+                
+                # Listas de referência
+                log_file.write("LISTAS DE REFERÊNCIA\n")
+                log_file.write("-" * 40 + "\n")
+                log_file.write(f"Tickers FII conhecidos: {len(self.lista_tickers_fii)}\n")
+                log_file.write(f"Tickers Ação conhecidos: {len(self.lista_tickers_acao)}\n\n")
+                
+                log_file.write("=" * 80 + "\n")
+                log_file.write("FIM DO LOG\n")
+                log_file.write("=" * 80 + "\n")
+            
+            # Atualizar registro de execução com caminho do log
+            if self.registro_execucao:
+                self.registro_execucao.arquivo_log = caminho_log
+                self.registro_execucao.save()
+            
+            print(f"   Log estruturado gerado: {nome_log}")
+            return caminho_log
+            
+        except Exception as e:
+            print(f"   ERRO ao gerar log estruturado: {e}")
+            return None
+        
+    def carregar_listas_referencia(self):
+        """Carrega listas de tickers FII e Ações das tabelas de referência"""
+        print("Carregando listas de referencia...")
+        
+        # Índice em disco compartilhado entre execuções (reconstruído quando as tabelas mudam)
+        try:
+            indice = obter_indice_tickers()
+            self.lista_tickers_fii = indice.tickers_fii()
+            self.lista_tickers_acao = indice.tickers_acao()
+            print(f"Indice de tickers carregado (versao {indice.versao})")
+            print(f"FII: {len(self.lista_tickers_fii)} codigos carregados")
+            print(f"Acoes: {len(self.lista_tickers_acao)} codigos carregados")
+        except Exception as e:
+            print(f"Erro ao carregar indice de tickers: {e}. Consultando tabelas de referencia")
+            self.carregar_tabelas_referencia()
+        
+        self.complementar_com_cadastro_b3()
+        print(f"Total de tickers de referencia: {len(self.lista_tickers_fii) + len(self.lista_tickers_acao)}")
+    
+    def carregar_tabelas_referencia(self):
+        """Carrega as listas direto das tabelas de referência (sem o índice em disco)"""
+        # Lista de FII
+        try:
+            fiis = FundoListadoB3.objects.values_list('codigo', flat=True).distinct()
+            self.lista_tickers_fii = {fii.strip().upper() for fii in fiis if fii and fii.strip()}
+            print(f"FII: {len(self.lista_tickers_fii)} codigos carregados")
+        except Exception as e:
+            print(f"Erro ao carregar lista FII: {e}")
+            self.lista_tickers_fii = set()
+        
+        # Lista de Ações
+        try:
+            # Usar SQL direta devido ao mapeamento de campo com maiúscula
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT DISTINCT "Codigo_Negociacao" FROM rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario WHERE "Codigo_Negociacao" IS NOT NULL')
+                acoes = [row[0] for row in cursor.fetchall()]
+            self.lista_tickers_acao = {acao.strip().upper() for acao in acoes if acao and acao.strip()}
+            print(f"Acoes: {len(self.lista_tickers_acao)} codigos carregados")
+        except Exception as e:
+            print(f"Erro ao carregar lista Acoes: {e}")
+            self.lista_tickers_acao = set()
+    
+    def complementar_com_cadastro_b3(self):
+        """Acrescenta tickers ausentes das tabelas de referência, classificados pelo CFI da B3
+        
+        As tabelas de referência prevalecem: o CFI só classifica tickers que não estão em nenhuma das listas.
+        """
+        # Import local: carga_b3_instruments depende de carga_declarativa, que importa este módulo
+        from .carga_b3_instruments import tickers_por_cfi
+        
+        try:
+            fiis_cfi, acoes_cfi = tickers_por_cfi()
+        except Exception as e:
+            print(f"Erro ao carregar cadastro de instrumentos B3: {e}")
+            return
+        
+        conhecidos = self.lista_tickers_fii | self.lista_tickers_acao
+        novos_fii = fiis_cfi - conhecidos
+        novas_acoes = acoes_cfi - conhecidos
+        # Novos conjuntos: os do índice podem ser compartilhados e não devem ser alterados
+        self.lista_tickers_fii = self.lista_tickers_fii | novos_fii
+        self.lista_tickers_acao = self.lista_tickers_acao | novas_acoes
+        print(f"Cadastro B3 (CFI): {len(novos_fii)} FII e {len(novas_acoes)} acoes acrescentados")
+    
+    def encontrar_arquivos_trade_information(self):
+        """Encontra arquivos TradeInformationConsolidatedFile na pasta de origem"""
+        arquivos = []
+        
+        if not os.path.exists(self.pasta_origem):
+            print(f"Pasta de origem nao encontrada: {self.pasta_origem}")
+            return arquivos
+        
+        # Se um arquivo específico foi solicitado, processar apenas ele
+        if self.arquivo_especifico:
+            caminho_especifico = os.path.join(self.pasta_origem, self.arquivo_especifico)
+            if os.path.exists(caminho_especifico):
+                arquivos.append({
+                    'nome': self.arquivo_especifico,
+                    'caminho': caminho_especifico,
+                    'tamanho_mb': os.path.getsize(caminho_especifico) / (1024 * 1024)
+                })
+                print(f"Arquivo especifico encontrado: {self.arquivo_especifico}")
+            else:
+                print(f"Arquivo especifico nao encontrado: {self.arquivo_especifico}")
+            return arquivos
+        
+        # Caso contrário, encontrar todos os arquivos TradeInformationConsolidatedFile
+        for arquivo in os.listdir(self.pasta_origem):
+            if 'TradeInformationConsolidatedFile' in arquivo and (arquivo.endswith('.txt') or arquivo.endswith('.csv')):
+                caminho_completo = os.path.join(self.pasta_origem, arquivo)
+                arquivos.append({
+                    'nome': arquivo,
+                    'caminho': caminho_completo,
+                    'tamanho_mb': os.path.getsize(caminho_completo) / (1024 * 1024)
+                })
+        
+        # Ordenar por nome (que geralmente contém a data)
+        arquivos.sort(key=lambda x: x['nome'])
+        
+        print(f"Encontrados {len(arquivos)} arquivos TradeInformationConsolidatedFile:")
+        for arq in arquivos:
+            print(f"   - {arq['nome']} ({arq['tamanho_mb']:.1f} MB)")
+        
+        return arquivos
+    
+    def extrair_data_arquivo(self, nome_arquivo):
+        """Extrai data do nome do arquivo"""
+        try:
+            # Formato esperado: TradeInformationConsolidatedFile_20250908_1.csv
+            partes = nome_arquivo.split('_')
+            for parte in partes:
+                # Procurar por uma parte que tenha 8 dígitos (YYYYMMDD)
+                if parte.isdigit() and len(parte) == 8:
+                    # Converter YYYYMMDD para YYYY-MM-DD
+                    ano = parte[:4]
+                    mes = parte[4:6]
+                    dia = parte[6:8]
+                    data_str = f"{ano}-{mes}-{dia}"
+                    return datetime.strptime(data_str, '%Y-%m-%d').date()
+            
+            # Se não encontrar data no nome, usar data atual
+            print(f"   AVISO: Nao foi possivel extrair data do arquivo {nome_arquivo}, usando data atual")
+            return datetime.now().date()
+        except Exception as e:
+            print(f"   ERRO ao extrair data do arquivo {nome_arquivo}: {e}, usando data atual")
+            return datetime.now().date()
+    
+    def classificar_ticker(self, ticker):
+        """Classifica ticker como FII, Ação ou Desconhecido"""
+        ticker_clean = ticker.strip().upper()
+        
+        if ticker_clean in self.lista_tickers_fii:
+            return 'FII'
+        elif ticker_clean in self.lista_tickers_acao:
+            return 'Acao'
+        else:
+            return None  # Desconhecido - será rejeitado
+    
+    def processar_linha_csv(self, linha):
+        """Processa uma linha do CSV e retorna dados formatados para inserção"""
+        try:
+            # Estrutura do arquivo:
+            # RptDt;TckrSymb;ISIN;SgmtNm;MinPric;MaxPric;TradAvrgPric;LastPric;OscnPctg;AdjstdQt;AdjstdQtTax;RefPric;TradQty;FinInstrmQty;NtlFinVol
+            # Índices: 0=RptDt, 1=TckrSymb, 2=ISIN, 3=SgmtNm, 4=MinPric, 5=MaxPric, 6=TradAvrgPric, 7=LastPric, 13=FinInstrmQty, 14=NtlFinVol
+            
+            # Adicionar amostra aleatória (com chance de 0.1%) para o log
+            if random.random() < 0.001 and len(self.amostras_arquivo) < 50:
+                self.amostras_arquivo.append("|".join(linha))
+            
+            # Verificar se temos colunas suficientes
+            if len(linha) < 6:
+                return None
+            
+            # Extrair e validar data do campo RptDt (coluna 0)
+            rpt_dt = linha[0].strip() if len(linha) > 0 else ''
+            if not rpt_dt:
+                return None
+            
+            # Converter data do formato YYYY-MM-DD para objeto date
+            try:
+                data_referencia = datetime.strptime(rpt_dt, '%Y-%m-%d').date()
+            except ValueError:
+                # Tentar outros formatos possíveis
+                try:
+                    data_referencia = datetime.strptime(rpt_dt, '%d/%m/%Y').date()
+                except ValueError:
+                    try:
+                        data_referencia = datetime.strptime(rpt_dt, '%Y%m%d').date()
+                    except ValueError:
+                        print(f"   Formato de data nao reconhecido: {rpt_dt}")
+                        return None
+            
+            # Verificar se MaxPrice (coluna 5) não está vazio
+            if len(linha) < 6 or not linha[5].strip():
+                return None
+            
+            # Extrair campos principais
+            ticker = linha[1].strip() if len(linha) > 1 else ''  # TckrSymb
+            max_price = linha[5].strip() if len(linha) > 5 else ''  # MaxPric
+            
+            if not ticker or not max_price:
+                return None
+            
+            # Classificar ticker
+            tipo = self.classificar_ticker(ticker)
+            if not tipo:
+                # Adicionar ticker não carregado à lista para o log
+                self.tickers_nao_carregados.add(ticker)
+                return None  # Rejeitar tickers desconhecidos
+            
+            # Extrair preços (ajustar baseado na estrutura real do arquivo)
+            try:
+                # Converter vírgulas em pontos para decimais
+                min_price_str = linha[4].strip().replace(',', '.') if len(linha) > 4 and linha[4].strip() else None
+                max_price_str = linha[5].strip().replace(',', '.') if len(linha) > 5 and linha[5].strip() else None
+                avg_price_str = linha[6].strip().replace(',', '.') if len(linha) > 6 and linha[6].strip() else None
+                last_price_str = linha[7].strip().replace(',', '.') if len(linha) > 7 and linha[7].strip() else None
+                volume_str = linha[14].strip().replace(',', '.') if len(linha) > 14 and linha[14].strip() else None
+                
+                # Converter para Decimal
+                low_price = Decimal(min_price_str) if min_price_str else None
+                high_price = Decimal(max_price_str) if max_price_str else None
+                close_price = Decimal(last_price_str) if last_price_str else None  # LastPric como close
+                open_price = close_price  # Usar close como open (arquivo não tem open específico)
+                volume = Decimal(volume_str) if volume_str else None
+                
+            except (InvalidOperation, ValueError, IndexError):
+                return None
+            
+            # Sem LastPric não há close (coluna NOT NULL): rejeitar, como os modos staging e vetorizado
+            if close_price is None:
+                return None
+            
+            return {
+                'tipo': tipo,
+                'ticker': ticker.upper(),
+                'open': open_price,
+                'high': high_price,
+                'low': low_price,
+                'close': close_price,
+                'volume': volume,
+                'data': data_referencia,  # Usar data extraída do RptDt
+                'fonte': 'B3'
+            }
+            
+        except Exception as e:
+            print(f"Erro ao processar linha: {e}")
+            return None
+    
+    @property
+    def tamanho_lote(self):
+        """Quantidade de registros por lote/transação conforme o modo de inserção"""
+        # COPY envia o lote inteiro em um único comando, então lotes maiores compensam
+        return 50000 if self.modo_insercao == MODO_COPY else 1000
+    
+    def montar_valores(self, dados_batch):
+        """Converte os dicionários do lote em tuplas na ordem de COLUNAS_ATIVOS_PRECOS"""
+        return [
+            (
+                item['tipo'],
+                item['ticker'],
+                item['open'],
+                item['high'],
+                item['low'],
+                item['close'],
+                item['volume'],
+                item['data'],
+                item['fonte']
+            )
+            for item in dados_batch
+        ]
+    
+    def inserir_dados_bulk(self, dados_batch):
+        """Grava dados em lote na tabela organizesee_ativosprecos com upsert por (ticker, data, fonte)
+
+        Retorna (inseridos, atualizados); reprocessar o mesmo arquivo não duplica linhas.
+        """
+        if not dados_batch:
+            return 0, 0
+        
+        if self.modo_insercao == MODO_COPY:
+            try:
+                # Savepoint próprio para permitir o fallback dentro da transação do lote
+                with transaction.atomic():
+                    return self.inserir_dados_copy(dados_batch)
+            except Exception as e:
+                print(f"Erro na insercao via COPY: {e}. Usando executemany como fallback")
+                self.modo_insercao = MODO_EXECUTEMANY
+        
+        return self.inserir_dados_executemany(dados_batch)
+    
+    def inserir_dados_copy(self, dados_batch):
+        """Grava o lote via COPY em staging temporária e mescla com INSERT ... ON CONFLICT"""
+        with connection.cursor() as cursor:
+            return upsert_linhas(
+                cursor, self.tabela_destino, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS,
+                self.montar_valores(dados_batch)
+            )
+    
+    def inserir_dados_executemany(self, dados_batch):
+        """Grava o lote com INSERT ... ON CONFLICT linha a linha (modo original, mantido como fallback)
+
+        Erros não são engolidos: o lote roda na mesma transação do checkpoint, e
+        propagar a exceção desfaz os dois juntos em vez de gravar o checkpoint
+        sobre uma transação abortada.
+        """
+        with connection.cursor() as cursor:
+            return upsert_linhas_executemany(
+                cursor, self.tabela_destino, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS,
+                self.montar_valores(dados_batch)
+            )
+    
+    def processar_arquivo(self, info_arquivo):
+        """Processa um arquivo TradeInformationConsolidatedFile"""
+        nome_arquivo = info_arquivo['nome']
+        caminho_arquivo = info_arquivo['caminho']
+        
+        print(f"\nProcessando: {nome_arquivo}")
+        print(f"   Tamanho: {info_arquivo['tamanho_mb']:.1f} MB")
+        print(f"   Data sera extraida do campo RptDt de cada linha")
+        print(f"   Modo de insercao: {self.modo_insercao}")
+        if self.modo_insercao != MODO_STAGING:
+            print(f"   Parser: {self.parser}")
+        
+        # Conteúdo idêntico a um arquivo já carregado nesta tabela: nada a fazer
+        if self.verificar_ledger(info_arquivo):
+            return
+        
+        # Criar registro de execução
+        self.criar_registro_execucao(nome_arquivo)
+        
+        # Retomar de uma carga anterior interrompida deste arquivo, se houver
+        self.checkpoint = self.obter_checkpoint(info_arquivo)
+        
+        # Resetar contadores para este arquivo
+        self.tickers_nao_carregados.clear()
+        self.amostras_arquivo.clear()
+        self.cabecalho_arquivo = None
+        
+        if self.modo_insercao == MODO_STAGING:
+            try:
+                resultado = self.carregar_arquivo_staging(caminho_arquivo)
+            except Exception as e:
+                print(f"   Erro na carga via staging: {e}. Usando processamento linha a linha como fallback")
+                self.modo_insercao = MODO_COPY
+                self.tickers_nao_carregados.clear()
+                self.amostras_arquivo.clear()
+                self.cabecalho_arquivo = None
+            else:
+                if resultado['linhas_processadas'] == 0:
+                    print("   Arquivo vazio")
+                    self.registrar_erro_arquivo(nome_arquivo, "Arquivo vazio")
+                    return
+                self.finalizar_arquivo(info_arquivo, **resultado)
+                return
+        
+        if self.parser == PARSER_VETORIZADO:
+            try:
+                resultado = self.carregar_arquivo_vetorizado(caminho_arquivo)
+            except Exception as e:
+                print(f"Erro ao processar arquivo {nome_arquivo}: {e}")
+                self.registrar_erro_arquivo(nome_arquivo, str(e))
+                return
+            if resultado['linhas_processadas'] == 0:
+                print("   Arquivo vazio")
+                self.registrar_erro_arquivo(nome_arquivo, "Arquivo vazio")
+                return
+            self.finalizar_arquivo(info_arquivo, **resultado)
+            return
+        
+        # Contadores partem do checkpoint (zerados em uma carga nova)
+        linhas_processadas = self.checkpoint.linhas_processadas
+        linhas_inseridas = self.checkpoint.linhas_inseridas
+        linhas_atualizadas = self.checkpoint.linhas_atualizadas
+        linhas_rejeitadas = self.checkpoint.linhas_rejeitadas
+        batch_size = self.tamanho_lote  # 50000 por lote com COPY, 1000 com executemany
+        dados_batch = []
+        data_dos_dados = self.checkpoint.data_dos_dados  # Para capturar a data real dos dados
+        posicao = {'offset': self.checkpoint.offset_bytes}  # Bytes consumidos pelo csv.reader
+        
+        try:
+            with open(caminho_arquivo, 'rb') as arquivo:
+                # Usar csv.reader para melhor performance; o arquivo é lido em binário para
+                # acompanhar o offset em bytes de cada lote confirmado
+                arquivo.seek(posicao['offset'])
+                reader = csv.reader(self.ler_linhas_texto(arquivo, posicao), delimiter=';')
+                
+                # Pular cabeçalho se existir (ao retomar de um checkpoint o arquivo já está após ele)
+                if not posicao['offset']:
+                    try:
+                        primeira_linha = next(reader)
+                        
+                        # Capturar cabeçalho para o log
+                        if not self.eh_linha_dados(primeira_linha):
+                            print("   Cabecalho detectado e capturado para log")
+                            self.cabecalho_arquivo = primeira_linha
+                        else:
+                            # Se primeira linha é dados, processar ela
+                            dados = self.processar_linha_csv(primeira_linha)
+                            if dados:
+                                dados_batch.append(dados)
+                                if data_dos_dados is None:
+                                    data_dos_dados = dados['data']  # Capturar primeira data válida
+                            linhas_processadas += 1
+                    except StopIteration:
+                        print("   Arquivo vazio")
+                        self.registrar_erro_arquivo(nome_arquivo, "Arquivo vazio")
+                        return
+                
+                # Processar linhas restantes
+                for linha in reader:
+                    linhas_processadas += 1
+                    
+                    if linhas_processadas % 10000 == 0:
+                        print(f"   Processadas: {linhas_processadas:,} linhas")
+                    
+                    dados = self.processar_linha_csv(linha)
+                    
+                    if dados:
+                        dados_batch.append(dados)
+                        if data_dos_dados is None:
+                            data_dos_dados = dados['data']  # Capturar primeira data válida
+                        
+                        # Inserir em lote quando atingir batch_size; o checkpoint é confirmado junto com o lote
+                        if len(dados_batch) >= batch_size:
+                            with transaction.atomic():
+                                inseridos, atualizados = self.inserir_dados_bulk(dados_batch)
+                                linhas_inseridas += inseridos
+                                linhas_atualizadas += atualizados
+                                self.gravar_checkpoint(
+                                    posicao['offset'], linhas_processadas, linhas_inseridas, linhas_atualizadas,
+                                    linhas_rejeitadas, data_dos_dados
+                                )
+                            dados_batch = []
+                    else:
+                        linhas_rejeitadas += 1
+                
+                # Inserir último lote
+                if dados_batch:
+                    with transaction.atomic():
+                        inseridos, atualizados = self.inserir_dados_bulk(dados_batch)
+                        linhas_inseridas += inseridos
+                        linhas_atualizadas += atualizados
+                        self.gravar_checkpoint(
+                            posicao['offset'], linhas_processadas, linhas_inseridas, linhas_atualizadas,
+                            linhas_rejeitadas, data_dos_dados
+                        )
+        
+        except Exception as e:
+            print(f"Erro ao processar arquivo {nome_arquivo}: {e}")
+            self.registrar_erro_arquivo(nome_arquivo, str(e))
+            return
+        
+        self.finalizar_arquivo(
+            info_arquivo, linhas_processadas, linhas_inseridas, linhas_atualizadas, linhas_rejeitadas, data_dos_dados
+        )
+    
+    def carregar_arquivo_vetorizado(self, caminho_arquivo):
+        """Carrega o arquivo em blocos colunares (parser NumPy), gravando cada bloco em uma transação
+        
+        Retorna os contadores no formato esperado por finalizar_arquivo.
+        """
+        referencia_fii = parser_b3.montar_array_tickers(self.lista_tickers_fii)
+        referencia_acao = parser_b3.montar_array_tickers(self.lista_tickers_acao)
+        
+        with open(caminho_arquivo, 'rb') as arquivo:
+            self.cabecalho_arquivo = parser_b3.pular_cabecalho(arquivo)
+        
+        # Contadores partem do checkpoint (zerados em uma carga nova)
+        checkpoint = self.checkpoint
+        linhas_processadas = checkpoint.linhas_processadas
+        linhas_aceitas = checkpoint.linhas_processadas - checkpoint.linhas_rejeitadas
+        linhas_inseridas = checkpoint.linhas_inseridas
+        linhas_atualizadas = checkpoint.linhas_atualizadas
+        data_dos_dados = checkpoint.data_dos_dados
+        
+        for linhas, offset_final in parser_b3.ler_blocos(caminho_arquivo, offset_inicial=checkpoint.offset_bytes):
+            # Amostras aleatórias (~0.1% das linhas) para o log
+            quantidade_amostras = min(len(linhas) // 1000, 50 - len(self.amostras_arquivo))
+            for linha in random.sample(linhas, max(quantidade_amostras, 0)):
+                self.amostras_arquivo.append(linha.decode('utf-8', errors='ignore').rstrip('\r\n').replace(';', '|'))
+            
+            bloco = parser_b3.parsear_bloco(linhas, referencia_fii, referencia_acao)
+            linhas_processadas += bloco['total_linhas']
+            linhas_aceitas += bloco['linhas_aceitas']
+            self.tickers_nao_carregados.update(bloco['tickers_desconhecidos'])
+            if data_dos_dados is None:
+                data_dos_dados = bloco['data_minima']
+            print(f"   Processadas: {linhas_processadas:,} linhas")
+            
+            # Bloco e checkpoint confirmados na mesma transação
+            with transaction.atomic():
+                if bloco['linhas_aceitas']:
+                    inseridos, atualizados = self.inserir_bloco(bloco)
+                    linhas_inseridas += inseridos
+                    linhas_atualizadas += atualizados
+                self.gravar_checkpoint(
+                    offset_final, linhas_processadas, linhas_inseridas, linhas_atualizadas,
+                    linhas_processadas - linhas_aceitas, data_dos_dados
+                )
+        
+        return {
+            'linhas_processadas': linhas_processadas,
+            'linhas_inseridas': linhas_inseridas,
+            'linhas_atualizadas': linhas_atualizadas,
+            'linhas_rejeitadas': linhas_processadas - linhas_aceitas,
+            'data_dos_dados': data_dos_dados,
+        }
+    
+    def inserir_bloco(self, bloco):
+        """Grava um bloco colunar do parser vetorizado; retorna (inseridos, atualizados)"""
+        if self.modo_insercao == MODO_COPY:
+            try:
+                # Savepoint próprio para permitir o fallback dentro da transação do bloco
+                with transaction.atomic(), connection.cursor() as cursor:
+                    return upsert_buffer(
+                        cursor, self.tabela_destino, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS,
+                        parser_b3.montar_buffer_copy_bloco(bloco)
+                    )
+            except Exception as e:
+                print(f"Erro na insercao via COPY: {e}. Usando executemany como fallback")
+                self.modo_insercao = MODO_EXECUTEMANY
+        
+        with connection.cursor() as cursor:
+            return upsert_linhas_executemany(
+                cursor, self.tabela_destino, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS,
+                parser_b3.linhas_do_bloco(bloco)
+            )
+    
+    def carregar_arquivo_staging(self, caminho_arquivo):
+        """Carrega o arquivo via COPY bruto em staging, com classificação e conversão em SQL
+        
+        Evita o parse linha a linha em Python: o arquivo vai inteiro para uma tabela
+        temporária, um único JOIN classifica os tickers contra as tabelas de referência
+        e um INSERT ... SELECT grava as linhas aceitas. Os contadores vêm de agregações.
+        Retorna os contadores no formato esperado por finalizar_arquivo.
+        """
+        with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as arquivo:
+            # Pular o preâmbulo ("Status do Arquivo: Final") e o cabeçalho (RptDt;TckrSymb;...)
+            inicio_dados = 0
+            for _ in range(5):
+                linha = arquivo.readline()
+                if not linha:
+                    break
+                campos = linha.rstrip('\r\n').split(';')
+                if campos[0].strip().lower() == 'rptdt':
+                    print("   Cabecalho detectado e capturado para log")
+                    self.cabecalho_arquivo = campos
+                    inicio_dados = arquivo.tell()
+                    break
+            arquivo.seek(inicio_dados)
+            
+            # Import local: carga_b3_instruments depende de carga_declarativa, que importa este módulo
+            from .carga_b3_instruments import sql_tickers_por_cfi
+            
+            with transaction.atomic(), connection.cursor() as cursor:
+                criar_staging_texto(cursor, STAGING_ARQUIVO_TRADE, COLUNAS_ARQUIVO_TRADE)
+                copiar_arquivo(cursor, STAGING_ARQUIVO_TRADE, COLUNAS_ARQUIVO_TRADE, arquivo)
+                
+                # Amostras aleatórias para o log
+                colunas_amostra = ', '.join(f'coalesce("{coluna}", \'\')' for coluna in COLUNAS_ARQUIVO_TRADE)
+                cursor.execute(
+                    f"SELECT concat_ws('|', {colunas_amostra}) FROM {STAGING_ARQUIVO_TRADE} ORDER BY random() LIMIT 15"
+                )
+                self.amostras_arquivo = [row[0] for row in cursor.fetchall()]
+                
+                # Classificação FII/Ação em um único JOIN contra as tabelas de referência (CFI da B3 como complemento)
+                cursor.execute(f"DROP TABLE IF EXISTS {STAGING_TRADE_CLASSIFICADO}")
+                cursor.execute(f"""
+                    CREATE TEMP TABLE {STAGING_TRADE_CLASSIFICADO} AS
+                    SELECT
+                        CASE WHEN fii.codigo IS NOT NULL THEN 'FII'
+                             WHEN acao.codigo IS NOT NULL THEN 'Acao'
+                             ELSE cfi.tipo END AS tipo,
+                        linha.ticker,
+                        {sql_texto_para_numeric('linha.lastpric')} AS "open",
+                        {sql_texto_para_numeric('linha.maxpric')} AS high,
+                        {sql_texto_para_numeric('linha.minpric')} AS low,
+                        {sql_texto_para_numeric('linha.lastpric')} AS "close",
+                        {sql_texto_para_numeric('linha.ntlfinvol')} AS volume,
+                        linha.data,
+                        'B3'::varchar AS fonte,
+                        linha.{COLUNA_ORDEM_STAGING}
+                    FROM (
+                        SELECT stg.*, upper(btrim(stg.tckrsymb)) AS ticker, {sql_texto_para_data('stg.rptdt')} AS data
+                        FROM {STAGING_ARQUIVO_TRADE} stg
+                        WHERE btrim(coalesce(stg.maxpric, '')) <> '' AND btrim(coalesce(stg.tckrsymb, '')) <> ''
+                    ) linha
+                    LEFT JOIN (
+                        SELECT DISTINCT upper(btrim(codigo)) AS codigo
+                        FROM rotinas_automaticas_fundolistadob3 WHERE codigo IS NOT NULL
+                    ) fii ON fii.codigo = linha.ticker
+                    LEFT JOIN (
+                        SELECT DISTINCT upper(btrim("Codigo_Negociacao")) AS codigo
+                        FROM rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario WHERE "Codigo_Negociacao" IS NOT NULL
+                    ) acao ON acao.codigo = linha.ticker
+                    LEFT JOIN ({sql_tickers_por_cfi()}) cfi ON cfi.codigo = linha.ticker
+                    WHERE linha.data IS NOT NULL
+                """)
+                
+                # Contadores a partir de agregações
+                cursor.execute(f"SELECT COUNT(*) FROM {STAGING_ARQUIVO_TRADE}")
+                linhas_processadas = cursor.fetchone()[0]
+                cursor.execute(f"""
+                    SELECT
+                        COUNT(*) FILTER (WHERE tipo IS NOT NULL AND "close" IS NOT NULL),
+                        MIN(data) FILTER (WHERE tipo IS NOT NULL AND "close" IS NOT NULL)
+                    FROM {STAGING_TRADE_CLASSIFICADO}
+                """)
+                linhas_aceitas, data_dos_dados = cursor.fetchone()
+                cursor.execute(f"SELECT DISTINCT ticker FROM {STAGING_TRADE_CLASSIFICADO} WHERE tipo IS NULL")
+                self.tickers_nao_carregados.update(row[0] for row in cursor.fetchall())
+                
+                # Gravação das linhas aceitas com upsert por (ticker, data, fonte)
+                colunas_destino = ', '.join(f'"{coluna}"' for coluna in COLUNAS_ATIVOS_PRECOS + [COLUNA_ORDEM_STAGING])
+                linhas_inseridas, linhas_atualizadas = mesclar_selecao(
+                    cursor, self.tabela_destino, COLUNAS_ATIVOS_PRECOS, CHAVE_ATIVOS_PRECOS,
+                    f'SELECT {colunas_destino} FROM {STAGING_TRADE_CLASSIFICADO} '
+                    f'WHERE tipo IS NOT NULL AND "close" IS NOT NULL'
+                )
+        
+        return {
+            'linhas_processadas': linhas_processadas,
+            'linhas_inseridas': linhas_inseridas,
+            'linhas_atualizadas': linhas_atualizadas,
+            'linhas_rejeitadas': linhas_processadas - linhas_aceitas,
+            'data_dos_dados': data_dos_dados,
+        }
+    
+    def finalizar_arquivo(self, info_arquivo, linhas_processadas, linhas_inseridas, linhas_atualizadas,
+                          linhas_rejeitadas, data_dos_dados):
+        """Consolida estatísticas, gera log, atualiza o registro de execução e move o arquivo"""
+        nome_arquivo = info_arquivo['nome']
+        
+        # Linhas aceitas que já existiam com os mesmos valores (reprocessamento)
+        linhas_inalteradas = linhas_processadas - linhas_rejeitadas - linhas_inseridas - linhas_atualizadas
+        
+        # Estatísticas do arquivo
+        print(f"   Processamento concluido:")
+        print(f"   Linhas processadas: {linhas_processadas:,}")
+        print(f"   Linhas inseridas: {linhas_inseridas:,}")
+        print(f"   Linhas atualizadas: {linhas_atualizadas:,}")
+        print(f"   Linhas inalteradas: {linhas_inalteradas:,}")
+        print(f"   Linhas rejeitadas: {linhas_rejeitadas:,}")
+        print(f"   Taxa de aproveitamento: {(linhas_inseridas/linhas_processadas*100):.1f}%")
+        if data_dos_dados:
+            print(f"   Data dos dados: {data_dos_dados}")
+        
+        # Atualizar totais da classe
+        self.total_linhas_processadas += linhas_processadas
+        self.total_linhas_inseridas += linhas_inseridas
+        self.total_linhas_atualizadas += linhas_atualizadas
+        self.total_linhas_rejeitadas += linhas_rejeitadas
+        self.total_linhas_ignoradas += linhas_inalteradas
+        
+        # Gerar log estruturado
+        caminho_log = self.gerar_log_estruturado(nome_arquivo)
+        
+        # Atualizar registro de execução com dados finais
+        self.atualizar_registro_execucao(
+            'CONCLUIDA',
+            registros_totais_novos=linhas_inseridas,
+            quantidade_linhas_arquivo=linhas_processadas,
+            registros_totais_arquivo=linhas_processadas,
+            registros_totais_atualizados=linhas_atualizadas,
+            # Ignorados: linhas rejeitadas no filtro + linhas idênticas às já existentes
+            registros_totais_ignorados=linhas_rejeitadas + linhas_inalteradas,
+            observacoes=f"Taxa de aproveitamento: {(linhas_inseridas/linhas_processadas*100):.1f}%. "
+                       f"Tickers não carregados: {len(self.tickers_nao_carregados)}"
+        )
+        
+        # Carga completa: o checkpoint não é mais necessário e o conteúdo entra no ledger
+        self.remover_checkpoint()
+        self.registrar_ledger(info_arquivo, linhas_processadas - linhas_rejeitadas, data_dos_dados)
+        
+        # Mover arquivo para pasta processados usando a data real dos dados
+        self.mover_arquivo_processado(info_arquivo, data_dos_dados)
+    
+    def registrar_erro_arquivo(self, nome_arquivo, erro_detalhes):
+        """Marca o arquivo como não carregado e grava o erro no registro de execução"""
+        self.arquivos_com_erro.append(nome_arquivo)
+        if self.checkpoint is not None and self.checkpoint.lotes_confirmados:
+            erro_detalhes = (f"{erro_detalhes} (checkpoint: {self.checkpoint.lotes_confirmados} lotes, "
+                             f"linha {self.checkpoint.linhas_processadas}, offset {self.checkpoint.offset_bytes})")
+        self.atualizar_registro_execucao('ERRO', erro_detalhes=erro_detalhes)
+    
+    def verificar_ledger(self, info_arquivo):
+        """Calcula o SHA-256 do arquivo e indica se o mesmo conteúdo já foi carregado
+        
+        Arquivos já carregados são movidos para processados sem nova carga.
+        """
+        try:
+            info_arquivo['sha256'] = ledger_arquivos.calcular_sha256(info_arquivo['caminho'])
+            if self.forcar_recarga:
+                return False
+            carga_anterior = ledger_arquivos.consultar_carga(info_arquivo['sha256'], self.tabela_destino)
+        except Exception as e:
+            print(f"   ERRO ao consultar ledger de arquivos: {e}. Carregando o arquivo")
+            return False
+        
+        if carga_anterior is None:
+            return False
+        
+        print(f"   Conteudo ja carregado em {carga_anterior.carregado_em:%d/%m/%Y %H:%M} "
+              f"({carga_anterior.arquivo}, {carga_anterior.linhas_carregadas:,} linhas). Arquivo ignorado")
+        self.arquivos_ignorados.append(info_arquivo['nome'])
+        self.mover_arquivo_processado(info_arquivo, carga_anterior.data_referencia)
+        return True
+    
+    def registrar_ledger(self, info_arquivo, linhas_carregadas, data_dos_dados):
+        """Registra o conteúdo do arquivo carregado no ledger"""
+        if not info_arquivo.get('sha256'):
+            return
+        try:
+            ledger_arquivos.registrar_carga(
+                info_arquivo['caminho'], info_arquivo['sha256'], self.tabela_destino, linhas_carregadas, data_dos_dados
+            )
+        except Exception as e:
+            print(f"   ERRO ao registrar arquivo no ledger: {e}")
+    
+    def obter_checkpoint(self, info_arquivo):
+        """Checkpoint de uma carga interrompida deste arquivo, ou um novo (gravado só no primeiro lote)"""
+        checkpoint = CheckpointCarga(
+            arquivo=info_arquivo['nome'],
+            tamanho_bytes=os.path.getsize(info_arquivo['caminho']),
+            tabela_destino=self.tabela_destino
+        )
+        try:
+            checkpoint = CheckpointCarga.objects.get(
+                arquivo=checkpoint.arquivo, tamanho_bytes=checkpoint.tamanho_bytes,
+                tabela_destino=checkpoint.tabela_destino
+            )
+            print(f"   Retomando do checkpoint: {checkpoint.lotes_confirmados} lotes confirmados, "
+                  f"linha {checkpoint.linhas_processadas:,}, offset {checkpoint.offset_bytes:,} bytes")
+        except CheckpointCarga.DoesNotExist:
+            pass
+        except Exception as e:
+            print(f"   ERRO ao consultar checkpoint: {e}. Carregando o arquivo desde o inicio")
+        return checkpoint
+    
+    def gravar_checkpoint(self, offset_bytes, linhas_processadas, linhas_inseridas, linhas_atualizadas,
+                          linhas_rejeitadas, data_dos_dados):
+        """Atualiza o checkpoint; deve ser chamado dentro da transação do lote"""
+        checkpoint = self.checkpoint
+        checkpoint.offset_bytes = offset_bytes
+        checkpoint.linhas_processadas = linhas_processadas
+        checkpoint.lotes_confirmados += 1
+        checkpoint.linhas_inseridas = linhas_inseridas
+        checkpoint.linhas_atualizadas = linhas_atualizadas
+        checkpoint.linhas_rejeitadas = linhas_rejeitadas
+        checkpoint.data_dos_dados = data_dos_dados
+        checkpoint.registro_execucao = self.registro_execucao
+        checkpoint.save()
+    
+    def remover_checkpoint(self):
+        """Remove o checkpoint do arquivo após a carga completa"""
+        try:
+            if self.checkpoint is not None and self.checkpoint.pk:
+                CheckpointCarga.objects.filter(pk=self.checkpoint.pk).delete()
+        except Exception as e:
+            print(f"   ERRO ao remover checkpoint: {e}")
+        self.checkpoint = None
+    
+    def ler_linhas_texto(self, arquivo, posicao):
+        """Lê as linhas do arquivo binário como texto, somando em posicao['offset'] os bytes consumidos"""
+        for linha in arquivo:
+            posicao['offset'] += len(linha)
+            yield linha.decode('utf-8', errors='ignore')
+    
+    def eh_linha_dados(self, linha):
+        """Verifica se a linha contém dados (não é cabeçalho)"""
+        if not linha or len(linha) < 2:
+            return False
+        
+        # Se o segundo campo (TckrSymb) contém apenas letras/números, provavelmente é dados
+        ticker = linha[1].strip() if len(linha) > 1 else ''
+        return bool(ticker and ticker.replace('-', '').replace('.', '').isalnum())
+    
+    def mover_arquivo_processado(self, info_arquivo, data_dos_dados=None):
+        """Move arquivo processado para pasta processados com novo nome"""
+        try:
+            nome_original = info_arquivo['nome']
+            caminho_original = info_arquivo['caminho']
+            
+            # Usar data dos dados se disponível, senão usar data/hora atual
+            if data_dos_dados:
+                data_str = data_dos_dados.strftime('%d%m%Y')
+                nome_processado = f"TradeInformationConsolidatedFile-{data_str}.carregado"
+            else:
+                # Fallback para data/hora atual se não conseguir extrair data dos dados
+                data_atual = datetime.now()
+                timestamp = data_atual.strftime('%d%m%Y_%H%M%S')
+                nome_processado = f"TradeInformationConsolidatedFile-{timestamp}.carregado"
+            
+            caminho_processado = os.path.join(self.pasta_destino, nome_processado)
+            
+            # Garantir que pasta destino existe
+            os.makedirs(self.pasta_destino, exist_ok=True)
+            
+            # Mover arquivo
+            shutil.move(caminho_original, caminho_processado)
+            
+            print(f"   Arquivo movido para: {nome_processado}")
+            self.arquivos_processados.append(nome_processado)
+            
+        except Exception as e:
+            print(f"Erro ao mover arquivo {info_arquivo['nome']}: {e}")
+    
+    def resumo_totais(self):
+        """Totais acumulados pela instância, no formato consumido por acumular_totais"""
+        return {
+            'total_linhas_processadas': self.total_linhas_processadas,
+            'total_linhas_inseridas': self.total_linhas_inseridas,
+            'total_linhas_atualizadas': self.total_linhas_atualizadas,
+            'total_linhas_rejeitadas': self.total_linhas_rejeitadas,
+            'total_linhas_ignoradas': self.total_linhas_ignoradas,
+            'arquivos_processados': list(self.arquivos_processados),
+            'arquivos_com_erro': list(self.arquivos_com_erro),
+            'arquivos_ignorados': list(self.arquivos_ignorados),
+            'tickers_nao_carregados': set(self.tickers_nao_carregados),
+        }
+    
+    def acumular_totais(self, resumo):
+        """Soma aos totais da instância o resumo de um arquivo processado em outro processo"""
+        self.total_linhas_processadas += resumo['total_linhas_processadas']
+        self.total_linhas_inseridas += resumo['total_linhas_inseridas']
+        self.total_linhas_atualizadas += resumo['total_linhas_atualizadas']
+        self.total_linhas_rejeitadas += resumo['total_linhas_rejeitadas']
+        self.total_linhas_ignoradas += resumo['total_linhas_ignoradas']
+        self.arquivos_processados.extend(resumo['arquivos_processados'])
+        self.arquivos_com_erro.extend(resumo['arquivos_com_erro'])
+        self.arquivos_ignorados.extend(resumo['arquivos_ignorados'])
+        self.tickers_nao_carregados.update(resumo['tickers_nao_carregados'])
+    
+    def processar_arquivos_paralelo(self, arquivos):
+        """Processa os arquivos em um pool de processos, cada um com conexão e transações próprias"""
+        workers = min(self.workers, len(arquivos))
+        print(f"Usando {workers} processos em paralelo")
+        
+        with criar_pool_processos(workers) as pool:
+            futuros = {
+                pool.submit(
+                    _processar_arquivo_em_processo, info_arquivo, self.modo_insercao, self.parser, self.forcar_recarga,
+                    self.lista_tickers_fii, self.lista_tickers_acao
+                ): info_arquivo
+                for info_arquivo in arquivos
+            }
+            for futuro in as_completed(futuros):
+                info_arquivo = futuros[futuro]
+                try:
+                    self.acumular_totais(futuro.result())
+                except Exception as e:
+                    print(f"Erro ao processar arquivo {info_arquivo['nome']} em paralelo: {e}")
+                    self.arquivos_com_erro.append(info_arquivo['nome'])
+    
+    def montar_resultado(self, status, mensagem, inicio):
+        """Monta o ResultadoCarga a partir dos totais acumulados"""
+        duracao_segundos = (datetime.now() - inicio).total_seconds()
+        return ResultadoCarga(
+            status=status,
+            mensagem=mensagem,
+            arquivos_processados=list(self.arquivos_processados),
+            arquivos_com_erro=list(self.arquivos_com_erro),
+            arquivos_ignorados=list(self.arquivos_ignorados),
+            linhas_processadas=self.total_linhas_processadas,
+            linhas_inseridas=self.total_linhas_inseridas,
+            linhas_atualizadas=self.total_linhas_atualizadas,
+            linhas_rejeitadas=self.total_linhas_rejeitadas,
+            linhas_ignoradas=self.total_linhas_ignoradas,
+            tickers_nao_carregados=len(self.tickers_nao_carregados),
+            duracao_segundos=duracao_segundos,
+            linhas_por_segundo=self.total_linhas_processadas / duracao_segundos if duracao_segundos else 0.0,
+        )
+    
+    def executar_carga(self) -> ResultadoCarga:
+        """Executa o processo completo de carga e retorna o ResultadoCarga"""
+        print("Iniciando Carga B3 TradeInformationConsolidatedFile")
+        print("=" * 60)
+        
+        inicio = datetime.now()
+        
+        # 1. Carregar listas de referência
+        self.carregar_listas_referencia()
+        
+        if not self.lista_tickers_fii and not self.lista_tickers_acao:
+            print("Nenhuma lista de referencia carregada. Abortando processo.")
+            return self.montar_resultado(STATUS_ERRO, "Nenhuma lista de referencia carregada", inicio)
+        
+        # 2. Encontrar arquivos para processar
+        arquivos = self.encontrar_arquivos_trade_information()
+        
+        if not arquivos:
+            print("Nenhum arquivo TradeInformationConsolidatedFile encontrado.")
+            mensagem = (f"Arquivo nao encontrado: {self.arquivo_especifico}" if self.arquivo_especifico
+                        else "Nenhum arquivo TradeInformationConsolidatedFile encontrado")
+            return self.montar_resultado(STATUS_ERRO, mensagem, inicio)
+        
+        # 3. Processar cada arquivo
+        print(f"\nProcessando {len(arquivos)} arquivo(s)...")
+        
+        if self.workers > 1 and len(arquivos) > 1:
+            self.processar_arquivos_paralelo(arquivos)
+        else:
+            for info_arquivo in arquivos:
+                self.processar_arquivo(info_arquivo)
+        
+        # 4. Estatísticas finais
+        fim = datetime.now()
+        duracao = fim - inicio
+        
+        print("\n" + "=" * 60)
+        print("RESUMO DA CARGA")
+        print("=" * 60)
+        print(f"Tempo de execucao: {duracao}")
+        print(f"Arquivos processados: {len(self.arquivos_processados)}")
+        print(f"Arquivos ignorados (conteudo ja carregado): {len(self.arquivos_ignorados)}")
+        print(f"Total de linhas processadas: {self.total_linhas_processadas:,}")
+        print(f"Total de linhas inseridas: {self.total_linhas_inseridas:,}")
+        print(f"Total de linhas atualizadas: {self.total_linhas_atualizadas:,}")
+        print(f"Total de linhas rejeitadas: {self.total_linhas_rejeitadas:,}")
+        
+        if self.total_linhas_processadas > 0:
+            taxa_aproveitamento = (self.total_linhas_inseridas / self.total_linhas_processadas) * 100
+            print(f"Taxa de aproveitamento geral: {taxa_aproveitamento:.1f}%")
+        
+        print(f"Tickers FII conhecidos: {len(self.lista_tickers_fii)}")
+        print(f"Tickers Acao conhecidos: {len(self.lista_tickers_acao)}")
+        print(f"Tickers nao carregados (total): {len(self.tickers_nao_carregados)}")
+        
+        # Contar tickers não carregados filtrados (terminados em 3, 4 ou 11)
+        tickers_filtrados = [t for t in self.tickers_nao_carregados if t.endswith(('3', '4', '11'))]
+        print(f"Tickers nao carregados (filtrados 3,4,11): {len(tickers_filtrados)}")
+        
+        if self.arquivos_processados:
+            print("\nArquivos movidos para pasta processados:")
+            for arquivo in self.arquivos_processados:
+                print(f"   - {arquivo}")
+        
+        print(f"\nLogs estruturados gerados na pasta: {self.pasta_logs}")
+        print(f"Registros de execucao salvos na tabela: rotinas_automaticas_registro_execucao")
+        
+        if self.arquivos_com_erro:
+            print(f"\nArquivos com erro: {', '.join(self.arquivos_com_erro)}")
+            status = STATUS_ERRO if len(self.arquivos_com_erro) == len(arquivos) else STATUS_PARCIAL
+            return self.montar_resultado(
+                status, f"{len(self.arquivos_com_erro)} de {len(arquivos)} arquivo(s) com erro", inicio
+            )
+        
+        print("\nCarga concluida com sucesso!")
+        return self.montar_resultado(STATUS_SUCESSO, f"{len(arquivos)} arquivo(s) carregado(s)", inicio)
+
+
+def _processar_arquivo_em_processo(info_arquivo, modo_insercao, parser, forcar_recarga,
+                                   lista_tickers_fii, lista_tickers_acao):
+    """Worker do pool de processos: carrega um arquivo e devolve os totais para consolidação"""
+    carga = CargaB3TradeInformation(modo_insercao=modo_insercao, parser=parser, workers=1,
+                                    forcar_recarga=forcar_recarga)
+    # Listas de referência já carregadas pelo processo principal
+    carga.lista_tickers_fii = lista_tickers_fii
+    carga.lista_tickers_acao = lista_tickers_acao
+    try:
+        carga.processar_arquivo(info_arquivo)
+    finally:
+        connections.close_all()
+    return carga.resumo_totais()
+
@@ -0,0 +1,319 @@
+"""
+Utilitários de Carga em Massa (PostgreSQL)
+==========================================
+
+Funções compartilhadas pelas rotinas de carga para gravar lotes de dados
+com COPY FROM STDIN, evitando uma ida e volta ao banco por linha:
+- Serialização de valores no formato texto do COPY
+- Montagem do buffer em memória
+- Envio do lote via cursor.copy_expert (psycopg2)
+- Upsert idempotente pela chave natural (staging + INSERT ... ON CONFLICT)
+- Substituição por chave de documento, para tabelas sem chave única
+- Carga incremental por versão de documento (só versões novas, anteriores removidas)
+- COPY do arquivo bruto em staging texto, para conversão e filtros em SQL
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import io
+
+# Colunas gravadas pelas rotinas de carga em organizesee_ativosprecos
+TABELA_ATIVOS_PRECOS = 'organizesee_ativosprecos'
+COLUNAS_ATIVOS_PRECOS = ['tipo', 'ticker', 'open', 'high', 'low', 'close', 'volume', 'data', 'fonte']
+
+# Chave natural de organizesee_ativosprecos (UniqueConstraint do model AtivosPrecos)
+CHAVE_ATIVOS_PRECOS = ['ticker', 'data', 'fonte']
+
+# Modos de inserção suportados pelas rotinas de carga
+MODO_COPY = 'copy'
+MODO_EXECUTEMANY = 'executemany'
+MODO_STAGING = 'staging'  # Arquivo bruto via COPY, classificação e conversão em SQL
+MODOS_INSERCAO = [MODO_COPY, MODO_EXECUTEMANY, MODO_STAGING]
+
+# Ordem de chegada das linhas nas stagings (identity preenchida pelo COPY): entre
+# linhas repetidas pela chave vale a última, como no upsert linha a linha
+COLUNA_ORDEM_STAGING = 'ordem_staging'
+
+
+def formatar_valor_copy(valor):
+    """Converte um valor Python para o formato texto do COPY"""
+    if valor is None:
+        return '\\N'
+
+    texto = valor.isoformat() if hasattr(valor, 'isoformat') else str(valor)
+
+    # Escapar caracteres especiais do formato texto
+    return (
+        texto.replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def montar_buffer_copy(linhas):
+    """Monta um buffer em memória com as linhas no formato texto do COPY"""
+    buffer = io.StringIO()
+    for linha in linhas:
+        buffer.write('\t'.join(formatar_valor_copy(valor) for valor in linha))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copiar_buffer(cursor, tabela, colunas, buffer):
+    """Envia um buffer já no formato texto do COPY para a tabela"""
+    colunas_sql = ', '.join(f'"{coluna}"' for coluna in colunas)
+    cursor.copy_expert(f'COPY {tabela} ({colunas_sql}) FROM STDIN', buffer)
+
+
+def copiar_linhas(cursor, tabela, colunas, linhas):
+    """Grava as linhas na tabela via COPY FROM STDIN e retorna a quantidade enviada"""
+    if not linhas:
+        return 0
+
+    copiar_buffer(cursor, tabela, colunas, montar_buffer_copy(linhas))
+    return len(linhas)
+
+
+def _colunas_sql(colunas, prefixo=''):
+    """Lista de colunas entre aspas, opcionalmente qualificadas (ex: EXCLUDED.)"""
+    return ', '.join(f'{prefixo}"{coluna}"' for coluna in colunas)
+
+
+def montar_clausula_conflito(colunas, chave, alias_destino='destino'):
+    """Monta ON CONFLICT ... DO UPDATE que só regrava linhas com valores diferentes"""
+    colunas_atualizaveis = [coluna for coluna in colunas if coluna not in chave]
+    if not colunas_atualizaveis:
+        return f'ON CONFLICT ({_colunas_sql(chave)}) DO NOTHING'
+
+    atribuicoes = ', '.join(f'"{coluna}" = EXCLUDED."{coluna}"' for coluna in colunas_atualizaveis)
+    return (
+        f'ON CONFLICT ({_colunas_sql(chave)}) DO UPDATE SET {atribuicoes} '
+        f'WHERE ({_colunas_sql(colunas_atualizaveis, alias_destino + ".")}) '
+        f'IS DISTINCT FROM ({_colunas_sql(colunas_atualizaveis, "EXCLUDED.")})'
+    )
+
+
+def montar_sql_upsert(tabela, colunas, chave):
+    """INSERT de uma linha com upsert pela chave; RETURNING indica se foi inserção"""
+    marcadores = ', '.join(['%s'] * len(colunas))
+    return (
+        f'INSERT INTO {tabela} AS destino ({_colunas_sql(colunas)}) VALUES ({marcadores}) '
+        f'{montar_clausula_conflito(colunas, chave)} RETURNING (xmax = 0) AS inserido'
+    )
+
+
+def preparar_ordem_staging(cursor, staging):
+    """Garante a coluna de ordem de chegada na staging e a esvazia, reiniciando a contagem"""
+    cursor.execute(
+        f'ALTER TABLE {staging} ADD COLUMN IF NOT EXISTS "{COLUNA_ORDEM_STAGING}" '
+        f'bigint GENERATED ALWAYS AS IDENTITY'
+    )
+    cursor.execute(f'TRUNCATE {staging} RESTART IDENTITY')
+
+
+def mesclar_selecao(cursor, tabela, colunas, chave, sql_selecao):
+    """Executa INSERT ... SELECT com upsert pela chave e retorna (inseridos, atualizados)
+
+    sql_selecao deve retornar as colunas de `colunas` e COLUNA_ORDEM_STAGING; entre
+    linhas repetidas pela chave fica a de maior ordem (a última do arquivo), como
+    no upsert linha a linha, antes do ON CONFLICT.
+    """
+    cursor.execute(f"""
+        WITH upsert AS (
+            INSERT INTO {tabela} AS destino ({_colunas_sql(colunas)})
+            SELECT {_colunas_sql(colunas)} FROM (
+                SELECT DISTINCT ON ({_colunas_sql(chave)}) * FROM ({sql_selecao}) AS selecao
+                ORDER BY {_colunas_sql(chave)}, "{COLUNA_ORDEM_STAGING}" DESC
+            ) AS ultima
+            {montar_clausula_conflito(colunas, chave)}
+            RETURNING (xmax = 0) AS inserido
+        )
+        SELECT COUNT(*) FILTER (WHERE inserido), COUNT(*) FILTER (WHERE NOT inserido) FROM upsert
+    """)
+    inseridos, atualizados = cursor.fetchone()
+    return inseridos, atualizados
+
+
+def upsert_buffer(cursor, tabela, colunas, chave, buffer):
+    """Grava um buffer do COPY em uma staging temporária e mescla no destino pela chave
+
+    Retorna (inseridos, atualizados). Linhas idênticas às já existentes não são
+    regravadas, então reprocessar um arquivo vira um no-op barato.
+    """
+    staging = f'stg_{tabela}'
+    cursor.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS {staging} AS '
+        f'SELECT {_colunas_sql(colunas)} FROM {tabela} WITH NO DATA'
+    )
+    preparar_ordem_staging(cursor, staging)
+    copiar_buffer(cursor, staging, colunas, buffer)
+    return mesclar_selecao(
+        cursor, tabela, colunas, chave,
+        f'SELECT {_colunas_sql(colunas + [COLUNA_ORDEM_STAGING])} FROM {staging}'
+    )
+
+
+def upsert_linhas(cursor, tabela, colunas, chave, linhas):
+    """Grava as linhas (tuplas) com upsert pela chave via staging; retorna (inseridos, atualizados)"""
+    if not linhas:
+        return 0, 0
+    return upsert_buffer(cursor, tabela, colunas, chave, montar_buffer_copy(linhas))
+
+
+def upsert_linhas_executemany(cursor, tabela, colunas, chave, linhas):
+    """Upsert linha a linha (fallback sem COPY). Retorna (inseridos, atualizados)"""
+    sql = montar_sql_upsert(tabela, colunas, chave)
+    inseridos = 0
+    atualizados = 0
+    for linha in linhas:
+        cursor.execute(sql, linha)
+        resultado = cursor.fetchone()
+        if resultado is None:
+            continue  # Linha idêntica à existente: nada regravado
+        if resultado[0]:
+            inseridos += 1
+        else:
+            atualizados += 1
+    return inseridos, atualizados
+
+
+def remover_por_chave(cursor, tabela, chave, chaves):
+    """Remove da tabela as linhas cujas chaves (tuplas na ordem de `chave`) estão em `chaves`
+
+    As chaves vão para uma tabela temporária via COPY e a remoção é um único DELETE ... USING.
+    Retorna a quantidade de linhas removidas.
+    """
+    if not chaves:
+        return 0
+    staging = f'stg_chave_{tabela}'
+    cursor.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS {staging} AS '
+        f'SELECT {_colunas_sql(chave)} FROM {tabela} WITH NO DATA'
+    )
+    cursor.execute(f'TRUNCATE {staging}')
+    copiar_linhas(cursor, staging, chave, chaves)
+    condicao = ' AND '.join(f'destino."{coluna}" = chaves."{coluna}"' for coluna in chave)
+    cursor.execute(f'DELETE FROM {tabela} AS destino USING {staging} AS chaves WHERE {condicao}')
+    return cursor.rowcount
+
+
+def substituir_linhas(cursor, tabela, colunas, chave, linhas, chaves_novas):
+    """Substitui os registros das chaves novas pelas linhas do lote (tabelas sem chave única)
+
+    Usado por cargas em que cada chave identifica um documento inteiro (ex: CVM por
+    CNPJ + data + versão): as linhas antigas do documento saem e as do arquivo entram.
+    Retorna (inseridos, removidos).
+    """
+    removidos = remover_por_chave(cursor, tabela, chave, chaves_novas)
+    return copiar_linhas(cursor, tabela, colunas, linhas), removidos
+
+
+def substituir_linhas_executemany(cursor, tabela, colunas, chave, linhas, chaves_novas):
+    """Substituição linha a linha (fallback sem COPY). Retorna (inseridos, removidos)"""
+    removidos = 0
+    condicao = ' AND '.join(f'"{coluna}" = %s' for coluna in chave)
+    for chave_documento in chaves_novas:
+        cursor.execute(f'DELETE FROM {tabela} WHERE {condicao}', chave_documento)
+        removidos += cursor.rowcount
+    marcadores = ', '.join(['%s'] * len(colunas))
+    cursor.executemany(f'INSERT INTO {tabela} ({_colunas_sql(colunas)}) VALUES ({marcadores})', linhas)
+    return len(linhas), removidos
+
+
+def consultar_versoes(cursor, tabela, expressoes_documento, coluna_versao):
+    """Maior versão gravada de cada documento: {(valores do documento): versão}
+
+    expressoes_documento são as expressões SQL que identificam o documento (ex:
+    '"cnpj_fundo_classe"::text'), para que a chave devolvida seja comparável à do arquivo.
+    """
+    expressoes = ', '.join(expressoes_documento)
+    agrupamento = ', '.join(str(posicao) for posicao in range(1, len(expressoes_documento) + 1))
+    cursor.execute(f'SELECT {expressoes}, MAX("{coluna_versao}") FROM {tabela} GROUP BY {agrupamento}')
+    return {tuple(linha[:-1]): linha[-1] for linha in cursor}
+
+
+def remover_versoes_anteriores(cursor, tabela, documento, coluna_versao, versoes):
+    """Remove as linhas de cada documento com versão menor que a informada
+
+    versoes são tuplas (valores do documento..., versão nova), enviadas via COPY para
+    uma tabela temporária; a remoção é um único DELETE ... USING. Retorna a quantidade removida.
+    """
+    if not versoes:
+        return 0
+    colunas = documento + [coluna_versao]
+    staging = f'stg_versao_{tabela}'
+    cursor.execute(
+        f'CREATE TEMP TABLE IF NOT EXISTS {staging} AS '
+        f'SELECT {_colunas_sql(colunas)} FROM {tabela} WITH NO DATA'
+    )
+    cursor.execute(f'TRUNCATE {staging}')
+    copiar_linhas(cursor, staging, colunas, versoes)
+    condicao = ' AND '.join(f'destino."{coluna}" = versoes."{coluna}"' for coluna in documento)
+    cursor.execute(
+        f'DELETE FROM {tabela} AS destino USING {staging} AS versoes '
+        f'WHERE {condicao} AND destino."{coluna_versao}" < versoes."{coluna_versao}"'
+    )
+    return cursor.rowcount
+
+
+def inserir_versoes(cursor, tabela, colunas, documento, coluna_versao, linhas, versoes):
+    """Grava as linhas de versões novas e aposenta as versões anteriores dos documentos
+
+    Retorna (inseridos, removidos).
+    """
+    removidos = remover_versoes_anteriores(cursor, tabela, documento, coluna_versao, versoes)
+    return copiar_linhas(cursor, tabela, colunas, linhas), removidos
+
+
+def inserir_versoes_executemany(cursor, tabela, colunas, documento, coluna_versao, linhas, versoes):
+    """Versões novas linha a linha (fallback sem COPY). Retorna (inseridos, removidos)"""
+    removidos = 0
+    condicao = ' AND '.join(f'"{coluna}" = %s' for coluna in documento)
+    for versao in versoes:
+        cursor.execute(f'DELETE FROM {tabela} WHERE {condicao} AND "{coluna_versao}" < %s', versao)
+        removidos += cursor.rowcount
+    marcadores = ', '.join(['%s'] * len(colunas))
+    cursor.executemany(f'INSERT INTO {tabela} ({_colunas_sql(colunas)}) VALUES ({marcadores})', linhas)
+    return len(linhas), removidos
+
+
+def criar_staging_texto(cursor, tabela, colunas):
+    """Cria (ou esvazia) uma tabela temporária com todas as colunas em texto
+
+    Tabelas temporárias não geram WAL e são privadas da sessão, então cargas
+    simultâneas em conexões diferentes não disputam a mesma staging. Inclui
+    COLUNA_ORDEM_STAGING com a ordem das linhas do arquivo.
+    """
+    definicoes = ', '.join(f'"{coluna}" text' for coluna in colunas)
+    cursor.execute(f'CREATE TEMP TABLE IF NOT EXISTS {tabela} ({definicoes})')
+    preparar_ordem_staging(cursor, tabela)
+
+
+def copiar_arquivo(cursor, tabela, colunas, arquivo, delimitador=';'):
+    """Envia o restante de um arquivo aberto para a tabela via COPY ... FORMAT csv
+
+    O arquivo é lido direto pelo psycopg2, sem parse linha a linha em Python.
+    """
+    cursor.copy_expert(
+        f"COPY {tabela} ({_colunas_sql(colunas)}) FROM STDIN WITH (FORMAT csv, DELIMITER '{delimitador}')",
+        arquivo
+    )
+
+
+def sql_texto_para_numeric(coluna):
+    """Expressão SQL que converte texto com vírgula decimal em numeric (NULL se vazio ou inválido)"""
+    valor = f"replace(btrim({coluna}), ',', '.')"
+    return f"CASE WHEN {valor} ~ '^-?[0-9]+(\\.[0-9]+)?$' THEN {valor}::numeric END"
+
+
+def sql_texto_para_data(coluna):
+    """Expressão SQL que converte texto (YYYY-MM-DD, DD/MM/YYYY ou YYYYMMDD) em date"""
+    valor = f"btrim({coluna})"
+    return (
+        f"CASE WHEN {valor} ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN to_date({valor}, 'YYYY-MM-DD') "
+        f"WHEN {valor} ~ '^[0-9]{{2}}/[0-9]{{2}}/[0-9]{{4}}$' THEN to_date({valor}, 'DD/MM/YYYY') "
+        f"WHEN {valor} ~ '^[0-9]{{8}}$' THEN to_date({valor}, 'YYYYMMDD') END"
+    )
@@ -0,0 +1,93 @@
+"""
+Rotinas de Carga: Dados Abertos CVM (FCA e FII)
+===============================================
+
+Feeds dos arquivos CSV da CVM (extraídos dos ZIPs baixados por
+job_baixar_arquivos_cvm) declarados para o MotorCarga (carga_declarativa):
+- FCA de companhias abertas: cadastro, dados gerais e valores mobiliários
+- FII: informe anual (geral, ativos) e informe mensal (geral, ativo/passivo, complemento)
+
+Os cabeçalhos da CVM têm o mesmo nome dos campos dos models (a menos de caixa e
+acentos), então o mapeamento é por nome. Os arquivos anuais são cumulativos e
+republicados a cada download, com as correções em novas versões do documento
+(CNPJ + data de referência), então a carga é incremental: só entram as linhas de
+documentos novos ou de versões maiores que a gravada, e as versões anteriores
+desses documentos são removidas. O custo da atualização diária é proporcional ao
+delta; --forcar regrava todos os documentos do arquivo (substituição).
+
+Cada arquivo é gravado em uma única transação (COPY em lotes dentro dela) e
+vários arquivos são carregados ao mesmo tempo por servico_carga.carregar_arquivos_cvm(),
+um processo por arquivo (CARGA_ARQUIVOS_WORKERS).
+
+Linha de comando: rotinas_individuais/carga_declarativa.py --carga=<nome> [arquivo]
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+from .models import (
+    FcaCiaAberta, AnualFcaCiaAbertaGeral, AnualFcaCiaAbertaValorMobiliario,
+    InfAnualFiiGeral, InfAnualFiiAtivoValorContabil,
+    InfMensalFiiGeral, InfMensalFiiAtivoPassivo, InfMensalFiiComplemento,
+)
+from .carga_declarativa import EspecificacaoCarga, ESTRATEGIA_INCREMENTAL
+
+# Arquivos da CVM são gravados em ISO-8859-1
+CODIFICACAO_CVM = 'latin-1'
+
+CHAVE_DOCUMENTO_COMPANHIA = ['cnpj_companhia', 'data_referencia', 'versao']
+CHAVE_DOCUMENTO_FUNDO = ['cnpj_fundo_classe', 'data_referencia', 'versao']
+
+
+def _especificacao_cvm(nome, mascara_arquivo, modelo, chave, grupo, **opcoes):
+    return EspecificacaoCarga(
+        nome=nome,
+        mascara_arquivo=mascara_arquivo,
+        modelo=modelo,
+        chave=chave,
+        estrategia=ESTRATEGIA_INCREMENTAL,
+        campo_versao='versao',
+        transacao_por_arquivo=True,
+        codificacao=CODIFICACAO_CVM,
+        sistema='CVM',
+        grupo=grupo,
+        **opcoes
+    )
+
+
+ESPECIFICACOES_CVM = [
+    _especificacao_cvm(
+        'cvm_fca_cia_aberta', 'fca_cia_aberta_[0-9][0-9][0-9][0-9].csv', FcaCiaAberta,
+        ['cnpj_cia', 'dt_refer', 'versao'], 'ANUAL'
+    ),
+    _especificacao_cvm(
+        'cvm_fca_cia_aberta_geral', 'fca_cia_aberta_geral_*.csv', AnualFcaCiaAbertaGeral,
+        CHAVE_DOCUMENTO_COMPANHIA, 'ANUAL'
+    ),
+    _especificacao_cvm(
+        'cvm_fca_cia_aberta_valor_mobiliario', 'fca_cia_aberta_valor_mobiliario_*.csv',
+        AnualFcaCiaAbertaValorMobiliario, CHAVE_DOCUMENTO_COMPANHIA, 'ANUAL'
+    ),
+    _especificacao_cvm(
+        'cvm_inf_anual_fii_geral', 'inf_anual_fii_geral_*.csv', InfAnualFiiGeral,
+        CHAVE_DOCUMENTO_FUNDO, 'ANUAL'
+    ),
+    _especificacao_cvm(
+        'cvm_inf_anual_fii_ativo_valor_contabil', 'inf_anual_fii_ativo_valor_contabil_*.csv',
+        InfAnualFiiAtivoValorContabil, CHAVE_DOCUMENTO_FUNDO, 'ANUAL'
+    ),
+    _especificacao_cvm(
+        'cvm_inf_mensal_fii_geral', 'inf_mensal_fii_geral_*.csv', InfMensalFiiGeral,
+        CHAVE_DOCUMENTO_FUNDO, 'MENSAL'
+    ),
+    _especificacao_cvm(
+        'cvm_inf_mensal_fii_ativo_passivo', 'inf_mensal_fii_ativo_passivo_*.csv', InfMensalFiiAtivoPassivo,
+        CHAVE_DOCUMENTO_FUNDO, 'MENSAL',
+        # Grafia do arquivo da CVM difere da do campo
+        colunas={'outros_valores_mobliario': 'outros_valores_mobliarios'}
+    ),
+    _especificacao_cvm(
+        'cvm_inf_mensal_fii_complemento', 'inf_mensal_fii_complemento_*.csv', InfMensalFiiComplemento,
+        CHAVE_DOCUMENTO_FUNDO, 'MENSAL'
+    ),
+]
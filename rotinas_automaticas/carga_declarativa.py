@@ -0,0 +1,782 @@
+"""
+Motor de Carga Declarativa
+==========================
+
+Motor único para as rotinas de carga de arquivos texto (B3 e CVM). Cada feed
+declara apenas o que é específico dele em uma EspecificacaoCarga:
+- Máscara do nome do arquivo, delimitador e codificação
+- Mapeamento coluna do cabeçalho -> campo do model (por padrão, pelo nome)
+- Conversores por campo (por padrão, pelo tipo do campo no model)
+- Chave de deduplicação, estratégia de gravação e model destino
+
+O MotorCarga faz o restante para todos os feeds: leitura em streaming com
+memória constante, lotes via COPY (upsert por chave, substituição por
+documento ou carga incremental por versão) com executemany como fallback, checkpoint por lote, ledger de
+arquivos, RegistroExecucao e movimentação para processados. Além de arquivos da
+pasta de origem, aceita fluxos já abertos (ex: membros de um zip baixado), sem
+cópia extraída em disco: executar_carga(arquivos=[arquivo_em_fluxo(...)]).
+
+Uso:
+    class CargaFiiMensalGeral(MotorCarga):
+        especificacao = EspecificacaoCarga(nome='cvm_inf_mensal_fii_geral', ...)
+
+    resultado = CargaFiiMensalGeral('inf_mensal_fii_geral_2025.csv').executar_carga()
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import csv
+import shutil
+import fnmatch
+import unicodedata
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models.fields import NOT_PROVIDED
+
+from .models import RegistroExecucao, CheckpointCarga
+from .carga_bulk import (
+    MODO_COPY, MODO_EXECUTEMANY, MODOS_INSERCAO,
+    upsert_linhas, upsert_linhas_executemany, substituir_linhas, substituir_linhas_executemany,
+    consultar_versoes, inserir_versoes, inserir_versoes_executemany
+)
+from .carga_b3_trade_information import ResultadoCarga, STATUS_SUCESSO, STATUS_PARCIAL, STATUS_ERRO
+from . import ledger_arquivos
+
+# Estratégias de gravação
+ESTRATEGIA_UPSERT = 'upsert'          # INSERT ... ON CONFLICT pela chave (exige UniqueConstraint)
+ESTRATEGIA_SUBSTITUIR = 'substituir'  # DELETE das chaves do arquivo + INSERT (tabelas sem chave única)
+ESTRATEGIA_INCREMENTAL = 'incremental'  # Só versões de documento novas; as anteriores são removidas
+
+# Quantidade de linhas por lote/transação conforme o modo de inserção
+TAMANHO_LOTE_COPY = 50000
+TAMANHO_LOTE_EXECUTEMANY = 1000
+
+FORMATOS_DATA = ['%Y-%m-%d', '%d/%m/%Y', '%Y%m%d']
+
+# Linhas iniciais examinadas na busca do cabeçalho (arquivos B3 têm uma linha de status antes)
+LINHAS_BUSCA_CABECALHO = 5
+
+
+# ================== CONVERSORES ==================
+
+def converter_texto(valor):
+    """Texto sem espaços nas pontas (None se vazio)"""
+    return valor.strip() or None
+
+
+def converter_texto_maiusculo(valor):
+    """Texto em maiúsculas (tickers, códigos)"""
+    valor = valor.strip()
+    return valor.upper() if valor else None
+
+
+def converter_data(valor):
+    """Converte texto de data do arquivo em date (None se vazio ou inválido)"""
+    valor = valor.strip()
+    if not valor:
+        return None
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(valor, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+def converter_decimal(valor):
+    """Converte número do arquivo (vírgula ou ponto decimal) em Decimal (None se vazio ou inválido)"""
+    valor = valor.strip()
+    if not valor:
+        return None
+    if ',' in valor:
+        valor = valor.replace('.', '').replace(',', '.')
+    try:
+        return Decimal(valor)
+    except InvalidOperation:
+        return None
+
+
+def converter_inteiro(valor):
+    """Converte número do arquivo em int (None se vazio ou inválido)"""
+    numero = converter_decimal(valor)
+    return int(numero) if numero is not None and numero.is_finite() else None
+
+
+def conversor_texto_limitado(tamanho):
+    """Conversor de texto truncado ao max_length do campo"""
+    def converter(valor):
+        return valor.strip()[:tamanho] or None
+    return converter
+
+
+def conversor_padrao(campo_model):
+    """Conversor pelo tipo do campo do model"""
+    tipo = campo_model.get_internal_type()
+    if tipo in ('DateField', 'DateTimeField'):
+        return converter_data
+    if tipo in ('IntegerField', 'BigIntegerField', 'SmallIntegerField', 'PositiveIntegerField'):
+        return converter_inteiro
+    if tipo in ('DecimalField', 'FloatField'):
+        return converter_decimal
+    if getattr(campo_model, 'max_length', None):
+        return conversor_texto_limitado(campo_model.max_length)
+    return converter_texto
+
+
+def normalizar_coluna(nome):
+    """Nome de coluna do cabeçalho em minúsculas e sem acentos (ex: Previdência -> previdencia)"""
+    nome = unicodedata.normalize('NFKD', nome.strip().lstrip('\ufeff'))
+    return ''.join(caractere for caractere in nome if not unicodedata.combining(caractere)).lower()
+
+
+# ================== ESPECIFICAÇÃO ==================
+
+@dataclass
+class EspecificacaoCarga:
+    """Declaração de um feed de arquivo para o MotorCarga"""
+    nome: str                    # Identificador do feed (linha de comando, registro de cargas)
+    mascara_arquivo: str         # Máscara do nome do arquivo (fnmatch), ex: 'inf_mensal_fii_geral_*.csv'
+    modelo: Any                  # Model destino
+    chave: List[str]             # Campos de deduplicação
+    estrategia: str = ESTRATEGIA_UPSERT
+    delimitador: str = ';'
+    codificacao: str = 'utf-8'
+    # Coluna do cabeçalho (normalizada) -> campo do model; colunas com o mesmo nome do campo
+    # são mapeadas automaticamente quando mapear_por_nome=True
+    colunas: Dict[str, str] = field(default_factory=dict)
+    mapear_por_nome: bool = True
+    # Campo -> conversor(texto); campos sem conversor usam o padrão do tipo no model
+    conversores: Dict[str, Callable] = field(default_factory=dict)
+    # Campo -> valor fixo ou função(nome_arquivo) que devolve o valor
+    valores_fixos: Dict[str, Any] = field(default_factory=dict)
+    # Linhas sem algum destes campos são rejeitadas (padrão: os campos da chave)
+    campos_obrigatorios: Optional[List[str]] = None
+    campo_data: Optional[str] = None       # Data de referência dos dados (ledger e nome do processado)
+    prefixo_processado: Optional[str] = None  # Nome do arquivo em processados (padrão: nome sem extensão)
+    mover_arquivo: Callable[[str], bool] = lambda nome_arquivo: True
+    sistema: str = 'B3'
+    grupo: str = 'DIARIO'
+    checkpoint: bool = True
+    # Arquivo inteiro em uma transação (tudo ou nada, sem checkpoint); sempre ligado na
+    # substituição e na carga incremental
+    transacao_por_arquivo: bool = False
+    # Campo da chave com a versão do documento (estratégia incremental); o documento é o restante da chave
+    campo_versao: Optional[str] = None
+
+    @property
+    def tabela(self):
+        return self.modelo._meta.db_table
+
+    def aceita_arquivo(self, nome_arquivo):
+        return fnmatch.fnmatch(nome_arquivo, self.mascara_arquivo)
+
+
+def arquivo_em_fluxo(nome, abrir, tamanho_bytes, modificado_em=None, origem=''):
+    """Descrição de um arquivo lido de um fluxo (sem caminho em disco) para o MotorCarga
+
+    abrir() devolve um fluxo binário novo a cada chamada (ex: ZipFile.open do membro);
+    o arquivo não é movido para processados.
+    """
+    return {
+        'nome': nome,
+        'caminho': os.path.join(origem, nome),
+        'abrir': abrir,
+        'tamanho_bytes': tamanho_bytes,
+        'modificado_em': modificado_em,
+        'mover': False,
+    }
+
+
+# ================== MOTOR ==================
+
+class MotorCarga:
+    """Carga de arquivos conforme a EspecificacaoCarga da subclasse (atributo `especificacao`)"""
+
+    especificacao: EspecificacaoCarga = None
+
+    def __init__(self, arquivo_especifico=None, modo_insercao=None, forcar_recarga=False, especificacao=None):
+        self.especificacao = especificacao or self.especificacao
+        self.pasta_origem = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+        self.pasta_destino = os.path.join(settings.BASE_DIR, 'static', 'processados')
+        self.arquivo_especifico = arquivo_especifico
+        self.tabela_destino = self.especificacao.tabela
+        self.modo_insercao = modo_insercao or getattr(settings, 'CARGA_B3_MODO_INSERCAO', MODO_COPY)
+        if self.modo_insercao not in (MODO_COPY, MODO_EXECUTEMANY):
+            if self.modo_insercao in MODOS_INSERCAO:
+                print(f"Modo de insercao {self.modo_insercao} nao suportado nesta carga. Usando {MODO_COPY}")
+            else:
+                print(f"Modo de insercao desconhecido: {self.modo_insercao}. Usando {MODO_COPY}")
+            self.modo_insercao = MODO_COPY
+        # Recarregar mesmo arquivos cujo conteúdo já consta no ledger
+        self.forcar_recarga = forcar_recarga
+
+        # Campos gravados: todos os campos concretos do model exceto id e defaults do banco
+        self.campos_model = {
+            campo.name: campo for campo in self.especificacao.modelo._meta.concrete_fields
+            if not campo.primary_key and campo.db_default is NOT_PROVIDED
+        }
+        self.colunas = list(self.campos_model)
+        # Nomes das colunas no banco, usados no SQL (iguais aos campos salvo db_column)
+        self.colunas_sql = [campo.column for campo in self.campos_model.values()]
+        self.chave_sql = [self.campos_model[campo].column for campo in self.especificacao.chave]
+        self.posicoes_chave = [self.colunas.index(campo) for campo in self.especificacao.chave]
+        self.posicoes_obrigatorias = [
+            self.colunas.index(campo)
+            for campo in (self.especificacao.campos_obrigatorios or self.especificacao.chave)
+        ]
+        self.posicao_data = (self.colunas.index(self.especificacao.campo_data)
+                             if self.especificacao.campo_data else None)
+
+        # Carga incremental: documento (chave sem a versão) e versão
+        if self.especificacao.estrategia == ESTRATEGIA_INCREMENTAL:
+            campo_versao = self.especificacao.campo_versao
+            self.campos_documento = [campo for campo in self.especificacao.chave if campo != campo_versao]
+            self.posicoes_documento = [self.colunas.index(campo) for campo in self.campos_documento]
+            self.posicao_versao = self.colunas.index(campo_versao)
+            self.documento_sql = [self.campos_model[campo].column for campo in self.campos_documento]
+            self.versao_sql = self.campos_model[campo_versao].column
+
+        self.registro_execucao = None
+        self.checkpoint = None
+        self.chaves_substituidas = set()
+        self.versoes_vigentes = {}
+        self.documentos_gravados = set()
+        self.arquivos_processados = []
+        self.arquivos_com_erro = []
+        self.arquivos_ignorados = []
+        self.total_linhas_processadas = 0
+        self.total_linhas_inseridas = 0
+        self.total_linhas_atualizadas = 0
+        self.total_linhas_rejeitadas = 0
+        self.total_linhas_ignoradas = 0
+        self.segundos_gravacao = 0.0
+
+    @property
+    def tamanho_lote(self):
+        """Quantidade de registros por lote/transação conforme o modo de inserção"""
+        return TAMANHO_LOTE_COPY if self.modo_insercao == MODO_COPY else TAMANHO_LOTE_EXECUTEMANY
+
+    @property
+    def estrategia(self):
+        """Estratégia de gravação; a recarga forçada de um feed incremental regrava os documentos"""
+        if self.forcar_recarga and self.especificacao.estrategia == ESTRATEGIA_INCREMENTAL:
+            return ESTRATEGIA_SUBSTITUIR
+        return self.especificacao.estrategia
+
+    @property
+    def transacao_por_arquivo(self):
+        # Na substituição e na carga incremental uma retomada no meio de um documento
+        # perderia as linhas dele gravadas antes do checkpoint, então o arquivo vai
+        # em uma transação só
+        return (self.especificacao.transacao_por_arquivo
+                or self.estrategia in (ESTRATEGIA_SUBSTITUIR, ESTRATEGIA_INCREMENTAL))
+
+    @property
+    def usa_checkpoint(self):
+        return self.especificacao.checkpoint and not self.transacao_por_arquivo
+
+    # ---------- Arquivos ----------
+
+    def encontrar_arquivos(self):
+        """Encontra os arquivos do feed na pasta de origem"""
+        if not os.path.exists(self.pasta_origem):
+            print(f"Pasta de origem nao encontrada: {self.pasta_origem}")
+            return []
+
+        if self.arquivo_especifico:
+            nomes = [self.arquivo_especifico]
+        else:
+            nomes = sorted(
+                nome for nome in os.listdir(self.pasta_origem) if self.especificacao.aceita_arquivo(nome)
+            )
+
+        arquivos = []
+        for nome in nomes:
+            caminho = os.path.join(self.pasta_origem, nome)
+            if os.path.exists(caminho):
+                arquivos.append({'nome': nome, 'caminho': caminho})
+            else:
+                print(f"Arquivo especifico nao encontrado: {nome}")
+
+        print(f"Encontrados {len(arquivos)} arquivos para a carga {self.especificacao.nome}")
+        return arquivos
+
+    def abrir_arquivo(self, info_arquivo):
+        """Fluxo binário do arquivo (em disco ou fornecido por arquivo_em_fluxo)"""
+        if 'abrir' in info_arquivo:
+            return info_arquivo['abrir']()
+        return open(info_arquivo['caminho'], 'rb')
+
+    def tamanho_arquivo(self, info_arquivo):
+        if 'tamanho_bytes' in info_arquivo:
+            return info_arquivo['tamanho_bytes']
+        return os.path.getsize(info_arquivo['caminho'])
+
+    def mover_arquivo_processado(self, info_arquivo, data_dos_dados=None):
+        """Move o arquivo para processados (se o feed move este arquivo)"""
+        if not info_arquivo.get('mover', True) or not self.especificacao.mover_arquivo(info_arquivo['nome']):
+            return
+        try:
+            prefixo = self.especificacao.prefixo_processado or os.path.splitext(info_arquivo['nome'])[0]
+            if data_dos_dados:
+                nome_processado = f"{prefixo}-{data_dos_dados.strftime('%d%m%Y')}.carregado"
+            else:
+                nome_processado = f"{prefixo}-{datetime.now().strftime('%d%m%Y_%H%M%S')}.carregado"
+            os.makedirs(self.pasta_destino, exist_ok=True)
+            shutil.move(info_arquivo['caminho'], os.path.join(self.pasta_destino, nome_processado))
+            print(f"   Arquivo movido para: {nome_processado}")
+            self.arquivos_processados.append(nome_processado)
+        except Exception as e:
+            print(f"Erro ao mover arquivo {info_arquivo['nome']}: {e}")
+
+    # ---------- Registro de execução, ledger e checkpoint ----------
+
+    def criar_registro_execucao(self, nome_arquivo):
+        """Cria registro de execução na tabela"""
+        try:
+            self.registro_execucao = RegistroExecucao.objects.create(
+                job_arquivo_processo=f"{self.especificacao.nome} - {nome_arquivo}",
+                tabela_destino=self.tabela_destino,
+                status_execucao='EXECUTANDO',
+                sistema=self.especificacao.sistema,
+                grupo=self.especificacao.grupo
+            )
+        except Exception as e:
+            print(f"   ERRO ao criar registro de execução: {e}")
+            self.registro_execucao = None
+
+    def atualizar_registro_execucao(self, status, **kwargs):
+        """Atualiza registro de execução"""
+        if not self.registro_execucao:
+            return
+        try:
+            self.registro_execucao.status_execucao = status
+            for campo, valor in kwargs.items():
+                setattr(self.registro_execucao, campo, valor)
+            self.registro_execucao.dia_horario_finalizacao = datetime.now()
+            self.registro_execucao.save()
+        except Exception as e:
+            print(f"   ERRO ao atualizar registro de execução: {e}")
+
+    def verificar_ledger(self, info_arquivo):
+        """Retorna a carga anterior do mesmo conteúdo nesta tabela (None se deve carregar)"""
+        try:
+            with self.abrir_arquivo(info_arquivo) as arquivo:
+                info_arquivo['sha256'] = ledger_arquivos.calcular_sha256_fluxo(arquivo)
+            if self.forcar_recarga:
+                return None
+            return ledger_arquivos.consultar_carga(info_arquivo['sha256'], self.tabela_destino)
+        except Exception as e:
+            print(f"   ERRO ao consultar ledger de arquivos: {e}. Carregando o arquivo")
+            return None
+
+    def registrar_ledger(self, info_arquivo, linhas_carregadas, data_dos_dados):
+        """Registra o conteúdo do arquivo carregado no ledger"""
+        if not info_arquivo.get('sha256'):
+            return
+        try:
+            ledger_arquivos.registrar_carga(
+                info_arquivo['caminho'], info_arquivo['sha256'], self.tabela_destino, linhas_carregadas, data_dos_dados,
+                tamanho_bytes=info_arquivo.get('tamanho_bytes'), modificado_em=info_arquivo.get('modificado_em')
+            )
+        except Exception as e:
+            print(f"   ERRO ao registrar arquivo no ledger: {e}")
+
+    def obter_checkpoint(self, info_arquivo):
+        """Checkpoint de uma carga interrompida deste arquivo, ou um novo (gravado só no primeiro lote)"""
+        checkpoint = CheckpointCarga(
+            arquivo=info_arquivo['nome'],
+            tamanho_bytes=self.tamanho_arquivo(info_arquivo),
+            tabela_destino=self.tabela_destino
+        )
+        if not self.usa_checkpoint:
+            return checkpoint
+        try:
+            checkpoint = CheckpointCarga.objects.get(
+                arquivo=checkpoint.arquivo, tamanho_bytes=checkpoint.tamanho_bytes,
+                tabela_destino=checkpoint.tabela_destino
+            )
+            print(f"   Retomando do checkpoint: {checkpoint.lotes_confirmados} lotes confirmados, "
+                  f"linha {checkpoint.linhas_processadas:,}, offset {checkpoint.offset_bytes:,} bytes")
+        except CheckpointCarga.DoesNotExist:
+            pass
+        except Exception as e:
+            print(f"   ERRO ao consultar checkpoint: {e}. Carregando o arquivo desde o inicio")
+        return checkpoint
+
+    def gravar_checkpoint(self, offset_bytes, contadores, data_dos_dados):
+        """Atualiza o checkpoint; deve ser chamado dentro da transação do lote"""
+        if not self.usa_checkpoint:
+            return
+        checkpoint = self.checkpoint
+        checkpoint.offset_bytes = offset_bytes
+        checkpoint.linhas_processadas = contadores['processadas']
+        checkpoint.lotes_confirmados += 1
+        checkpoint.linhas_inseridas = contadores['inseridas']
+        checkpoint.linhas_atualizadas = contadores['atualizadas']
+        checkpoint.linhas_rejeitadas = contadores['rejeitadas']
+        checkpoint.data_dos_dados = data_dos_dados
+        checkpoint.registro_execucao = self.registro_execucao
+        checkpoint.save()
+
+    def remover_checkpoint(self):
+        """Remove o checkpoint do arquivo após a carga completa"""
+        try:
+            if self.checkpoint is not None and self.checkpoint.pk:
+                CheckpointCarga.objects.filter(pk=self.checkpoint.pk).delete()
+        except Exception as e:
+            print(f"   ERRO ao remover checkpoint: {e}")
+        self.checkpoint = None
+
+    # ---------- Parse ----------
+
+    def ler_linhas_texto(self, arquivo, posicao):
+        """Lê as linhas do arquivo binário como texto, somando em posicao['offset'] os bytes consumidos"""
+        codificacao = self.especificacao.codificacao
+        for linha in arquivo:
+            posicao['offset'] += len(linha)
+            yield linha.decode(codificacao, errors='ignore')
+
+    def mapear_cabecalho(self, linha):
+        """{campo do model: posição no arquivo} para uma linha de cabeçalho (None se não for cabeçalho)"""
+        especificacao = self.especificacao
+        posicoes = {}
+        for posicao, coluna in enumerate(linha):
+            coluna = normalizar_coluna(coluna)
+            campo = especificacao.colunas.get(coluna)
+            if campo is None and especificacao.mapear_por_nome and coluna in self.campos_model:
+                campo = coluna
+            if campo is not None and campo not in posicoes:
+                posicoes[campo] = posicao
+        # Cabeçalho válido: todas as colunas da chave presentes (ou com valor fixo)
+        if all(campo in posicoes or campo in especificacao.valores_fixos for campo in especificacao.chave):
+            return posicoes
+        return None
+
+    def montar_conversores(self, posicoes, nome_arquivo):
+        """Lista (posição no arquivo, conversor, valor fixo) na ordem das colunas gravadas
+
+        Montada uma vez por arquivo, para que cada linha seja só uma passada pelas colunas.
+        """
+        especificacao = self.especificacao
+        conversores = []
+        for campo in self.colunas:
+            if campo in especificacao.valores_fixos:
+                valor = especificacao.valores_fixos[campo]
+                conversores.append((None, None, valor(nome_arquivo) if callable(valor) else valor))
+                continue
+            conversor = especificacao.conversores.get(campo) or conversor_padrao(self.campos_model[campo])
+            conversores.append((posicoes.get(campo), conversor, None))
+        return conversores
+
+    def montar_linha(self, campos, conversores):
+        """Converte uma linha do arquivo em tupla na ordem das colunas gravadas (None se rejeitada)"""
+        quantidade_campos = len(campos)
+        linha = tuple(
+            valor_fixo if conversor is None
+            else conversor(campos[posicao]) if posicao is not None and posicao < quantidade_campos
+            else None
+            for posicao, conversor, valor_fixo in conversores
+        )
+        for posicao in self.posicoes_obrigatorias:
+            if linha[posicao] is None:
+                return None
+        return linha
+
+    # ---------- Versões (carga incremental) ----------
+
+    def documento_texto(self, linha):
+        """Chave do documento da linha em texto, comparável à devolvida por consultar_versoes"""
+        return tuple(
+            linha[posicao].isoformat() if hasattr(linha[posicao], 'isoformat') else str(linha[posicao])
+            for posicao in self.posicoes_documento
+        )
+
+    def carregar_versoes_vigentes(self, cursor):
+        """Maior versão já gravada de cada documento, lida uma vez por arquivo"""
+        expressoes = []
+        for coluna, campo in zip(self.documento_sql, self.campos_documento):
+            tipo = self.campos_model[campo].get_internal_type()
+            # Datas gravadas em timestamp voltam como data, igual ao conversor do arquivo
+            cast = '::date::text' if tipo in ('DateField', 'DateTimeField') else '::text'
+            expressoes.append(f'"{coluna}"{cast}')
+        self.versoes_vigentes = consultar_versoes(cursor, self.tabela_destino, expressoes, self.versao_sql)
+        self.documentos_gravados = set()
+        print(f"   Versoes vigentes: {len(self.versoes_vigentes):,} documentos")
+
+    def filtrar_versoes(self, linhas):
+        """Separa do lote as linhas de versões novas e as versões a aposentar
+
+        Linhas de um documento com versão menor ou igual à já gravada (antes desta
+        carga) são descartadas; uma versão maior remove as anteriores do documento,
+        inclusive as gravadas antes no mesmo arquivo. Retorna (linhas, versoes).
+        """
+        linhas_novas = []
+        versoes = []
+        for linha in linhas:
+            documento = self.documento_texto(linha)
+            versao = linha[self.posicao_versao]
+            vigente = self.versoes_vigentes.get(documento)
+            if vigente is not None:
+                if versao < vigente or (versao == vigente and documento not in self.documentos_gravados):
+                    continue
+                if versao > vigente:
+                    versoes.append(tuple(linha[posicao] for posicao in self.posicoes_documento) + (versao,))
+            self.versoes_vigentes[documento] = versao
+            self.documentos_gravados.add(documento)
+            linhas_novas.append(linha)
+        return linhas_novas, versoes
+
+    # ---------- Gravação ----------
+
+    def inserir_lote(self, linhas):
+        """Grava o lote conforme a estratégia do feed; retorna (inseridos, atualizados ou substituídos)"""
+        chaves_novas = None
+        if self.estrategia == ESTRATEGIA_INCREMENTAL:
+            # Filtrado antes da gravação, para que o fallback regrave o mesmo conjunto
+            linhas, chaves_novas = self.filtrar_versoes(linhas)
+            if not linhas:
+                return 0, 0
+        elif self.estrategia == ESTRATEGIA_SUBSTITUIR:
+            # Cada chave é removida uma vez por carga, na primeira vez em que aparece
+            chaves_lote = {tuple(linha[posicao] for posicao in self.posicoes_chave) for linha in linhas}
+            chaves_novas = list(chaves_lote - self.chaves_substituidas)
+
+        if self.modo_insercao == MODO_COPY:
+            try:
+                # Savepoint próprio para permitir o fallback dentro da transação do lote
+                with transaction.atomic(), connection.cursor() as cursor:
+                    resultado = self.gravar_lote(cursor, linhas, chaves_novas, copy=True)
+            except Exception as e:
+                print(f"Erro na insercao via COPY: {e}. Usando executemany como fallback")
+                self.modo_insercao = MODO_EXECUTEMANY
+            else:
+                if chaves_novas and self.estrategia == ESTRATEGIA_SUBSTITUIR:
+                    self.chaves_substituidas.update(chaves_novas)
+                return resultado
+
+        with connection.cursor() as cursor:
+            resultado = self.gravar_lote(cursor, linhas, chaves_novas, copy=False)
+        if chaves_novas and self.estrategia == ESTRATEGIA_SUBSTITUIR:
+            self.chaves_substituidas.update(chaves_novas)
+        return resultado
+
+    def gravar_lote(self, cursor, linhas, chaves_novas, copy):
+        if self.estrategia == ESTRATEGIA_INCREMENTAL:
+            inserir = inserir_versoes if copy else inserir_versoes_executemany
+            return inserir(cursor, self.tabela_destino, self.colunas_sql, self.documento_sql, self.versao_sql,
+                           linhas, chaves_novas)
+        if self.estrategia == ESTRATEGIA_SUBSTITUIR:
+            substituir = substituir_linhas if copy else substituir_linhas_executemany
+            return substituir(cursor, self.tabela_destino, self.colunas_sql, self.chave_sql, linhas, chaves_novas)
+        upsert = upsert_linhas if copy else upsert_linhas_executemany
+        return upsert(cursor, self.tabela_destino, self.colunas_sql, self.chave_sql, linhas)
+
+    def lote_gravado(self, linhas):
+        """Gancho chamado após cada lote confirmado (ex: cadastro em memória)"""
+
+    def carga_finalizada(self):
+        """Gancho chamado ao final de executar_carga"""
+
+    # ---------- Processamento ----------
+
+    def processar_arquivo(self, info_arquivo):
+        """Processa um arquivo em lotes de tamanho fixo, com checkpoint por lote"""
+        nome_arquivo = info_arquivo['nome']
+        print(f"\nProcessando: {nome_arquivo}")
+
+        # Conteúdo idêntico a um arquivo já carregado nesta tabela: nada a fazer
+        carga_anterior = self.verificar_ledger(info_arquivo)
+        if carga_anterior is not None:
+            print(f"   Conteudo ja carregado em {carga_anterior.carregado_em:%d/%m/%Y %H:%M}. Arquivo ignorado")
+            self.arquivos_ignorados.append(nome_arquivo)
+            self.mover_arquivo_processado(info_arquivo, carga_anterior.data_referencia)
+            return
+
+        self.criar_registro_execucao(nome_arquivo)
+        self.checkpoint = self.obter_checkpoint(info_arquivo)
+        self.chaves_substituidas = set()
+
+        inicio = datetime.now()
+        contadores = {
+            'processadas': self.checkpoint.linhas_processadas,
+            'inseridas': self.checkpoint.linhas_inseridas,
+            'atualizadas': self.checkpoint.linhas_atualizadas,
+            'rejeitadas': self.checkpoint.linhas_rejeitadas,
+        }
+        linhas_lidas = 0
+        data_dos_dados = self.checkpoint.data_dos_dados
+        tamanho_lote = self.tamanho_lote
+
+        try:
+            # Transação por arquivo: os lotes viram savepoints e o commit é no fim do arquivo
+            with transaction.atomic() if self.transacao_por_arquivo else nullcontext():
+                if self.estrategia == ESTRATEGIA_INCREMENTAL:
+                    with connection.cursor() as cursor:
+                        self.carregar_versoes_vigentes(cursor)
+                with self.abrir_arquivo(info_arquivo) as arquivo:
+                    posicao = {'offset': 0}
+                    reader = csv.reader(self.ler_linhas_texto(arquivo, posicao), delimiter=self.especificacao.delimitador)
+                    posicoes = None
+                    for _ in range(LINHAS_BUSCA_CABECALHO):
+                        linha = next(reader, None)
+                        if linha is None:
+                            break
+                        posicoes = self.mapear_cabecalho(linha)
+                        if posicoes is not None:
+                            break
+                    if posicoes is None:
+                        raise ValueError(f"Cabecalho nao encontrado (colunas da chave: {', '.join(self.especificacao.chave)})")
+                    conversores = self.montar_conversores(posicoes, nome_arquivo)
+
+                    if self.checkpoint.offset_bytes > posicao['offset']:
+                        arquivo.seek(self.checkpoint.offset_bytes)
+                        posicao['offset'] = self.checkpoint.offset_bytes
+
+                    lote = []
+                    for campos in reader:
+                        contadores['processadas'] += 1
+                        linhas_lidas += 1
+                        linha = self.montar_linha(campos, conversores)
+                        if linha is None:
+                            contadores['rejeitadas'] += 1
+                            continue
+                        lote.append(linha)
+                        if data_dos_dados is None and self.posicao_data is not None:
+                            data_dos_dados = linha[self.posicao_data]
+
+                        if len(lote) >= tamanho_lote:
+                            self.gravar_e_confirmar(lote, contadores, posicao['offset'], data_dos_dados)
+                            lote = []
+                            segundos = (datetime.now() - inicio).total_seconds()
+                            print(f"   Processadas: {contadores['processadas']:,} linhas "
+                                  f"({linhas_lidas / segundos if segundos else 0:,.0f} linhas/s)")
+
+                    if lote:
+                        self.gravar_e_confirmar(lote, contadores, posicao['offset'], data_dos_dados)
+        except Exception as e:
+            print(f"Erro ao processar arquivo {nome_arquivo}: {e}")
+            self.registrar_erro_arquivo(nome_arquivo, str(e))
+            return
+
+        segundos = (datetime.now() - inicio).total_seconds()
+        self.segundos_gravacao += segundos
+        self.finalizar_arquivo(info_arquivo, contadores, data_dos_dados, linhas_lidas / segundos if segundos else 0.0)
+
+    def gravar_e_confirmar(self, lote, contadores, offset_bytes, data_dos_dados):
+        """Grava o lote e o checkpoint na mesma transação"""
+        with transaction.atomic():
+            inseridos, atualizados = self.inserir_lote(lote)
+            contadores['inseridas'] += inseridos
+            contadores['atualizadas'] += atualizados
+            self.gravar_checkpoint(offset_bytes, contadores, data_dos_dados)
+        self.lote_gravado(lote)
+
+    def finalizar_arquivo(self, info_arquivo, contadores, data_dos_dados, linhas_por_segundo):
+        """Consolida estatísticas, atualiza o registro de execução e o ledger e move o arquivo"""
+        processadas = contadores['processadas']
+        inseridas = contadores['inseridas']
+        atualizadas = contadores['atualizadas']
+        rejeitadas = contadores['rejeitadas']
+        substituicao = self.estrategia in (ESTRATEGIA_SUBSTITUIR, ESTRATEGIA_INCREMENTAL)
+        # Na substituição e na carga incremental "atualizadas" são as linhas antigas removidas;
+        # só a incremental tem linhas inalteradas (versões já gravadas)
+        if self.estrategia == ESTRATEGIA_SUBSTITUIR:
+            inalteradas = 0
+        elif self.estrategia == ESTRATEGIA_INCREMENTAL:
+            inalteradas = processadas - rejeitadas - inseridas
+        else:
+            inalteradas = processadas - rejeitadas - inseridas - atualizadas
+
+        print(f"   Linhas processadas: {processadas:,}")
+        print(f"   Linhas inseridas: {inseridas:,}")
+        print(f"   Linhas {'substituidas' if substituicao else 'atualizadas'}: {atualizadas:,}")
+        if self.estrategia != ESTRATEGIA_SUBSTITUIR:
+            print(f"   Linhas inalteradas: {inalteradas:,}")
+        print(f"   Linhas rejeitadas: {rejeitadas:,}")
+        print(f"   Taxa: {linhas_por_segundo:,.0f} linhas/s")
+
+        self.total_linhas_processadas += processadas
+        self.total_linhas_inseridas += inseridas
+        self.total_linhas_atualizadas += atualizadas
+        self.total_linhas_rejeitadas += rejeitadas
+        self.total_linhas_ignoradas += inalteradas
+
+        self.atualizar_registro_execucao(
+            'CONCLUIDA',
+            registros_totais_novos=inseridas,
+            quantidade_linhas_arquivo=processadas,
+            registros_totais_arquivo=processadas,
+            registros_totais_atualizados=atualizadas,
+            registros_totais_ignorados=rejeitadas + inalteradas,
+            observacoes=self.observacoes_arquivo(info_arquivo, linhas_por_segundo)
+        )
+
+        self.remover_checkpoint()
+        self.registrar_ledger(info_arquivo, processadas - rejeitadas, data_dos_dados)
+        self.mover_arquivo_processado(info_arquivo, data_dos_dados)
+
+    def observacoes_arquivo(self, info_arquivo, linhas_por_segundo):
+        return f"{linhas_por_segundo:,.0f} linhas/s"
+
+    def registrar_erro_arquivo(self, nome_arquivo, erro_detalhes):
+        """Marca o arquivo como não carregado e grava o erro no registro de execução"""
+        self.arquivos_com_erro.append(nome_arquivo)
+        if self.checkpoint is not None and self.checkpoint.lotes_confirmados:
+            erro_detalhes = (f"{erro_detalhes} (checkpoint: {self.checkpoint.lotes_confirmados} lotes, "
+                             f"linha {self.checkpoint.linhas_processadas}, offset {self.checkpoint.offset_bytes})")
+        self.atualizar_registro_execucao('ERRO', erro_detalhes=erro_detalhes)
+
+    def mensagem_sucesso(self, arquivos):
+        return f"{len(arquivos)} arquivo(s) carregado(s) em {self.tabela_destino}"
+
+    def executar_carga(self, arquivos=None) -> ResultadoCarga:
+        """Executa o processo completo de carga e retorna o ResultadoCarga
+
+        arquivos: descrições já prontas (ex: arquivo_em_fluxo) em vez da busca na pasta de origem
+        """
+        print(f"Iniciando carga {self.especificacao.nome} ({self.tabela_destino})")
+        print("=" * 60)
+        inicio = datetime.now()
+
+        arquivos = self.encontrar_arquivos() if arquivos is None else arquivos
+        for info_arquivo in arquivos:
+            self.processar_arquivo(info_arquivo)
+        self.carga_finalizada()
+
+        if not arquivos:
+            status = STATUS_ERRO
+            mensagem = (f"Arquivo nao encontrado: {self.arquivo_especifico}" if self.arquivo_especifico
+                        else f"Nenhum arquivo {self.especificacao.mascara_arquivo} encontrado")
+        elif self.arquivos_com_erro:
+            status = STATUS_ERRO if len(self.arquivos_com_erro) == len(arquivos) else STATUS_PARCIAL
+            mensagem = f"{len(self.arquivos_com_erro)} de {len(arquivos)} arquivo(s) com erro"
+        else:
+            status = STATUS_SUCESSO
+            mensagem = self.mensagem_sucesso(arquivos)
+
+        linhas_por_segundo = (self.total_linhas_processadas / self.segundos_gravacao
+                              if self.segundos_gravacao else 0.0)
+        print(f"\n{mensagem} ({linhas_por_segundo:,.0f} linhas/s)")
+        return ResultadoCarga(
+            status=status,
+            mensagem=mensagem,
+            arquivos_processados=list(self.arquivos_processados),
+            arquivos_com_erro=list(self.arquivos_com_erro),
+            arquivos_ignorados=list(self.arquivos_ignorados),
+            linhas_processadas=self.total_linhas_processadas,
+            linhas_inseridas=self.total_linhas_inseridas,
+            linhas_atualizadas=self.total_linhas_atualizadas,
+            linhas_rejeitadas=self.total_linhas_rejeitadas,
+            linhas_ignoradas=self.total_linhas_ignoradas,
+            duracao_segundos=(datetime.now() - inicio).total_seconds(),
+            linhas_por_segundo=linhas_por_segundo,
+        )
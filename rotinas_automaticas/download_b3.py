@@ -0,0 +1,225 @@
+"""
+Download de Arquivos da B3
+==========================
+
+Download dos arquivos diários da B3 (token + arquivo) em paralelo:
+- Sessão HTTP compartilhada (requests.Session) com keep-alive e pool de
+  conexões do tamanho do número de workers
+- Workers limitados (B3_DOWNLOAD_WORKERS) e taxa máxima de requisições por host
+  (B3_DOWNLOAD_REQUISICOES_POR_SEGUNDO), para não sobrecarregar a B3
+- Resposta gravada em blocos em um arquivo .part, com o SHA-256 calculado no
+  caminho; o arquivo só ganha o nome final se o conteúdo ainda não foi carregado
+- Cache de downloads (cache_downloads) e ledger de arquivos (ledger_arquivos)
+
+Uso:
+    resultados = baixar_arquivos_b3(['2025-09-10', '2025-09-11'], pasta_destino)
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.db import connection
+
+from . import ledger_arquivos, cache_downloads, servico_carga
+
+URL_TOKEN_B3 = "https://arquivos.b3.com.br/api/download/requestname?fileName={nome_arquivo}&date={data}"
+URL_DOWNLOAD_B3 = "https://arquivos.b3.com.br/api/download/?token={token}"
+
+# Respostas 4xx que não indicam arquivo ausente: timeout e limite de requisições da B3
+STATUS_TRANSITORIOS = {408, 429}
+
+# Headers para simular um navegador
+HEADERS_B3 = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+    "Accept": "application/json, text/plain, */*",
+}
+
+# Lista de arquivos disponíveis para download
+ARQUIVOS_B3 = [
+    "InstrumentsConsolidatedFile",           # Instrumentos (BVBG.028.02)
+    "TradeInformationConsolidatedFile",      # Boletim de Negociação (BVBG.086.01)
+    "TradeInformationConsolidatedAfterHoursFile"  # Pós-mercado
+]
+
+# Tamanho dos blocos gravados em disco durante o download
+BYTES_POR_BLOCO_DOWNLOAD = 1024 * 1024
+
+
+class LimitadorTaxa:
+    """Intervalo mínimo entre requisições ao mesmo host, compartilhado pelos workers"""
+
+    def __init__(self, requisicoes_por_segundo):
+        self.intervalo = 1.0 / requisicoes_por_segundo if requisicoes_por_segundo else 0.0
+        self.proxima_por_host = {}
+        self.trava = threading.Lock()
+
+    def aguardar(self, url):
+        """Bloqueia até que uma nova requisição ao host da URL seja permitida"""
+        if not self.intervalo:
+            return
+        host = urlsplit(url).netloc
+        with self.trava:
+            agora = time.monotonic()
+            horario = max(agora, self.proxima_por_host.get(host, agora))
+            self.proxima_por_host[host] = horario + self.intervalo
+        if horario > agora:
+            time.sleep(horario - agora)
+
+
+def criar_sessao(workers):
+    """Sessão HTTP com keep-alive e uma conexão por worker no pool"""
+    sessao = requests.Session()
+    sessao.headers.update(HEADERS_B3)
+    adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=max(workers, 1))
+    sessao.mount('https://', adaptador)
+    sessao.mount('http://', adaptador)
+    return sessao
+
+
+def gravar_resposta(resposta, caminho_temporario):
+    """Grava a resposta em blocos e retorna (tamanho, sha256) do conteúdo"""
+    sha256 = hashlib.sha256()
+    tamanho = 0
+    with open(caminho_temporario, 'wb') as arquivo:
+        for bloco in resposta.iter_content(chunk_size=BYTES_POR_BLOCO_DOWNLOAD):
+            arquivo.write(bloco)
+            sha256.update(bloco)
+            tamanho += len(bloco)
+    return tamanho, sha256.hexdigest()
+
+
+def baixar_arquivo_b3(nome_arquivo, data, download_dir, sessao=None, limitador=None, estatisticas_cache=None):
+    """Realiza o download em duas etapas: obter token e depois o arquivo
+
+    Com o conteúdo de (nome_arquivo, data) ainda em disco ou já carregado, datas
+    passadas não são consultadas de novo e D0 usa requisição condicional.
+    """
+    sessao = sessao or criar_sessao(1)
+    limitador = limitador or LimitadorTaxa(0)
+    estatisticas_cache = estatisticas_cache or cache_downloads.EstatisticasCache()
+    try:
+        # Passo 0: Cache (arquivos de datas passadas não mudam)
+        chave_cache = cache_downloads.chave_b3(nome_arquivo, data)
+        entrada_cache = cache_downloads.obter_entrada(chave_cache)
+        disponivel = cache_downloads.conteudo_disponivel(entrada_cache, download_dir)
+        if disponivel and data < datetime.now().strftime("%Y-%m-%d"):
+            print(f"[CACHE] Já baixado em {entrada_cache.baixado_em:%d/%m/%Y %H:%M}: {entrada_cache.nome_arquivo}")
+            estatisticas_cache.acerto(entrada_cache)
+            return {'sucesso': True, 'nome_arquivo': entrada_cache.nome_arquivo, 'ja_carregado': True}
+
+        # Passo 1: Obter token
+        print(f"🔑 Solicitando token para: {nome_arquivo} ({data})")
+        url_token = URL_TOKEN_B3.format(nome_arquivo=nome_arquivo, data=data)
+        limitador.aguardar(url_token)
+        response = sessao.get(url_token, timeout=30)
+
+        if response.status_code != 200:
+            print(f"[ERROR] Erro ao obter token: {response.status_code}")
+            # 4xx: a B3 não tem o arquivo na data (feriado, data futura); 408 e 429
+            # (timeout, limite de requisições) são transitórios e o par é tentado de novo
+            return {'sucesso': False, 'erro': f'Erro ao obter token: {response.status_code}',
+                    'indisponivel': 400 <= response.status_code < 500
+                    and response.status_code not in STATUS_TRANSITORIOS}
+
+        dados = response.json()
+        token = dados.get("token")
+
+        if not token:
+            print("[ERROR] Token não encontrado na resposta")
+            return {'sucesso': False, 'erro': 'Token não encontrado na resposta', 'indisponivel': True}
+
+        nome_completo = f"{dados['file']['name']}{dados['file']['extension']}"
+        print(f"[OK] Token obtido para: {nome_completo}")
+
+        # Passo 2: Download do arquivo, em blocos direto para o disco
+        url_download = URL_DOWNLOAD_B3.format(token=token)
+        cabecalhos = cache_downloads.cabecalhos_condicionais(entrada_cache) if disponivel else {}
+        limitador.aguardar(url_download)
+        with sessao.get(url_download, headers=cabecalhos, timeout=60, stream=True) as arquivo_response:
+            if disponivel and cache_downloads.conteudo_inalterado(entrada_cache, arquivo_response):
+                print(f"[CACHE] Conteúdo inalterado: {nome_completo}")
+                estatisticas_cache.acerto(entrada_cache)
+                return {'sucesso': True, 'nome_arquivo': nome_completo, 'ja_carregado': True}
+            estatisticas_cache.falha()
+
+            if arquivo_response.status_code != 200:
+                print(f"[ERROR] Erro ao baixar arquivo: {arquivo_response.status_code}")
+                return {'sucesso': False, 'erro': f'Erro ao baixar arquivo: {arquivo_response.status_code}'}
+
+            caminho_arquivo = os.path.join(download_dir, nome_completo)
+            caminho_temporario = f"{caminho_arquivo}.part"
+            try:
+                tamanho, sha256 = gravar_resposta(arquivo_response, caminho_temporario)
+            except Exception:
+                if os.path.exists(caminho_temporario):
+                    os.remove(caminho_temporario)
+                raise
+
+        # Conteúdo já carregado em todas as tabelas do arquivo (ledger por SHA-256): não salvar de novo
+        try:
+            carga_anterior = ledger_arquivos.consultar_carga_completa(
+                sha256, servico_carga.tabelas_destino(nome_completo)
+            )
+        except Exception as e:
+            print(f"[WARNING] Erro ao consultar ledger de arquivos: {str(e)}")
+            carga_anterior = None
+
+        if carga_anterior is not None:
+            os.remove(caminho_temporario)
+            print(f"[SKIP] Conteúdo já carregado em {carga_anterior.carregado_em:%d/%m/%Y %H:%M}: {nome_completo}")
+            cache_downloads.registrar_download(chave_cache, url_download, arquivo_response, tamanho, nome_completo, sha256)
+            return {'sucesso': True, 'nome_arquivo': nome_completo, 'ja_carregado': True}
+
+        # Salvar arquivo
+        os.replace(caminho_temporario, caminho_arquivo)
+        cache_downloads.registrar_download(chave_cache, url_download, arquivo_response, tamanho, nome_completo, sha256)
+        print(f"[OK] Arquivo salvo: {nome_completo} ({tamanho:,} bytes)")
+        return {'sucesso': True, 'nome_arquivo': nome_completo, 'ja_carregado': False}
+
+    except Exception as e:
+        print(f"[ERROR] Erro no download de {nome_arquivo}: {str(e)}")
+        return {'sucesso': False, 'erro': str(e)}
+
+
+def _baixar_em_thread(nome_arquivo, data, download_dir, sessao, limitador, estatisticas_cache):
+    """Worker do pool de threads: fecha a conexão de banco própria da thread ao terminar"""
+    try:
+        return baixar_arquivo_b3(nome_arquivo, data, download_dir, sessao, limitador, estatisticas_cache)
+    finally:
+        connection.close()
+
+
+def baixar_pares_b3(pares, download_dir, workers=None, estatisticas_cache=None):
+    """Baixa em paralelo os pares (data, nome_arquivo)
+
+    Retorna [(data, nome_arquivo, resultado de baixar_arquivo_b3)] na ordem dos pares.
+    """
+    workers = workers or getattr(settings, 'B3_DOWNLOAD_WORKERS', 4)
+    limitador = LimitadorTaxa(getattr(settings, 'B3_DOWNLOAD_REQUISICOES_POR_SEGUNDO', 5))
+    estatisticas_cache = estatisticas_cache or cache_downloads.EstatisticasCache()
+    print(f"⬇️ Baixando {len(pares)} arquivos da B3 com {workers} workers")
+
+    with criar_sessao(workers) as sessao, ThreadPoolExecutor(max_workers=workers) as pool:
+        futuros = [
+            pool.submit(_baixar_em_thread, nome_arquivo, data, download_dir, sessao, limitador, estatisticas_cache)
+            for data, nome_arquivo in pares
+        ]
+        return [(data, nome_arquivo, futuro.result()) for (data, nome_arquivo), futuro in zip(pares, futuros)]
+
+
+def baixar_arquivos_b3(datas, download_dir, arquivos=None, workers=None, estatisticas_cache=None):
+    """Baixa os arquivos de todas as datas em paralelo (ver baixar_pares_b3)"""
+    arquivos = arquivos or ARQUIVOS_B3
+    pares = [(data, nome_arquivo) for data in datas for nome_arquivo in arquivos]
+    return baixar_pares_b3(pares, download_dir, workers, estatisticas_cache)
@@ -17,8 +17,12 @@ from django.core.management import call_command
 
 logger = logging.getLogger('heroku_scheduler')
 
-def iniciar_scheduler_heroku():
-    """Inicializa o scheduler no ambiente Heroku"""
+def iniciar_scheduler_heroku(continuar=None):
+    """Inicializa o scheduler no ambiente Heroku
+    
+    continuar: chamado entre as etapas; falso interrompe a inicialização (liderança perdida)
+    """
+    continuar = continuar or (lambda: True)
     try:
         # Verificar se estamos no Heroku
         is_heroku = os.environ.get('DYNO') is not None
@@ -35,6 +39,10 @@ def iniciar_scheduler_heroku():
         from django.db import close_old_connections
         close_old_connections()
         
+        if not continuar():
+            logger.warning("🛑 Liderança perdida: inicialização do scheduler interrompida")
+            return False
+        
         # Verificar duplicatas e limpar fila
         from rotinas_automaticas.scheduler_services import SchedulerService
         scheduler = SchedulerService()
@@ -53,6 +61,10 @@ def iniciar_scheduler_heroku():
         except Exception as e:
             logger.error(f"Erro ao verificar fila: {e}")
         
+        if not continuar():
+            logger.warning("🛑 Liderança perdida: carga diária fica com o novo líder")
+            return False
+        
         # Executar carga diária
         try:
             from rotinas_automaticas.scheduler_services import CargaDiariaService
@@ -0,0 +1,120 @@
+"""
+Índice de Arquivos por Data
+===========================
+
+Índice em memória dos arquivos de uma pasta (pasta_origem das rotinas), para a
+busca de arquivos do executor da fila:
+- A pasta é lida uma vez com os.scandir; as datas são extraídas dos nomes
+  (8 dígitos, YYYYMMDD ou DDMMYYYY) e montam um mapa data -> arquivos
+- O índice fica em cache por pasta e só é reconstruído quando o mtime da pasta
+  muda (arquivo criado, removido ou movido para processados)
+- Máscara + janela de datas são respondidas da memória, para todas as rotinas
+  de um ciclo do scheduler
+
+Uso:
+    indice = obter_indice(pasta)
+    indice.arquivos_por_datas('TradeInformationConsolidatedFile*.csv', datas)
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import re
+import threading
+from datetime import datetime
+from fnmatch import fnmatchcase
+
+# Datas nos nomes dos arquivos: 8 dígitos consecutivos
+PADRAO_DATA_NOME = re.compile(r'\d{8}')
+FORMATOS_DATA_NOME = ('%Y%m%d', '%d%m%Y')
+
+# Placeholders de data aceitos nas máscaras das rotinas
+PLACEHOLDERS_DATA = {'*YYYYMMDD*': '%Y%m%d', '*DDMMYYYY*': '%d%m%Y'}
+
+
+def datas_do_nome(nome):
+    """Datas válidas encontradas no nome do arquivo"""
+    datas = set()
+    for trecho in PADRAO_DATA_NOME.findall(nome):
+        for formato in FORMATOS_DATA_NOME:
+            try:
+                datas.add(datetime.strptime(trecho, formato).date())
+            except ValueError:
+                pass
+    return datas
+
+
+def tem_placeholder_data(mascara):
+    """Indica se a máscara tem placeholder de data (*YYYYMMDD* ou *DDMMYYYY*)"""
+    return any(placeholder in mascara for placeholder in PLACEHOLDERS_DATA)
+
+
+def aplicar_data(mascara, data):
+    """Substitui os placeholders de data da máscara pela data"""
+    for placeholder, formato in PLACEHOLDERS_DATA.items():
+        mascara = mascara.replace(placeholder, data.strftime(formato))
+    return mascara
+
+
+def _casa_mascara(nome, mascara):
+    """Mesmo critério do glob: sensível a maiúsculas e sem arquivos ocultos"""
+    if nome.startswith('.') and not mascara.startswith('.'):
+        return False
+    return fnmatchcase(nome, mascara)
+
+
+class IndiceDiretorio:
+    """Arquivos de uma pasta agrupados pela data do nome"""
+
+    def __init__(self, pasta):
+        self.pasta = pasta
+        self.mtime_ns = os.stat(pasta).st_mtime_ns
+        self.criados_em = {}   # nome -> st_ctime
+        self.por_data = {}     # date -> [nomes]
+        with os.scandir(pasta) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                self.criados_em[entrada.name] = entrada.stat().st_ctime
+                for data in datas_do_nome(entrada.name):
+                    self.por_data.setdefault(data, []).append(entrada.name)
+
+    def atualizado(self):
+        """Indica se a pasta não mudou desde a leitura"""
+        try:
+            return os.stat(self.pasta).st_mtime_ns == self.mtime_ns
+        except OSError:
+            return False
+
+    def arquivos_por_datas(self, mascara, datas):
+        """Caminhos dos arquivos da máscara com alguma das datas no nome, ordenados"""
+        encontrados = set()
+        for data in datas:
+            mascara_data = aplicar_data(mascara, data)
+            encontrados.update(
+                nome for nome in self.por_data.get(data, []) if _casa_mascara(nome, mascara_data)
+            )
+        return sorted(os.path.join(self.pasta, nome) for nome in encontrados)
+
+    def mais_recente(self, mascara):
+        """Caminho do arquivo mais recente (ctime) que casa com a máscara, ou None"""
+        nomes = [nome for nome in self.criados_em if _casa_mascara(nome, mascara)]
+        if not nomes:
+            return None
+        return os.path.join(self.pasta, max(nomes, key=self.criados_em.get))
+
+
+_indices = {}
+_trava_indices = threading.Lock()
+
+
+def obter_indice(pasta):
+    """Índice da pasta, reconstruído só quando o mtime da pasta muda"""
+    pasta = os.path.abspath(pasta)
+    with _trava_indices:
+        indice = _indices.get(pasta)
+        if indice is None or not indice.atualizado():
+            indice = IndiceDiretorio(pasta)
+            _indices[pasta] = indice
+        return indice
@@ -0,0 +1,216 @@
+"""
+Índice de Tickers de Referência (FII e Ações)
+=============================================
+
+Índice compacto em disco com os tickers de FII (FundoListadoB3) e de ações
+(valor mobiliário da CVM), compartilhado entre as execuções das rotinas de carga:
+- Arquivo binário com registros de largura fixa, ordenados, lido via mmap
+- Selo de versão derivado das tabelas de referência (max atualizado_em e
+  quantidade de FundoListadoB3, max id da tabela da CVM)
+- Reconstrução automática quando o selo no banco muda
+- Busca binária direto no mmap, sem montar conjuntos em memória
+
+Uso:
+    indice = obter_indice_tickers()
+    indice.classificar('PETR4')  # 'Acao', 'FII' ou None
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import mmap
+import json
+import struct
+import bisect
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Count
+
+from .models import FundoListadoB3, AnualFcaCiaAbertaValorMobiliario
+
+# Layout do arquivo: MAGIC | tamanho do cabeçalho (uint32) | cabeçalho JSON | registros FII | registros Ações
+MAGIC = b'TKIDX1\n'
+TIPO_FII = 'FII'
+TIPO_ACAO = 'Acao'
+
+# Índice carregado no processo, reaproveitado enquanto o selo não mudar
+_indice_processo = None
+
+
+def caminho_padrao():
+    """Caminho do arquivo de índice (configurável por INDICE_TICKERS_CAMINHO)"""
+    return getattr(
+        settings, 'INDICE_TICKERS_CAMINHO',
+        os.path.join(settings.BASE_DIR, 'static', 'cache', 'indice_tickers.idx')
+    )
+
+
+def calcular_versao():
+    """Selo de versão das tabelas de referência; muda quando FII ou valores mobiliários mudam"""
+    fundos = FundoListadoB3.objects.aggregate(ultimo=Max('atualizado_em'), quantidade=Count('id'))
+    valores = AnualFcaCiaAbertaValorMobiliario.objects.aggregate(ultimo_id=Max('id'))
+    ultimo = fundos['ultimo'].isoformat() if fundos['ultimo'] else ''
+    return f"fii:{ultimo}:{fundos['quantidade']}|cvm:{valores['ultimo_id'] or 0}"
+
+
+def consultar_tickers_referencia():
+    """Consulta os tickers FII e Ações nas tabelas de referência (normalizados em maiúsculas)"""
+    fiis = FundoListadoB3.objects.values_list('codigo', flat=True).distinct()
+    tickers_fii = {fii.strip().upper() for fii in fiis if fii and fii.strip()}
+
+    # Usar SQL direta devido ao mapeamento de campo com maiúscula
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT DISTINCT "Codigo_Negociacao" FROM rotinas_automaticas_anual_fca_cia_aberta_valor_mobiliario WHERE "Codigo_Negociacao" IS NOT NULL')
+        acoes = [row[0] for row in cursor.fetchall()]
+    tickers_acao = {acao.strip().upper() for acao in acoes if acao and acao.strip()}
+
+    return tickers_fii, tickers_acao
+
+
+def gravar_indice(caminho, versao, tickers_fii, tickers_acao):
+    """Grava o índice de forma atômica (arquivo temporário + os.replace)"""
+    secoes = {TIPO_FII: sorted(tickers_fii), TIPO_ACAO: sorted(tickers_acao)}
+    codificados = {tipo: [ticker.encode('utf-8') for ticker in tickers] for tipo, tickers in secoes.items()}
+    largura = max([len(ticker) for tickers in codificados.values() for ticker in tickers] or [1])
+
+    cabecalho = {'versao': versao, 'largura': largura, 'secoes': {}}
+    offset = 0
+    for tipo, tickers in codificados.items():
+        cabecalho['secoes'][tipo] = {'offset': offset, 'quantidade': len(tickers)}
+        offset += len(tickers) * largura
+    cabecalho_bytes = json.dumps(cabecalho).encode('utf-8')
+
+    pasta = os.path.dirname(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    descritor, caminho_temp = tempfile.mkstemp(dir=pasta, prefix='.indice_tickers_')
+    try:
+        with os.fdopen(descritor, 'wb') as arquivo:
+            arquivo.write(MAGIC)
+            arquivo.write(struct.pack('<I', len(cabecalho_bytes)))
+            arquivo.write(cabecalho_bytes)
+            for tickers in codificados.values():
+                arquivo.write(b''.join(ticker.ljust(largura, b'\0') for ticker in tickers))
+        os.replace(caminho_temp, caminho)
+    except Exception:
+        if os.path.exists(caminho_temp):
+            os.remove(caminho_temp)
+        raise
+
+
+class _SecaoIndice:
+    """Sequência ordenada de tickers sobre o mmap, para busca com bisect"""
+
+    def __init__(self, memoria, inicio, quantidade, largura):
+        self.memoria = memoria
+        self.inicio = inicio
+        self.quantidade = quantidade
+        self.largura = largura
+
+    def __len__(self):
+        return self.quantidade
+
+    def __getitem__(self, posicao):
+        offset = self.inicio + posicao * self.largura
+        return self.memoria[offset:offset + self.largura]
+
+    def contem(self, ticker):
+        chave = ticker.encode('utf-8').ljust(self.largura, b'\0')
+        if len(chave) > self.largura:
+            return False
+        posicao = bisect.bisect_left(self, chave)
+        return posicao < self.quantidade and self[posicao] == chave
+
+    def tickers(self):
+        dados = self.memoria[self.inicio:self.inicio + self.quantidade * self.largura]
+        return {
+            dados[posicao:posicao + self.largura].rstrip(b'\0').decode('utf-8')
+            for posicao in range(0, len(dados), self.largura)
+        }
+
+
+class IndiceTickers:
+    """Índice de tickers de referência mapeado em memória"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, 'rb') as arquivo:
+            self.memoria = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.memoria[:len(MAGIC)] != MAGIC:
+            self.memoria.close()
+            raise ValueError(f"Arquivo de índice inválido: {caminho}")
+
+        inicio = len(MAGIC)
+        (tamanho_cabecalho,) = struct.unpack('<I', self.memoria[inicio:inicio + 4])
+        inicio += 4
+        cabecalho = json.loads(self.memoria[inicio:inicio + tamanho_cabecalho].decode('utf-8'))
+        inicio += tamanho_cabecalho
+
+        self.versao = cabecalho['versao']
+        self.secoes = {
+            tipo: _SecaoIndice(self.memoria, inicio + secao['offset'], secao['quantidade'], cabecalho['largura'])
+            for tipo, secao in cabecalho['secoes'].items()
+        }
+
+    def fechar(self):
+        self.memoria.close()
+
+    def contem_fii(self, ticker):
+        return self.secoes[TIPO_FII].contem(ticker.strip().upper())
+
+    def contem_acao(self, ticker):
+        return self.secoes[TIPO_ACAO].contem(ticker.strip().upper())
+
+    def classificar(self, ticker):
+        """Classifica ticker como FII, Ação ou None (mesma precedência das rotinas de carga)"""
+        if self.contem_fii(ticker):
+            return TIPO_FII
+        if self.contem_acao(ticker):
+            return TIPO_ACAO
+        return None
+
+    def tickers_fii(self):
+        """Conjunto de tickers FII (para código que ainda trabalha com sets)"""
+        return self.secoes[TIPO_FII].tickers()
+
+    def tickers_acao(self):
+        """Conjunto de tickers de ações"""
+        return self.secoes[TIPO_ACAO].tickers()
+
+
+def obter_indice_tickers(caminho=None, forcar_reconstrucao=False):
+    """Retorna o índice atualizado, reconstruindo o arquivo se o selo de versão mudou
+
+    A checagem de versão é uma agregação barata; a consulta completa das tabelas
+    de referência só acontece quando o índice está ausente ou desatualizado.
+    """
+    global _indice_processo
+
+    caminho = caminho or caminho_padrao()
+    versao = calcular_versao()
+
+    if (not forcar_reconstrucao and _indice_processo is not None
+            and _indice_processo.caminho == caminho and _indice_processo.versao == versao):
+        return _indice_processo
+
+    indice = None
+    if not forcar_reconstrucao and os.path.exists(caminho):
+        try:
+            indice = IndiceTickers(caminho)
+            if indice.versao != versao:
+                indice.fechar()
+                indice = None
+        except (ValueError, OSError, KeyError, struct.error):
+            indice = None
+
+    if indice is None:
+        tickers_fii, tickers_acao = consultar_tickers_referencia()
+        gravar_indice(caminho, versao, tickers_fii, tickers_acao)
+        indice = IndiceTickers(caminho)
+
+    # O índice anterior não é fechado aqui: outras referências podem estar em uso (o mmap fecha no GC)
+    _indice_processo = indice
+    return indice
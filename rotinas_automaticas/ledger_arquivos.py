@@ -0,0 +1,93 @@
+"""
+Ledger de Arquivos Carregados
+=============================
+
+Registro dos arquivos de entrada já carregados, identificados pelo SHA-256 do
+conteúdo (tabela ArquivoCarregado):
+- O downloader da B3 descarta arquivos cujo conteúdo já foi carregado em todas
+  as tabelas destino das cargas registradas para o arquivo
+- As rotinas de carga ignoram arquivos já carregados na mesma tabela destino
+- Só conteúdo novo ou alterado vira trabalho; a consulta é uma busca indexada
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.utils import timezone
+
+from .models import ArquivoCarregado
+
+# Tamanho dos blocos lidos para o cálculo do hash
+BYTES_POR_BLOCO_HASH = 1024 * 1024
+
+
+def calcular_sha256(caminho, bytes_por_bloco=BYTES_POR_BLOCO_HASH):
+    """SHA-256 do conteúdo do arquivo, lido em blocos"""
+    with open(caminho, 'rb') as arquivo:
+        return calcular_sha256_fluxo(arquivo, bytes_por_bloco)
+
+
+def calcular_sha256_fluxo(arquivo, bytes_por_bloco=BYTES_POR_BLOCO_HASH):
+    """SHA-256 de um fluxo binário aberto (ex: membro de um zip), lido em blocos"""
+    sha256 = hashlib.sha256()
+    for bloco in iter(lambda: arquivo.read(bytes_por_bloco), b''):
+        sha256.update(bloco)
+    return sha256.hexdigest()
+
+
+def sha256_conteudo(conteudo):
+    """SHA-256 de um conteúdo já em memória (ex: resposta do download)"""
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def consultar_carga(sha256, tabela_destino=None):
+    """Carga registrada para o conteúdo (opcionalmente em uma tabela destino), ou None"""
+    cargas = ArquivoCarregado.objects.filter(sha256=sha256)
+    if tabela_destino:
+        cargas = cargas.filter(tabela_destino=tabela_destino)
+    return cargas.first()
+
+
+def consultar_carga_completa(sha256, tabelas_destino):
+    """Carga mais recente do conteúdo se todas as tabelas destino já o carregaram, ou None
+
+    Um arquivo pode alimentar mais de uma tabela: só pode ser descartado quando
+    nenhuma das cargas registradas para ele tiver trabalho a fazer.
+    """
+    tabelas_destino = set(tabelas_destino)
+    if not tabelas_destino:
+        return None
+    cargas = ArquivoCarregado.objects.filter(sha256=sha256, tabela_destino__in=tabelas_destino)
+    if set(cargas.values_list('tabela_destino', flat=True)) != tabelas_destino:
+        return None
+    return cargas.order_by('-carregado_em').first()
+
+
+def registrar_carga(caminho, sha256, tabela_destino, linhas_carregadas, data_referencia=None,
+                    tamanho_bytes=None, modificado_em=None):
+    """Registra (ou atualiza) a carga do arquivo no ledger
+
+    Para conteúdo que não está em disco (membro de zip), tamanho_bytes e
+    modificado_em são informados e caminho serve só para o nome.
+    """
+    if tamanho_bytes is None:
+        estatisticas = os.stat(caminho)
+        tamanho_bytes = estatisticas.st_size
+        modificado_em = datetime.fromtimestamp(estatisticas.st_mtime, tz=dt_timezone.utc)
+    registro, _ = ArquivoCarregado.objects.update_or_create(
+        sha256=sha256,
+        tabela_destino=tabela_destino,
+        defaults={
+            'arquivo': os.path.basename(caminho),
+            'tamanho_bytes': tamanho_bytes,
+            'modificado_em': modificado_em,
+            'data_referencia': data_referencia,
+            'linhas_carregadas': linhas_carregadas,
+            'carregado_em': timezone.now(),
+        }
+    )
+    return registro
@@ -0,0 +1,236 @@
+"""
+Liderança do Monitor do Scheduler
+=================================
+
+Eleição de um único líder no cluster (dynos e workers do gunicorn) para rodar o
+monitor do scheduler e a limpeza de startup:
+- Lock consultivo do PostgreSQL (pg_try_advisory_lock) em uma conexão dedicada,
+  fora do ciclo de close_old_connections: se o processo líder morre, a sessão
+  cai e o lock é liberado na hora
+- Heartbeat renova o lease na tabela LiderancaScheduler; se o líder trava com a
+  sessão aberta, um seguidor encerra a sessão dele (pg_terminate_backend) depois
+  que o lease expira e assume
+- Seguidores ficam ociosos e tentam o lock a cada LIDERANCA_INTERVALO_SEGUNDOS
+
+Uso:
+    iniciar_eleicao(ao_assumir=iniciar_monitor_e_limpeza, ao_perder=parar_monitor)
+    mandato = mandato_atual()  # tarefas longas do líder: parar se mandato_vigente(mandato) for falso
+    status_lideranca()
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import socket
+import hashlib
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import LiderancaScheduler
+
+logger = logging.getLogger('scheduler_lideranca')
+
+# Papel disputado e chave do lock consultivo (int64 estável derivado do nome)
+PAPEL_MONITOR = 'monitor_scheduler'
+CHAVE_LOCK_MONITOR = int.from_bytes(hashlib.sha256(PAPEL_MONITOR.encode()).digest()[:8], 'big', signed=True)
+
+
+def identidade_processo():
+    """Identificação do processo: dyno do Heroku (ou host) e pid"""
+    return f"{os.environ.get('DYNO') or socket.gethostname()}:{os.getpid()}"
+
+
+class EleicaoLider:
+    """Thread que disputa a liderança e mantém o heartbeat enquanto for líder"""
+
+    def __init__(self, ao_assumir, ao_perder, papel=PAPEL_MONITOR, chave_lock=CHAVE_LOCK_MONITOR):
+        self.ao_assumir = ao_assumir
+        self.ao_perder = ao_perder
+        self.papel = papel
+        self.chave_lock = chave_lock
+        self.identidade = identidade_processo()
+        self.intervalo = getattr(settings, 'LIDERANCA_INTERVALO_SEGUNDOS', 5)
+        self.lease = timedelta(seconds=getattr(settings, 'LIDERANCA_LEASE_SEGUNDOS', 30))
+
+        self.lider = False
+        self.assumido_em = None
+        self.ultimo_heartbeat = None
+        self.trocas_lideranca = 0
+        self.conexao = None
+        self.parar_evento = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self._executar, name='eleicao-lider-scheduler', daemon=True)
+        self.thread.start()
+        logger.info(f"🗳️ Eleição de líder iniciada ({self.identidade})")
+
+    def stop(self):
+        self.parar_evento.set()
+        if self.thread:
+            self.thread.join(timeout=self.intervalo + 5)
+
+    def _executar(self):
+        while not self.parar_evento.is_set():
+            try:
+                if self.lider:
+                    self._heartbeat()
+                else:
+                    self._tentar_assumir()
+            except Exception as e:
+                logger.error(f"Erro na eleição de líder: {e}", exc_info=True)
+                self._perder_lideranca(str(e))
+            self.parar_evento.wait(self.intervalo)
+        self._perder_lideranca('eleição encerrada')
+
+    def _cursor(self):
+        """Cursor da conexão dedicada (não registrada no Django, então não é fechada por close_old_connections)"""
+        if self.conexao is None:
+            self.conexao = connections.create_connection('default')
+        return self.conexao.cursor()
+
+    def _fechar_conexao(self):
+        if self.conexao is not None:
+            try:
+                self.conexao.close()
+            except Exception:
+                pass
+            self.conexao = None
+
+    def _tentar_assumir(self):
+        with self._cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s), pg_backend_pid()", [self.chave_lock])
+            obteve_lock, backend_pid = cursor.fetchone()
+            agora = timezone.now()
+
+            if not obteve_lock:
+                self._verificar_lease_expirado(cursor, agora)
+                return
+
+            cursor.execute(f"""
+                INSERT INTO {LiderancaScheduler._meta.db_table}
+                       (nome, identidade, backend_pid, assumido_em, heartbeat_em, lease_expira_em)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (nome) DO UPDATE
+                   SET identidade = EXCLUDED.identidade, backend_pid = EXCLUDED.backend_pid,
+                       assumido_em = EXCLUDED.assumido_em, heartbeat_em = EXCLUDED.heartbeat_em,
+                       lease_expira_em = EXCLUDED.lease_expira_em
+            """, [self.papel, self.identidade, backend_pid, agora, agora, agora + self.lease])
+
+        self.lider = True
+        self.assumido_em = agora
+        self.ultimo_heartbeat = agora
+        self.trocas_lideranca += 1
+        logger.info(f"👑 Liderança assumida por {self.identidade}")
+        # Em thread própria: a limpeza de startup não pode atrasar o heartbeat
+        threading.Thread(target=self._assumir_papel, name='lider-scheduler-startup', daemon=True).start()
+
+    def _assumir_papel(self):
+        try:
+            self.ao_assumir()
+        except Exception as e:
+            logger.error(f"Erro ao assumir a liderança: {e}", exc_info=True)
+        finally:
+            connections.close_all()
+
+    def _verificar_lease_expirado(self, cursor, agora):
+        """Líder travado com a sessão aberta: encerra a sessão dele depois que o lease expira"""
+        cursor.execute(
+            f"SELECT identidade, backend_pid, lease_expira_em FROM {LiderancaScheduler._meta.db_table} WHERE nome = %s",
+            [self.papel]
+        )
+        linha = cursor.fetchone()
+        if linha is None:
+            return
+        identidade, backend_pid, lease_expira_em = linha
+        if backend_pid and lease_expira_em and lease_expira_em < agora:
+            logger.warning(f"⚠️ Lease do líder {identidade} expirou em {lease_expira_em:%H:%M:%S}; encerrando a sessão {backend_pid}")
+            cursor.execute("SELECT pg_terminate_backend(%s)", [backend_pid])
+
+    def _heartbeat(self):
+        agora = timezone.now()
+        with self._cursor() as cursor:
+            cursor.execute(f"""
+                UPDATE {LiderancaScheduler._meta.db_table}
+                   SET heartbeat_em = %s, lease_expira_em = %s
+                 WHERE nome = %s AND backend_pid = pg_backend_pid()
+            """, [agora, agora + self.lease, self.papel])
+            if cursor.rowcount != 1:
+                raise RuntimeError('registro de liderança assumido por outro processo')
+        self.ultimo_heartbeat = agora
+
+    def _perder_lideranca(self, motivo):
+        # Fechar a sessão libera o lock consultivo (se ainda estiver com ele)
+        self._fechar_conexao()
+        if not self.lider:
+            return
+        self.lider = False
+        self.assumido_em = None
+        logger.warning(f"🛑 Liderança perdida por {self.identidade}: {motivo}")
+        try:
+            self.ao_perder()
+        except Exception as e:
+            logger.error(f"Erro ao deixar a liderança: {e}", exc_info=True)
+
+    def status(self):
+        return {
+            'papel': 'LIDER' if self.lider else 'SEGUIDOR',
+            'identidade': self.identidade,
+            'assumido_em': self.assumido_em,
+            'ultimo_heartbeat': self.ultimo_heartbeat,
+            'trocas_lideranca': self.trocas_lideranca,
+            'intervalo_segundos': self.intervalo,
+            'lease_segundos': self.lease.total_seconds(),
+        }
+
+
+eleicao_global = None
+
+
+def iniciar_eleicao(ao_assumir, ao_perder):
+    """Inicia a eleição de líder deste processo (uma por processo)"""
+    global eleicao_global
+    if eleicao_global is None:
+        eleicao_global = EleicaoLider(ao_assumir, ao_perder)
+        eleicao_global.start()
+    return eleicao_global
+
+
+def pode_executar_monitor():
+    """Sem eleição neste processo (comandos, liderança desativada) ou sendo o líder"""
+    return eleicao_global is None or eleicao_global.lider
+
+
+def mandato_atual():
+    """Mandato de liderança deste processo: muda a cada liderança assumida (None sem eleição)"""
+    return eleicao_global.trocas_lideranca if eleicao_global else None
+
+
+def mandato_vigente(mandato):
+    """Indica se o processo continua líder no mesmo mandato (sem eleição: sempre)"""
+    return eleicao_global is None or (eleicao_global.lider and eleicao_global.trocas_lideranca == mandato)
+
+
+def status_lideranca():
+    """Papel deste processo e o líder atual do cluster"""
+    status = eleicao_global.status() if eleicao_global else {'papel': 'SEM_ELEICAO', 'identidade': identidade_processo()}
+    try:
+        registro = LiderancaScheduler.objects.filter(nome=PAPEL_MONITOR).first()
+    except Exception as e:
+        logger.warning(f"Erro ao consultar líder atual: {e}")
+        registro = None
+    if registro is not None:
+        status['lider_atual'] = {
+            'identidade': registro.identidade,
+            'assumido_em': registro.assumido_em,
+            'heartbeat_em': registro.heartbeat_em,
+            'lease_expira_em': registro.lease_expira_em,
+            'lease_valido': bool(registro.lease_expira_em and registro.lease_expira_em > timezone.now()),
+        }
+    return status
@@ -0,0 +1,67 @@
+"""
+Comando Django para o backfill histórico dos arquivos da B3
+==========================================================
+
+Usage: python manage.py backfill_b3 --inicio YYYY-MM-DD --fim YYYY-MM-DD
+                                    [--arquivos A,B] [--workers N] [--dias-por-lote N]
+       python manage.py backfill_b3 --retomar ID
+"""
+
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from rotinas_automaticas.models import BackfillB3
+from rotinas_automaticas.backfill_b3 import criar_backfill, executar_backfill
+
+
+class Command(BaseCommand):
+    help = 'Baixa e carrega os arquivos da B3 que faltam em um intervalo de datas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--inicio', type=str, help='Data inicial (formato YYYY-MM-DD)')
+        parser.add_argument('--fim', type=str, help='Data final (formato YYYY-MM-DD). Se não informado, usa a data atual.')
+        parser.add_argument(
+            '--arquivos',
+            type=str,
+            help='Tipos de arquivo separados por vírgula (padrão: Instruments, TradeInformation e AfterHours)',
+        )
+        parser.add_argument('--workers', type=int, help='Downloads em paralelo (padrão: B3_DOWNLOAD_WORKERS)')
+        parser.add_argument('--dias-por-lote', type=int, help='Datas por lote do pipeline (padrão: 5)')
+        parser.add_argument('--retomar', type=int, help='ID de um backfill interrompido a retomar')
+
+    def handle(self, *args, **options):
+        if options['retomar']:
+            try:
+                backfill = BackfillB3.objects.get(pk=options['retomar'])
+            except BackfillB3.DoesNotExist:
+                raise CommandError(f"Backfill {options['retomar']} não encontrado")
+            self.stdout.write(f'Retomando backfill {backfill.id} ({backfill.data_inicio} a {backfill.data_fim})...')
+        else:
+            if not options['inicio']:
+                raise CommandError('Informe --inicio ou --retomar')
+            try:
+                inicio = datetime.strptime(options['inicio'], '%Y-%m-%d').date()
+                fim = (datetime.strptime(options['fim'], '%Y-%m-%d').date() if options['fim']
+                       else datetime.now().date())
+            except ValueError:
+                raise CommandError('Formato de data inválido. Use YYYY-MM-DD')
+            arquivos = [arquivo.strip() for arquivo in options['arquivos'].split(',')] if options['arquivos'] else None
+            try:
+                backfill = criar_backfill(inicio, fim, arquivos)
+            except ValueError as e:
+                raise CommandError(str(e))
+            self.stdout.write(f'Backfill {backfill.id} criado ({inicio} a {fim})...')
+
+        backfill = executar_backfill(backfill, workers=options['workers'], dias_por_lote=options['dias_por_lote'])
+
+        resumo = (
+            f'Backfill {backfill.id}: {backfill.status}\n'
+            f'Pares concluídos: {backfill.pares_concluidos}/{backfill.total_pares}\n'
+            f'Pares já carregados antes: {backfill.pares_ja_carregados}\n'
+            f'Pares com erro: {backfill.pares_com_erro}\n'
+            f'Linhas carregadas: {backfill.linhas_carregadas}'
+        )
+        if backfill.status == 'CONCLUIDO':
+            self.stdout.write(self.style.SUCCESS(resumo))
+        else:
+            self.stdout.write(self.style.ERROR(f'{resumo}\nRetome com: python manage.py backfill_b3 --retomar {backfill.id}'))
@@ -59,9 +59,15 @@ class Command(BaseCommand):
             },
             {
                 'nome': 'D_MAIS_1',
-                'descricao': 'D+1: Terça a Sábado',
+                'descricao': 'D+1: Terça a Sábado, no dia seguinte a um pregão da B3',
                 'segunda': False, 'terca': True, 'quarta': True,
                 'quinta': True, 'sexta': True, 'sabado': True, 'domingo': False
+            },
+            {
+                'nome': 'PREGAO_B3',
+                'descricao': 'Apenas dias de pregão da B3 (sem feriados)',
+                'segunda': True, 'terca': True, 'quarta': True,
+                'quinta': True, 'sexta': True, 'sabado': False, 'domingo': False
             }
         ]
         
@@ -116,8 +122,9 @@ class Command(BaseCommand):
         if not tipo_carga:
             tipo_carga = TipoRotina.objects.first()
         
-        # Buscar grupo diário
+        # Buscar grupos: diário e D+1 (arquivos da B3 são publicados após o pregão)
         grupo_diario = GrupoDiasExecucao.objects.filter(nome='DIARIO').first()
+        grupo_d_mais_1 = GrupoDiasExecucao.objects.filter(nome='D_MAIS_1').first()
         
         rotinas_basicas = [
             {
@@ -144,7 +151,8 @@ class Command(BaseCommand):
                 'tipo_rotina': 'DOWNLOAD_ARQUIVO',
                 'horario_execucao': '09:00:00',
                 'endpoint_url': f"{settings.BASE_URL}/api/download_b3/",
-                'metodo_http': 'POST'
+                'metodo_http': 'POST',
+                'grupo_dias': grupo_d_mais_1
             },
             {
                 'nome': 'job_carregar_precos_trade_consolidado_file',
@@ -159,7 +167,8 @@ class Command(BaseCommand):
                 'endpoint_url': f"{settings.BASE_URL}/api/static_arquivos/",
                 'metodo_http': 'POST',
                 'payload_json': '{"acao": "carga", "arquivo": "TradeInformationConsolidatedFile*.csv"}',
-                'mascara_arquivo': 'TradeInformationConsolidatedFile*.csv'
+                'mascara_arquivo': 'TradeInformationConsolidatedFile*.csv',
+                'grupo_dias': grupo_d_mais_1
             }
         ]
         
@@ -189,7 +198,7 @@ class Command(BaseCommand):
                 defaults={
                     'tipo_execucao': rotina_data['tipo_execucao'],
                     'tipo_rotina': rotina_data['tipo_rotina'],
-                    'grupo_dias': grupo_diario,
+                    'grupo_dias': rotina_data.get('grupo_dias') or grupo_diario,
                     'executar': True,
                     'horario_execucao': rotina_data['horario_execucao'],
                     'endpoint_url': rotina_data.get('endpoint_url'),
@@ -0,0 +1,117 @@
+"""
+Comando Django para o teste de estresse do despacho da fila
+==========================================================
+
+Cria itens PENDENTE temporários (datados em 2099, fora do alcance do monitor) e
+os disputa com várias threads em vários processos, todas tentando reivindicar
+todos os itens pela transição atômica do executor. Cada item deve ser executado
+exatamente uma vez; os itens são removidos ao final.
+
+Usage: python manage.py stress_despacho_fila [--itens 200] [--processos 2] [--threads 8]
+                                             [--duracao-ms 5] [--rotina ID]
+"""
+
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from rotinas_automaticas.models import FilaExecucao, SchedulerRotina
+from rotinas_automaticas.scheduler_services import CONTADORES_DESPACHO, ExecutorRotinas
+
+# Data dos itens do teste: nenhum ciclo do monitor chega até ela
+DATA_BASE_ESTRESSE = date(2099, 1, 1)
+
+
+def _disputar_itens(ids_itens, duracao_segundos):
+    """Thread do teste: tenta reivindicar todos os itens, em ordem aleatória"""
+    executor = ExecutorRotinas()
+    vencidos = []
+    ids_itens = list(ids_itens)
+    random.shuffle(ids_itens)
+    try:
+        for id_item in ids_itens:
+            if executor.reivindicar_item(FilaExecucao(pk=id_item)):
+                # Execução simulada: o item fica em execução enquanto a disputa continua
+                CONTADORES_DESPACHO.iniciar(id_item)
+                time.sleep(duracao_segundos)
+                CONTADORES_DESPACHO.finalizar(id_item)
+                vencidos.append(id_item)
+        return vencidos
+    finally:
+        connection.close()
+
+
+def _processo_estresse(ids_itens, threads, duracao_segundos):
+    """Processo do teste: threads disputando os mesmos itens; retorna vencidos e contadores"""
+    try:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futuros = [pool.submit(_disputar_itens, ids_itens, duracao_segundos) for _ in range(threads)]
+            vencidos = [id_item for futuro in futuros for id_item in futuro.result()]
+        return vencidos, CONTADORES_DESPACHO.como_dict()
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Teste de estresse: verifica que cada item da fila é reivindicado exatamente uma vez'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--itens', type=int, default=200, help='Itens temporários na fila (default: 200)')
+        parser.add_argument('--processos', type=int, default=2, help='Processos concorrentes (default: 2)')
+        parser.add_argument('--threads', type=int, default=8, help='Threads por processo (default: 8)')
+        parser.add_argument('--duracao-ms', type=int, default=5, help='Duração simulada de cada execução (default: 5)')
+        parser.add_argument('--rotina', type=int, help='ID da SchedulerRotina dos itens (padrão: a primeira)')
+
+    def handle(self, *args, **options):
+        rotinas = SchedulerRotina.objects.all()
+        rotina = (rotinas.filter(pk=options['rotina']) if options['rotina'] else rotinas.order_by('pk')).first()
+        if rotina is None:
+            raise CommandError('Nenhuma SchedulerRotina encontrada para os itens do teste')
+
+        itens = FilaExecucao.objects.bulk_create([
+            FilaExecucao(
+                scheduler_rotina=rotina,
+                data_execucao=DATA_BASE_ESTRESSE + timedelta(days=posicao // 1440),
+                horario_execucao=dt_time(posicao % 1440 // 60, posicao % 60),
+                status='PENDENTE',
+                prioridade=rotina.prioridade,
+            )
+            for posicao in range(options['itens'])
+        ])
+        ids_itens = [item.pk for item in itens]
+        self.stdout.write(f"{len(ids_itens)} itens criados; {options['processos']} processo(s) x "
+                          f"{options['threads']} thread(s) disputando cada item...")
+
+        inicio = time.monotonic()
+        try:
+            connections.close_all()  # Os processos filhos abrem conexões próprias
+            with ProcessPoolExecutor(max_workers=options['processos']) as pool:
+                futuros = [
+                    pool.submit(_processo_estresse, ids_itens, options['threads'], options['duracao_ms'] / 1000)
+                    for _ in range(options['processos'])
+                ]
+                resultados = [futuro.result() for futuro in futuros]
+        finally:
+            FilaExecucao.objects.filter(pk__in=ids_itens).delete()
+        duracao = time.monotonic() - inicio
+
+        vencidos = Counter(id_item for vencidos_processo, _ in resultados for id_item in vencidos_processo)
+        contadores = Counter()
+        for _, contadores_processo in resultados:
+            contadores.update(contadores_processo)
+
+        duplicados = sum(quantidade - 1 for quantidade in vencidos.values() if quantidade > 1)
+        nao_executados = len(set(ids_itens) - set(vencidos))
+        resumo = (
+            f"Duração: {duracao:.2f}s\n"
+            f"Reivindicações vencidas: {contadores['reivindicacoes']} | disputas perdidas: {contadores['disputas_perdidas']}\n"
+            f"Execuções: {contadores['execucoes']} | duplicadas no processo: {contadores['execucoes_duplicadas']}\n"
+            f"Itens executados mais de uma vez: {duplicados} | itens não executados: {nao_executados}"
+        )
+        if duplicados or nao_executados or contadores['execucoes_duplicadas']:
+            raise CommandError(f"Despacho inconsistente\n{resumo}")
+        self.stdout.write(self.style.SUCCESS(f"Cada item executado exatamente uma vez\n{resumo}"))
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rotinas_automaticas", "0005_alter_cargadiariarotinas_status"),
+    ]
+
+    operations = [
+        # Remove duplicatas gravadas por reprocessamentos anteriores, mantendo a linha mais recente
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM organizesee_ativosprecos antigo
+                USING organizesee_ativosprecos recente
+                WHERE antigo.ticker = recente.ticker
+                  AND antigo.data = recente.data
+                  AND antigo.fonte = recente.fonte
+                  AND antigo.id < recente.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name="ativosprecos",
+            constraint=models.UniqueConstraint(
+                fields=("ticker", "data", "fonte"),
+                name="ativosprecos_ticker_data_fonte_uniq",
+            ),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0006_ativosprecos_ticker_data_fonte_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CheckpointCarga',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('arquivo', models.CharField(help_text='Nome do arquivo em carga', max_length=255)),
+                ('tamanho_bytes', models.BigIntegerField(help_text='Tamanho do arquivo em bytes')),
+                ('tabela_destino', models.CharField(help_text='Tabela destino dos dados carregados', max_length=255)),
+                ('offset_bytes', models.BigIntegerField(default=0, help_text='Posição em bytes logo após o último lote confirmado')),
+                ('linhas_processadas', models.IntegerField(default=0, help_text='Linhas do arquivo lidas até o checkpoint')),
+                ('lotes_confirmados', models.IntegerField(default=0, help_text='Quantidade de lotes já gravados')),
+                ('linhas_inseridas', models.IntegerField(default=0)),
+                ('linhas_atualizadas', models.IntegerField(default=0)),
+                ('linhas_rejeitadas', models.IntegerField(default=0)),
+                ('data_dos_dados', models.DateField(blank=True, help_text='Primeira data válida encontrada', null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('registro_execucao', models.ForeignKey(blank=True, help_text='Execução que gravou o último checkpoint', null=True, on_delete=django.db.models.deletion.SET_NULL, to='rotinas_automaticas.registroexecucao')),
+            ],
+            options={
+                'verbose_name': 'Checkpoint de Carga',
+                'verbose_name_plural': 'Checkpoints de Carga',
+                'db_table': 'rotinas_automaticas_checkpoint_carga',
+                'unique_together': {('arquivo', 'tamanho_bytes', 'tabela_destino')},
+            },
+        ),
+    ]
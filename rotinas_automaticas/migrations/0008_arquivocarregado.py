@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0007_checkpointcarga'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArquivoCarregado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(db_index=True, help_text='SHA-256 do conteúdo do arquivo', max_length=64)),
+                ('arquivo', models.CharField(help_text='Nome do arquivo carregado', max_length=255)),
+                ('tamanho_bytes', models.BigIntegerField(help_text='Tamanho do arquivo em bytes')),
+                ('modificado_em', models.DateTimeField(blank=True, help_text='Data de modificação (mtime) do arquivo', null=True)),
+                ('data_referencia', models.DateField(blank=True, help_text='Data dos dados do arquivo', null=True)),
+                ('tabela_destino', models.CharField(help_text='Tabela destino dos dados carregados', max_length=255)),
+                ('linhas_carregadas', models.IntegerField(default=0, help_text='Linhas aceitas e gravadas na carga')),
+                ('carregado_em', models.DateTimeField(auto_now_add=True, help_text='Data e hora da carga')),
+            ],
+            options={
+                'verbose_name': 'Arquivo Carregado',
+                'verbose_name_plural': 'Arquivos Carregados',
+                'db_table': 'rotinas_automaticas_arquivo_carregado',
+                'ordering': ['-carregado_em'],
+                'unique_together': {('sha256', 'tabela_destino')},
+            },
+        ),
+    ]
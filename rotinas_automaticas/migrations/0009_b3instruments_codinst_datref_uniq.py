@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:35
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0008_arquivocarregado'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='b3instrumentsconsolidated',
+            name='data_carga',
+            field=models.DateTimeField(auto_now_add=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+        # Remove duplicatas de cargas anteriores, mantendo a linha mais recente
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM b3_instruments_consolidated antigo
+                USING b3_instruments_consolidated recente
+                WHERE antigo.codinst = recente.codinst
+                  AND antigo.datref = recente.datref
+                  AND antigo.id < recente.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='b3instrumentsconsolidated',
+            constraint=models.UniqueConstraint(fields=('codinst', 'datref'), name='b3instruments_codinst_datref_uniq'),
+        ),
+    ]
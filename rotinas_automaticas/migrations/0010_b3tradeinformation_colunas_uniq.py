@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:39
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0009_b3instruments_codinst_datref_uniq'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='b3tradeinformation',
+            name='oscilacao',
+            field=models.DecimalField(blank=True, decimal_places=4, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='b3tradeinformation',
+            name='preaju',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True),
+        ),
+        migrations.AddField(
+            model_name='b3tradeinformation',
+            name='preref',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=15, null=True),
+        ),
+        migrations.AddField(
+            model_name='b3tradeinformation',
+            name='segmento',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='b3tradeinformation',
+            name='taxaju',
+            field=models.DecimalField(blank=True, decimal_places=6, max_digits=18, null=True),
+        ),
+        migrations.AlterField(
+            model_name='b3tradeinformation',
+            name='data_carga',
+            field=models.DateTimeField(auto_now_add=True, db_default=django.db.models.functions.datetime.Now()),
+        ),
+        # Remove duplicatas de cargas anteriores, mantendo a linha mais recente
+        migrations.RunSQL(
+            sql="""
+                DELETE FROM b3_trade_information antigo
+                USING b3_trade_information recente
+                WHERE antigo.codinst = recente.codinst
+                  AND antigo.datref = recente.datref
+                  AND antigo.tipreg IS NOT DISTINCT FROM recente.tipreg
+                  AND antigo.id < recente.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='b3tradeinformation',
+            constraint=models.UniqueConstraint(fields=('codinst', 'datref', 'tipreg'), name='b3trade_codinst_datref_tipreg_uniq'),
+        ),
+    ]
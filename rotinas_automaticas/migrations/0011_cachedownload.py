@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0010_b3tradeinformation_colunas_uniq'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheDownload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(help_text="URL ou 'b3:<fileName>:<data>'", max_length=500, unique=True)),
+                ('url', models.CharField(blank=True, help_text='URL do último download', max_length=500)),
+                ('etag', models.CharField(blank=True, help_text='Cabeçalho ETag da resposta', max_length=255)),
+                ('last_modified', models.CharField(blank=True, help_text='Cabeçalho Last-Modified da resposta', max_length=255)),
+                ('tamanho_bytes', models.BigIntegerField(blank=True, help_text='Content-Length (ou bytes recebidos)', null=True)),
+                ('nome_arquivo', models.CharField(blank=True, help_text='Nome do arquivo salvo', max_length=255)),
+                ('sha256', models.CharField(blank=True, help_text='SHA-256 do conteúdo baixado', max_length=64)),
+                ('acertos', models.IntegerField(default=0, help_text='Downloads evitados pelo cache')),
+                ('downloads', models.IntegerField(default=0, help_text='Downloads completos')),
+                ('baixado_em', models.DateTimeField(blank=True, help_text='Último download completo', null=True)),
+                ('verificado_em', models.DateTimeField(auto_now=True, help_text='Última verificação')),
+            ],
+            options={
+                'verbose_name': 'Cache de Download',
+                'verbose_name_plural': 'Cache de Downloads',
+                'db_table': 'rotinas_automaticas_cache_download',
+                'ordering': ['-verificado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0011_cachedownload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BackfillB3',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_inicio', models.DateField(help_text='Primeira data do intervalo')),
+                ('data_fim', models.DateField(help_text='Última data do intervalo')),
+                ('arquivos', models.JSONField(default=list, help_text='Tipos de arquivo da B3 (fileName)')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('EXECUTANDO', 'Executando'), ('CONCLUIDO', 'Concluído'), ('ERRO', 'Erro')], default='PENDENTE', max_length=20)),
+                ('total_pares', models.IntegerField(default=0, help_text='Pares (data, arquivo) planejados nesta execução')),
+                ('pares_concluidos', models.IntegerField(default=0)),
+                ('pares_com_erro', models.IntegerField(default=0)),
+                ('pares_ja_carregados', models.IntegerField(default=0, help_text='Pares do intervalo já no ledger')),
+                ('pares_indisponiveis', models.JSONField(default=list, help_text="'data:arquivo' sem arquivo na B3 (feriados)")),
+                ('linhas_carregadas', models.BigIntegerField(default=0)),
+                ('pares_por_minuto', models.FloatField(default=0.0)),
+                ('linhas_por_segundo', models.FloatField(default=0.0)),
+                ('previsao_termino', models.DateTimeField(blank=True, null=True)),
+                ('erro_detalhes', models.TextField(blank=True)),
+                ('iniciado_em', models.DateTimeField(blank=True, null=True)),
+                ('finalizado_em', models.DateTimeField(blank=True, null=True)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Backfill B3',
+                'verbose_name_plural': 'Backfills B3',
+                'db_table': 'rotinas_automaticas_backfill_b3',
+                'ordering': ['-criado_em'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 17:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0012_backfillb3'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='grupodiasexecucao',
+            name='nome',
+            field=models.CharField(choices=[('DIARIO', 'Diário (Segunda a Domingo)'), ('DIAS_SEMANA', 'Dias de Semana (Segunda a Sexta)'), ('FINAL_SEMANA', 'Final de Semana (Sábado e Domingo)'), ('D_MAIS_1', 'D+1 (Dia seguinte a um pregão da B3)'), ('PREGAO_B3', 'Dias de Pregão da B3'), ('PERSONALIZADO', 'Personalizado')], max_length=50, unique=True),
+        ),
+    ]
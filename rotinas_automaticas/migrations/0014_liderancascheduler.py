@@ -0,0 +1,30 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0013_grupodiasexecucao_pregao_b3'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LiderancaScheduler',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(help_text='Papel disputado (ex.: monitor_scheduler)', max_length=100, unique=True)),
+                ('identidade', models.CharField(help_text='Processo líder (dyno/host:pid)', max_length=200)),
+                ('backend_pid', models.IntegerField(blank=True, help_text='PID da sessão do PostgreSQL que detém o lock', null=True)),
+                ('assumido_em', models.DateTimeField(blank=True, null=True)),
+                ('heartbeat_em', models.DateTimeField(blank=True, null=True)),
+                ('lease_expira_em', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Liderança do Scheduler',
+                'verbose_name_plural': 'Liderança do Scheduler',
+                'db_table': 'rotinas_automaticas_lideranca_scheduler',
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-17 19:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("rotinas_automaticas", "0014_liderancascheduler"),
+    ]
+
+    operations = [
+        # NOTIFY no canal fila_execucao quando um item fica pendente (inserido, reagendado
+        # ou em recovery); o monitor escuta com LISTEN em vez de consultar a fila em polling
+        migrations.RunSQL(
+            sql="""
+                CREATE OR REPLACE FUNCTION rotinas_automaticas_notificar_fila() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify('fila_execucao', json_build_object(
+                        'id', NEW.id,
+                        'status', NEW.status,
+                        'data_execucao', NEW.data_execucao,
+                        'horario_execucao', NEW.horario_execucao
+                    )::text);
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER rotinas_automaticas_filaexecucao_notify
+                AFTER INSERT OR UPDATE ON rotinas_automaticas_filaexecucao
+                FOR EACH ROW WHEN (NEW.status IN ('PENDENTE', 'RECOVERY'))
+                EXECUTE PROCEDURE rotinas_automaticas_notificar_fila();
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS rotinas_automaticas_filaexecucao_notify ON rotinas_automaticas_filaexecucao;
+                DROP FUNCTION IF EXISTS rotinas_automaticas_notificar_fila();
+            """,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rotinas_automaticas', '0015_filaexecucao_notify'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='filaexecucao',
+            name='atraso_despacho_segundos',
+            field=models.FloatField(blank=True, help_text='Início real menos o horário planejado', null=True),
+        ),
+    ]
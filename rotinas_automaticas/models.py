@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Now
 from django.contrib.auth.models import User
 
 # ================== TABELAS B3 ==================
@@ -20,13 +21,18 @@ class B3InstrumentsConsolidated(models.Model):
     codcfi = models.CharField(max_length=10, null=True, blank=True)
     dtini = models.DateField(null=True, blank=True)
     dtfim = models.DateField(null=True, blank=True)
-    data_carga = models.DateTimeField(auto_now_add=True)
+    # Default no banco para as cargas via COPY, que não enviam esta coluna
+    data_carga = models.DateTimeField(auto_now_add=True, db_default=Now())
     fonte = models.CharField(max_length=20, default='B3')
 
     class Meta:
         db_table = 'b3_instruments_consolidated'
         verbose_name = 'B3 Instrumento Consolidado'
         verbose_name_plural = 'B3 Instrumentos Consolidados'
+        constraints = [
+            # Chave natural usada pelo upsert da carga do InstrumentsConsolidatedFile
+            models.UniqueConstraint(fields=['codinst', 'datref'], name='b3instruments_codinst_datref_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.codinst} - {self.nomres}"
@@ -58,13 +64,23 @@ class B3TradeInformation(models.Model):
     ptoexe = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
     codisi = models.CharField(max_length=20, null=True, blank=True)
     dismes = models.IntegerField(null=True, blank=True)
-    data_carga = models.DateTimeField(auto_now_add=True)
+    # Colunas dos arquivos TradeInformationConsolidated sem campo equivalente acima
+    segmento = models.CharField(max_length=100, null=True, blank=True)
+    preref = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    oscilacao = models.DecimalField(max_digits=12, decimal_places=4, null=True, blank=True)
+    preaju = models.DecimalField(max_digits=18, decimal_places=6, null=True, blank=True)
+    taxaju = models.DecimalField(max_digits=18, decimal_places=6, null=True, blank=True)
+    data_carga = models.DateTimeField(auto_now_add=True, db_default=Now())
     fonte = models.CharField(max_length=20, default='B3')
 
     class Meta:
         db_table = 'b3_trade_information'
         verbose_name = 'B3 Informação de Negociação'
         verbose_name_plural = 'B3 Informações de Negociação'
+        constraints = [
+            # Chave natural usada pelo upsert da carga; tipreg separa pregão regular e after-hours
+            models.UniqueConstraint(fields=['codinst', 'datref', 'tipreg'], name='b3trade_codinst_datref_tipreg_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.codinst} - {self.datref}"
@@ -480,6 +496,10 @@ class AtivosPrecos(models.Model):
         db_table = 'organizesee_ativosprecos'
         verbose_name = 'Preços de Ativos'
         verbose_name_plural = 'Preços de Ativos'
+        constraints = [
+            # Chave natural usada pelo upsert das rotinas de carga (reprocessar não duplica)
+            models.UniqueConstraint(fields=['ticker', 'data', 'fonte'], name='ativosprecos_ticker_data_fonte_uniq'),
+        ]
 
     def __str__(self):
         return f"{self.ticker} - {self.data} - {self.close}"
@@ -997,6 +1017,135 @@ class RegistroExecucao(models.Model):
         return None
 
 
+class CheckpointCarga(models.Model):
+    """Ponto de retomada da carga de um arquivo, gravado na mesma transação de cada lote"""
+
+    # Identificação do arquivo (nome + tamanho: um arquivo substituído não reaproveita o checkpoint)
+    arquivo = models.CharField(max_length=255, help_text="Nome do arquivo em carga")
+    tamanho_bytes = models.BigIntegerField(help_text="Tamanho do arquivo em bytes")
+    tabela_destino = models.CharField(max_length=255, help_text="Tabela destino dos dados carregados")
+
+    # Posição do último lote confirmado
+    offset_bytes = models.BigIntegerField(default=0, help_text="Posição em bytes logo após o último lote confirmado")
+    linhas_processadas = models.IntegerField(default=0, help_text="Linhas do arquivo lidas até o checkpoint")
+    lotes_confirmados = models.IntegerField(default=0, help_text="Quantidade de lotes já gravados")
+
+    # Contadores acumulados até o checkpoint
+    linhas_inseridas = models.IntegerField(default=0)
+    linhas_atualizadas = models.IntegerField(default=0)
+    linhas_rejeitadas = models.IntegerField(default=0)
+    data_dos_dados = models.DateField(null=True, blank=True, help_text="Primeira data válida encontrada")
+
+    registro_execucao = models.ForeignKey(
+        RegistroExecucao, on_delete=models.SET_NULL, null=True, blank=True,
+        help_text="Execução que gravou o último checkpoint"
+    )
+
+    # Auditoria
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rotinas_automaticas_checkpoint_carga'
+        verbose_name = 'Checkpoint de Carga'
+        verbose_name_plural = 'Checkpoints de Carga'
+        unique_together = ['arquivo', 'tamanho_bytes', 'tabela_destino']
+
+    def __str__(self):
+        return f"{self.arquivo} - {self.lotes_confirmados} lotes - offset {self.offset_bytes}"
+
+
+class ArquivoCarregado(models.Model):
+    """Ledger de arquivos já carregados, identificados pelo SHA-256 do conteúdo"""
+
+    sha256 = models.CharField(max_length=64, db_index=True, help_text="SHA-256 do conteúdo do arquivo")
+    arquivo = models.CharField(max_length=255, help_text="Nome do arquivo carregado")
+    tamanho_bytes = models.BigIntegerField(help_text="Tamanho do arquivo em bytes")
+    modificado_em = models.DateTimeField(null=True, blank=True, help_text="Data de modificação (mtime) do arquivo")
+    data_referencia = models.DateField(null=True, blank=True, help_text="Data dos dados do arquivo")
+    tabela_destino = models.CharField(max_length=255, help_text="Tabela destino dos dados carregados")
+    linhas_carregadas = models.IntegerField(default=0, help_text="Linhas aceitas e gravadas na carga")
+    carregado_em = models.DateTimeField(auto_now_add=True, help_text="Data e hora da carga")
+
+    class Meta:
+        db_table = 'rotinas_automaticas_arquivo_carregado'
+        verbose_name = 'Arquivo Carregado'
+        verbose_name_plural = 'Arquivos Carregados'
+        ordering = ['-carregado_em']
+        unique_together = ['sha256', 'tabela_destino']
+
+    def __str__(self):
+        return f"{self.arquivo} - {self.tabela_destino} - {self.carregado_em}"
+
+
+class CacheDownload(models.Model):
+    """Validadores HTTP do último download de cada URL (CVM) ou arquivo/data (B3)"""
+
+    chave = models.CharField(max_length=500, unique=True, help_text="URL ou 'b3:<fileName>:<data>'")
+    url = models.CharField(max_length=500, blank=True, help_text="URL do último download")
+    etag = models.CharField(max_length=255, blank=True, help_text="Cabeçalho ETag da resposta")
+    last_modified = models.CharField(max_length=255, blank=True, help_text="Cabeçalho Last-Modified da resposta")
+    tamanho_bytes = models.BigIntegerField(null=True, blank=True, help_text="Content-Length (ou bytes recebidos)")
+    nome_arquivo = models.CharField(max_length=255, blank=True, help_text="Nome do arquivo salvo")
+    sha256 = models.CharField(max_length=64, blank=True, help_text="SHA-256 do conteúdo baixado")
+    acertos = models.IntegerField(default=0, help_text="Downloads evitados pelo cache")
+    downloads = models.IntegerField(default=0, help_text="Downloads completos")
+    baixado_em = models.DateTimeField(null=True, blank=True, help_text="Último download completo")
+    verificado_em = models.DateTimeField(auto_now=True, help_text="Última verificação")
+
+    class Meta:
+        db_table = 'rotinas_automaticas_cache_download'
+        verbose_name = 'Cache de Download'
+        verbose_name_plural = 'Cache de Downloads'
+        ordering = ['-verificado_em']
+
+    def __str__(self):
+        return f"{self.chave} - {self.etag or self.last_modified or self.tamanho_bytes}"
+
+
+class BackfillB3(models.Model):
+    """Carga histórica dos arquivos da B3 em um intervalo de datas, com progresso retomável"""
+
+    STATUS_CHOICES = [
+        ('PENDENTE', 'Pendente'),
+        ('EXECUTANDO', 'Executando'),
+        ('CONCLUIDO', 'Concluído'),
+        ('ERRO', 'Erro'),
+    ]
+
+    data_inicio = models.DateField(help_text="Primeira data do intervalo")
+    data_fim = models.DateField(help_text="Última data do intervalo")
+    arquivos = models.JSONField(default=list, help_text="Tipos de arquivo da B3 (fileName)")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDENTE')
+
+    # Progresso da execução atual (os pares já carregados ficam fora do plano)
+    total_pares = models.IntegerField(default=0, help_text="Pares (data, arquivo) planejados nesta execução")
+    pares_concluidos = models.IntegerField(default=0)
+    pares_com_erro = models.IntegerField(default=0)
+    pares_ja_carregados = models.IntegerField(default=0, help_text="Pares do intervalo já no ledger")
+    pares_indisponiveis = models.JSONField(default=list, help_text="'data:arquivo' sem arquivo na B3 (feriados)")
+    linhas_carregadas = models.BigIntegerField(default=0)
+    pares_por_minuto = models.FloatField(default=0.0)
+    linhas_por_segundo = models.FloatField(default=0.0)
+    previsao_termino = models.DateTimeField(null=True, blank=True)
+    erro_detalhes = models.TextField(blank=True)
+
+    # Auditoria
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    finalizado_em = models.DateTimeField(null=True, blank=True)
+    criado_em = models.DateTimeField(auto_now_add=True)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rotinas_automaticas_backfill_b3'
+        verbose_name = 'Backfill B3'
+        verbose_name_plural = 'Backfills B3'
+        ordering = ['-criado_em']
+
+    def __str__(self):
+        return f"{self.data_inicio} a {self.data_fim} - {self.status} ({self.pares_concluidos}/{self.total_pares})"
+
+
 # ================== TABELAS SCHEDULER AVANÇADO ==================
 
 class GrupoDiasExecucao(models.Model):
@@ -1006,7 +1155,8 @@ class GrupoDiasExecucao(models.Model):
         ('DIARIO', 'Diário (Segunda a Domingo)'),
         ('DIAS_SEMANA', 'Dias de Semana (Segunda a Sexta)'),
         ('FINAL_SEMANA', 'Final de Semana (Sábado e Domingo)'),
-        ('D_MAIS_1', 'D+1 (Terça a Sábado)'),
+        ('D_MAIS_1', 'D+1 (Dia seguinte a um pregão da B3)'),
+        ('PREGAO_B3', 'Dias de Pregão da B3'),
         ('PERSONALIZADO', 'Personalizado'),
     ]
     
@@ -1135,6 +1285,7 @@ class FilaExecucao(models.Model):
     iniciado_em = models.DateTimeField(null=True, blank=True)
     finalizado_em = models.DateTimeField(null=True, blank=True)
     duracao_segundos = models.IntegerField(null=True, blank=True)
+    atraso_despacho_segundos = models.FloatField(null=True, blank=True, help_text="Início real menos o horário planejado")
     
     # Recovery e tentativas
     tentativa_atual = models.IntegerField(default=1)
@@ -1249,3 +1400,24 @@ class LogScheduler(models.Model):
     
     def __str__(self):
         return f"[{self.nivel}] {self.componente} - {self.mensagem[:100]}"
+
+
+class LiderancaScheduler(models.Model):
+    """Líder do cluster que executa o monitor do scheduler (advisory lock + lease)"""
+    
+    nome = models.CharField(max_length=100, unique=True, help_text="Papel disputado (ex.: monitor_scheduler)")
+    identidade = models.CharField(max_length=200, help_text="Processo líder (dyno/host:pid)")
+    backend_pid = models.IntegerField(null=True, blank=True, help_text="PID da sessão do PostgreSQL que detém o lock")
+    
+    # Lease renovado a cada heartbeat
+    assumido_em = models.DateTimeField(null=True, blank=True)
+    heartbeat_em = models.DateTimeField(null=True, blank=True)
+    lease_expira_em = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        db_table = 'rotinas_automaticas_lideranca_scheduler'
+        verbose_name = 'Liderança do Scheduler'
+        verbose_name_plural = 'Liderança do Scheduler'
+    
+    def __str__(self):
+        return f"{self.nome} - {self.identidade}"
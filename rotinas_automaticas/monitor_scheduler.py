@@ -16,6 +16,7 @@ import sys
 import time
 import threading
 import schedule
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import pytz
 import logging
@@ -37,38 +38,96 @@ logger = logging.getLogger('scheduler_monitor')
 # Aumentar nível de log para DEBUG durante desenvolvimento
 logger.setLevel(logging.DEBUG)
 
+# Espera máxima pela saída do loop do monitor ao parar (a espera no LISTEN é interrompida)
+ESPERA_PARADA_SEGUNDOS = 30
+
+
 class SchedulerMonitor:
     """Monitor do sistema de scheduler"""
     
     def __init__(self):
         self.running = False
         self.thread = None
+        # Parada do loop atual e reinício pedido de dentro do próprio loop
+        self.parar_evento = threading.Event()
+        self.reinicio_pendente = False
+        self.trava_ciclo = threading.Lock()
         self.ultima_execucao_scheduler = None
         self.ultima_renovacao_diaria = None
         self.inicio_monitor = None
         self.ultima_verificacao_bem_sucedida = None
         
+        # 'notificacao' (LISTEN/NOTIFY) ou 'polling' (a cada 5 segundos)
+        self.modo = getattr(settings, 'SCHEDULER_MONITOR_MODO', 'notificacao')
+        self.ouvinte = None
+        self.temporizador = None
+        self.pools_despacho = {}
+        self.despertares = 0
+        self.notificacoes_recebidas = 0
+        
     def start(self):
-        """Inicia o monitor"""
-        if self.running:
-            return
+        """Inicia o monitor (só depois que o loop anterior tiver saído); retorna se iniciou"""
+        with self.trava_ciclo:
+            if self.running:
+                return False
             
-        self.running = True
-        self.inicio_monitor = datetime.now(BRAZIL_TZ)
-        self.thread = threading.Thread(target=self._run_monitor, daemon=True)
-        self.thread.start()
-        
-        # Agendar tarefas
-        self._agendar_tarefas()
+            anterior = self.thread
+            if anterior is not None and anterior.is_alive() and anterior is not threading.current_thread():
+                anterior.join(timeout=ESPERA_PARADA_SEGUNDOS)
+                if anterior.is_alive():
+                    logger.error("❌ Loop anterior do monitor ainda não terminou; novo início cancelado")
+                    return False
+            
+            self.running = True
+            self.inicio_monitor = datetime.now(BRAZIL_TZ)
+            self.reinicio_pendente = False
+            self.parar_evento = threading.Event()
+            self.thread = threading.Thread(target=self._run_monitor, args=(self.parar_evento,), daemon=True)
+            self.thread.start()
         
         logger.info("🔄 Monitor do scheduler iniciado")
+        return True
         
     def stop(self):
-        """Para o monitor"""
+        """Para o monitor: sinaliza o loop, interrompe a espera no LISTEN e aguarda a saída"""
         self.running = False
-        if self.thread:
-            self.thread.join(timeout=5)
+        self._sinalizar_parada()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=ESPERA_PARADA_SEGUNDOS)
+            if self.thread.is_alive():
+                logger.warning(f"⚠️ Loop do monitor não terminou em {ESPERA_PARADA_SEGUNDOS}s; sairá ao fim da operação atual")
         logger.info("🛑 Monitor do scheduler parado")
+    
+    def _sinalizar_parada(self):
+        """Pede a saída do loop atual (seguro a partir de qualquer thread)"""
+        self.parar_evento.set()
+        ouvinte = self.ouvinte
+        if ouvinte is not None:
+            ouvinte.despertar()
+    
+    def _preparar_execucao(self):
+        """Estado de uma execução do loop, criado na própria thread do monitor"""
+        self.inicio_monitor = datetime.now(BRAZIL_TZ)
+        if self.modo == 'notificacao':
+            from rotinas_automaticas.notificacoes_fila import OuvinteFila
+            from rotinas_automaticas.temporizador_fila import TemporizadorFila
+            self.ouvinte = OuvinteFila()
+            # Temporizador e pools de despacho também são desta execução: nada é
+            # reaproveitado por um loop seguinte
+            self.temporizador = TemporizadorFila()
+            self.pools_despacho = {}
+        self._agendar_tarefas()
+    
+    def _encerrar_execucao(self):
+        """Libera o estado da execução na thread dona (a conexão do LISTEN é dela)"""
+        ouvinte, self.ouvinte = self.ouvinte, None
+        if ouvinte is not None:
+            ouvinte.encerrar()
+        # Itens já despachados terminam de executar; nenhum item novo entra nos pools
+        pools, self.pools_despacho = self.pools_despacho, {}
+        for pool in pools.values():
+            pool.shutdown(wait=False)
+        schedule.clear()
         
     def verificar_saude_externa(self):
         """Método para verificar a saúde do monitor a partir de uma chamada externa (view, cron, etc)"""
@@ -80,7 +139,8 @@ class SchedulerMonitor:
             try:
                 self.stop()
                 time.sleep(2)
-                self.start()
+                if not self.start():
+                    return {"status": "erro", "mensagem": "Loop anterior do monitor não terminou; reinício cancelado"}
                 return {"status": "reiniciado", "mensagem": "Monitor não estava rodando e foi reiniciado"}
             except Exception as e:
                 logger.critical(f"❌ Falha ao reiniciar o monitor: {e}", exc_info=True)
@@ -96,7 +156,8 @@ class SchedulerMonitor:
                 try:
                     self.stop()
                     time.sleep(2)
-                    self.start()
+                    if not self.start():
+                        return {"status": "erro", "mensagem": "Loop anterior do monitor não terminou; reinício cancelado"}
                     return {"status": "reiniciado", "mensagem": f"Monitor estava travado há {tempo_sem_atualizacao:.1f} minutos e foi reiniciado"}
                 except Exception as e:
                     logger.critical(f"❌ Falha ao reiniciar o monitor após inatividade: {e}", exc_info=True)
@@ -112,7 +173,8 @@ class SchedulerMonitor:
                 try:
                     self.stop()
                     time.sleep(2)
-                    self.start()
+                    if not self.start():
+                        return {"status": "erro", "mensagem": "Loop anterior do monitor não terminou; reinício cancelado"}
                     return {"status": "reiniciado", "mensagem": f"Monitor sem verificação bem-sucedida desde o início há {tempo_desde_inicio:.1f} minutos e foi reiniciado"}
                 except Exception as e:
                     logger.critical(f"❌ Falha ao reiniciar o monitor após inatividade desde o início: {e}", exc_info=True)
@@ -130,12 +192,20 @@ class SchedulerMonitor:
         
     def _agendar_tarefas(self):
         """Agenda tarefas recorrentes"""
+        # Um reinício do monitor (ou nova liderança) não duplica as tarefas
+        schedule.clear()
         
         # Renovação diária às 00:01
         schedule.every().day.at("00:01").do(self._renovar_carga_diaria)
         
-        # Execução do scheduler a cada minuto para garantir execuções precisas
-        schedule.every(1).minutes.do(self._executar_scheduler_se_necessario)
+        if self.modo == 'notificacao':
+            # Itens são despachados pelo temporizador ao vencerem; a varredura recarrega
+            # o temporizador para cobrir notificações perdidas (ex.: queda da conexão do LISTEN)
+            varredura_minutos = getattr(settings, 'SCHEDULER_VARREDURA_MINUTOS', 15)
+            schedule.every(varredura_minutos).minutes.do(self._recarregar_temporizador)
+        else:
+            # Execução do scheduler a cada minuto para garantir execuções precisas
+            schedule.every(1).minutes.do(self._executar_scheduler_se_necessario)
         
         # Verificação de saúde a cada hora
         schedule.every().hour.do(self._verificar_saude_sistema)
@@ -143,19 +213,37 @@ class SchedulerMonitor:
         # Verificação de rotinas travadas a cada 30 minutos
         schedule.every(30).minutes.do(self._verificar_rotinas_travadas)
         
-        logger.info("📅 Tarefas agendadas:")
+        logger.info(f"📅 Tarefas agendadas (modo {self.modo}):")
         logger.info("   - Renovação diária: 00:01")
-        logger.info("   - Scheduler: a cada 1 minuto")
+        if self.modo == 'notificacao':
+            logger.info(f"   - Scheduler: temporizador da fila + notificações, recarga a cada {varredura_minutos} minutos")
+        else:
+            logger.info("   - Scheduler: a cada 1 minuto")
         logger.info("   - Verificação saúde: a cada hora")
         logger.info("   - Verificação rotinas travadas: a cada 30 minutos")
         
-    def _run_monitor(self):
-        """Loop principal do monitor"""
+    def _run_monitor(self, parar_evento):
+        """Loop principal do monitor (uma execução por start, até parar_evento)"""
+        try:
+            self._preparar_execucao()
+            self._loop_monitor(parar_evento)
+        finally:
+            self._encerrar_execucao()
+    
+    def _loop_monitor(self, parar_evento):
         ultima_verificacao = datetime.now(BRAZIL_TZ)
         falhas_consecutivas = 0
         
-        while self.running:
+        while not parar_evento.is_set():
             try:
+                # Reinício pedido pelo próprio loop (falhas seguidas, reinício preventivo):
+                # refaz o estado da execução nesta thread, sem outra thread em paralelo
+                if self.reinicio_pendente:
+                    self.reinicio_pendente = False
+                    self._encerrar_execucao()
+                    self._preparar_execucao()
+                    logger.info("✅ Monitor reiniciado")
+                
                 # Fechar conexões antigas para evitar problemas - com tratamento de erro
                 try:
                     # Tentar usar o método da classe primeiro
@@ -170,15 +258,21 @@ class SchedulerMonitor:
                 
                 # Executar tarefas agendadas
                 schedule.run_pending()
+                if parar_evento.is_set():
+                    break
                 
-                # Verificar se há rotinas que deveriam ser executadas neste minuto exato
-                # para evitar perder execuções devido ao ciclo de sleep
-                self._verificar_execucoes_imediatas()
+                if self.modo == 'notificacao':
+                    # Itens vencidos vão para o executor em background
+                    self._despachar_vencidos()
+                else:
+                    # Verificar se há rotinas que deveriam ser executadas neste minuto exato
+                    # para evitar perder execuções devido ao ciclo de sleep
+                    self._verificar_execucoes_imediatas()
                 
                 # Registrar tempo de verificação para métricas de desempenho
                 agora = datetime.now(BRAZIL_TZ)
                 delta = (agora - ultima_verificacao).total_seconds()
-                if delta > 15:  # Se passou mais de 15 segundos entre verificações
+                if self.modo != 'notificacao' and delta > 15:  # Se passou mais de 15 segundos entre verificações
                     logger.warning(f"⚠️ Atraso de {delta:.1f}s entre verificações do monitor")
                 ultima_verificacao = agora
                 
@@ -190,8 +284,8 @@ class SchedulerMonitor:
                 # Registrar última verificação bem-sucedida para health check
                 self.ultima_verificacao_bem_sucedida = datetime.now(BRAZIL_TZ)
                 
-                # Sleep mais curto para garantir execução próxima ao horário exato
-                time.sleep(5)  # Verificar a cada 5 segundos para maior precisão
+                # Aguardar notificação da fila ou o próximo vencimento (polling: 5 segundos)
+                self._aguardar_proximo_evento()
                 
             except (ConnectionError, InterfaceError, OperationalError) as e:
                 falhas_consecutivas += 1
@@ -200,27 +294,108 @@ class SchedulerMonitor:
                 # Aumentar tempo de espera com backoff exponencial limitado
                 wait_time = min(15 * (2 ** (falhas_consecutivas - 1)), 300)  # Máximo 5 minutos
                 logger.info(f"Aguardando {wait_time}s antes de tentar novamente...")
-                time.sleep(wait_time)
+                parar_evento.wait(wait_time)
             
             except Exception as e:
                 # Capturar qualquer outra exceção para garantir que o monitor continue rodando
                 falhas_consecutivas += 1
                 logger.error(f"Erro inesperado no monitor: {e} (Falha #{falhas_consecutivas})", exc_info=True)
-                time.sleep(10)  # Aguardar um tempo padrão
+                parar_evento.wait(10)  # Aguardar um tempo padrão
                 
-                # Se houver muitas falhas consecutivas, tentar reiniciar o monitor
+                # Se houver muitas falhas consecutivas, reiniciar o monitor no próximo ciclo
                 if falhas_consecutivas >= 10:
-                    logger.critical(f"⚠️ ALERTA: {falhas_consecutivas} falhas consecutivas. Tentando reiniciar o monitor...")
-                    try:
-                        # Tentar reiniciar o thread do monitor
-                        self.stop()
-                        time.sleep(5)
-                        self.start()
-                        logger.info("✅ Monitor reiniciado com sucesso após falhas consecutivas")
-                        falhas_consecutivas = 0
-                    except Exception as restart_error:
-                        logger.critical(f"❌ Falha ao tentar reiniciar o monitor: {restart_error}", exc_info=True)
+                    logger.critical(f"⚠️ ALERTA: {falhas_consecutivas} falhas consecutivas. Reiniciando o monitor...")
+                    self.reinicio_pendente = True
+                    falhas_consecutivas = 0
                 
+    def _aguardar_proximo_evento(self):
+        """Bloqueia no LISTEN da fila até uma notificação, o próximo vencimento do temporizador ou a próxima tarefa agendada"""
+        # Parada pedida antes do ouvinte existir não chegou a despertá-lo
+        if self.parar_evento.is_set():
+            return
+        
+        if self.modo != 'notificacao':
+            # Sleep mais curto para garantir execução próxima ao horário exato
+            self.parar_evento.wait(5)  # Verificar a cada 5 segundos para maior precisão
+            return
+        
+        espera = getattr(settings, 'SCHEDULER_ESPERA_MAXIMA_SEGUNDOS', 300)
+        proximo_item = self.temporizador.segundos_ate_proximo()
+        if proximo_item is not None:
+            espera = min(espera, proximo_item)
+        proxima_tarefa = schedule.idle_seconds()
+        if proxima_tarefa is not None:
+            espera = min(espera, max(proxima_tarefa, 0))
+        
+        try:
+            notificacoes = self.ouvinte.aguardar(espera)
+        except Exception as e:
+            # Sem LISTEN, notificações podem ter se perdido: recarregar o temporizador ao reconectar
+            logger.warning(f"Falha ao escutar notificações da fila: {e}. Tentando de novo em 5s")
+            self.temporizador.invalidar()
+            self.parar_evento.wait(5)
+            return
+        
+        self.despertares += 1
+        self.notificacoes_recebidas += len(notificacoes)
+        for notificacao in notificacoes:
+            self.temporizador.aplicar_notificacao(notificacao)
+        if notificacoes:
+            logger.debug(f"🔔 {len(notificacoes)} notificação(ões) da fila: {[n.get('id') for n in notificacoes]}")
+    
+    def _recarregar_temporizador(self):
+        """Varredura periódica do modo notificação: recarrega o temporizador da fila"""
+        self.temporizador.invalidar()
+    
+    def _despachar_vencidos(self):
+        """Modo notificação: despacha pelo id os itens vencidos no temporizador"""
+        if self.temporizador.carregado_em is None:
+            # LISTEN antes da carga: o que for inserido durante a carga chega como notificação
+            self.ouvinte.garantir_conexao()
+            total = self.temporizador.recarregar()
+            logger.debug(f"⏱️ Temporizador da fila carregado com {total} item(ns)")
+        
+        if self.parar_evento.is_set():
+            return  # Vencidos ficam para o temporizador da próxima execução
+        for id_item in self.temporizador.retirar_vencidos():
+            self._despachar_item(id_item)
+    
+    def _despachar_item(self, id_item):
+        """Envia o item ao pool de despacho do seu tipo de rotina"""
+        from rotinas_automaticas.models import FilaExecucao
+        
+        item = FilaExecucao.objects.select_related('scheduler_rotina__rotina_definicao').filter(
+            pk=id_item, status__in=['PENDENTE', 'RECOVERY']
+        ).first()
+        if item is None:
+            return  # Já executado, cancelado ou removido
+        
+        tipo = item.scheduler_rotina.tipo_rotina
+        pool = self.pools_despacho.get(tipo)
+        if pool is None:
+            workers = getattr(settings, 'SCHEDULER_WORKERS_POR_TIPO', {}).get(tipo, 1)
+            pool = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix=f'despacho-{tipo.lower()}')
+            self.pools_despacho[tipo] = pool
+        pool.submit(self._executar_item_em_thread, item)
+    
+    def _executar_item_em_thread(self, item):
+        """Worker do pool de despacho: executa o item (reivindicação atômica no executor)"""
+        from django.db import connections
+        from rotinas_automaticas.scheduler_services import ExecutorRotinas
+        
+        try:
+            resultado = ExecutorRotinas()._executar_rotina(item)
+            if resultado.get('reivindicado_por_outro'):
+                return
+            self.ultima_execucao_scheduler = datetime.now(BRAZIL_TZ)
+            status = "✅ Sucesso" if resultado['sucesso'] else "❌ Erro"
+            logger.info(f"{status} no despacho: {item.scheduler_rotina.rotina_definicao.nome_exibicao} "
+                        f"(atraso de {item.atraso_despacho_segundos or 0:.2f}s)")
+        except Exception as e:
+            logger.error(f"Erro no despacho do item {item.pk}: {e}", exc_info=True)
+        finally:
+            connections.close_all()
+    
     def _renovar_carga_diaria(self):
         """Executa renovação diária às 00:01"""
         try:
@@ -403,10 +578,14 @@ class SchedulerMonitor:
                     from rotinas_automaticas.scheduler_services import ExecutorRotinas
                     executor = ExecutorRotinas()
                     
-                    # Executar cada rotina individualmente para garantir execução
+                    # Executar cada rotina individualmente; a reivindicação atômica garante
+                    # que o item não roda de novo se o ciclo do minuto (ou outro worker) já o pegou
                     for item in rotinas_do_minuto:
                         try:
                             resultado = executor._executar_rotina(item)
+                            if resultado.get("reivindicado_por_outro"):
+                                logger.info(f"⏭️ Já em execução por outro executor: {item.scheduler_rotina.rotina_definicao.nome_exibicao}")
+                                continue
                             status = "✅ Sucesso" if resultado["sucesso"] else "❌ Erro"
                             logger.info(f"{status} na execução imediata: {item.scheduler_rotina.rotina_definicao.nome_exibicao}")
                         except Exception as e:
@@ -440,17 +619,13 @@ class SchedulerMonitor:
             # Forçar reinício a cada 24 horas para garantir limpeza de recursos
             if tempo_execucao > 24:
                 logger.warning(f"🔄 Monitor executando há {tempo_execucao:.1f} horas. Realizando reinicialização preventiva...")
-                try:
-                    self.stop()
-                    time.sleep(5)
-                    self.start()
-                    logger.info("✅ Monitor reiniciado preventivamente com sucesso")
-                    return
-                except Exception as restart_error:
-                    logger.error(f"❌ Falha ao tentar reinício preventivo do monitor: {restart_error}", exc_info=True)
+                # O loop refaz o estado no próximo ciclo (esta verificação roda dentro dele)
+                self.reinicio_pendente = True
+                return
             
             from rotinas_automaticas.models import FilaExecucao, CargaDiariaRotinas, SchedulerRotina
             from django.db import connection
+            from django.db.models import Avg, Max
             from django.db.utils import InterfaceError, OperationalError
             from django.utils import timezone
             from datetime import timedelta
@@ -478,6 +653,11 @@ class SchedulerMonitor:
                 # Rotinas ativas
                 rotinas_ativas = SchedulerRotina.objects.filter(executar=True).count()
                 
+                # Atraso de despacho de hoje (início real menos horário planejado)
+                atraso = FilaExecucao.objects.filter(
+                    data_execucao=agora.date(), atraso_despacho_segundos__isnull=False
+                ).aggregate(medio=Avg('atraso_despacho_segundos'), maximo=Max('atraso_despacho_segundos'))
+                
                 # Verificar conexões do banco
                 conexoes_abertas = len(connection.connection.notices) if hasattr(connection, 'connection') and hasattr(connection.connection, 'notices') else 0
                 
@@ -485,6 +665,8 @@ class SchedulerMonitor:
                 logger.info(f"   Fila: {total_fila} total, {pendentes} pendentes, {executando} executando, {erros} erros, {recovery} recovery")
                 logger.info(f"   Carga hoje: {'✅' if carga_hoje else '❌'}")
                 logger.info(f"   Rotinas ativas: {rotinas_ativas}")
+                if atraso['medio'] is not None:
+                    logger.info(f"   Atraso de despacho hoje: médio {atraso['medio']:.2f}s, máximo {atraso['maximo']:.2f}s")
                 logger.info(f"   Monitor ativo há: {(agora - self.ultima_renovacao_diaria).total_seconds() / 3600:.1f} horas" if self.ultima_renovacao_diaria else "   Monitor iniciado recentemente")
                 
                 # Alertas
@@ -552,6 +734,13 @@ def iniciar_monitor():
     global monitor_global
     
     from django.db import close_old_connections
+    from rotinas_automaticas.lideranca_scheduler import pode_executar_monitor
+    
+    # Só o líder do cluster roda o monitor
+    if not pode_executar_monitor():
+        logger.info("ℹ️ Processo seguidor: o monitor fica com o líder do cluster")
+        return False
+    
     # Garantir que todas as conexões antigas estão fechadas antes de iniciar o monitor
     close_old_connections()
     
@@ -559,7 +748,9 @@ def iniciar_monitor():
         monitor_global = SchedulerMonitor()
         
     if not monitor_global.running:
-        monitor_global.start()
+        if not monitor_global.start():
+            logger.error("❌ Monitor de rotinas não iniciado: loop anterior ainda em execução")
+            return False
         logger.info("🚀 Monitor de rotinas iniciado com sucesso")
         return True
     logger.info("ℹ️ Monitor de rotinas já está em execução")
@@ -580,6 +771,15 @@ def parar_monitor():
 def verificar_saude_monitor():
     """Verifica saúde do monitor e reinicia automaticamente se necessário"""
     global monitor_global
+    from rotinas_automaticas.lideranca_scheduler import pode_executar_monitor, status_lideranca
+    
+    # Seguidores não rodam o monitor: a saúde é a do líder
+    if not pode_executar_monitor():
+        return {
+            "status": "seguidor",
+            "mensagem": "Processo seguidor; o monitor roda no líder do cluster",
+            "lideranca": status_lideranca()
+        }
     
     # Se o monitor não existe, inicializá-lo
     if monitor_global is None:
@@ -615,7 +815,11 @@ def status_monitor():
     """Retorna status do monitor"""
     global monitor_global
     
+    from rotinas_automaticas.lideranca_scheduler import status_lideranca
+    
     if monitor_global and monitor_global.running:
+        from rotinas_automaticas.scheduler_services import CONTADORES_DESPACHO
+        
         agora = datetime.now(BRAZIL_TZ)
         tempo_desde_ultima_exec = None
         tempo_desde_renovacao = None
@@ -639,6 +843,12 @@ def status_monitor():
             'tempo_desde_renovacao_horas': tempo_desde_renovacao,
             'inicio_monitor': monitor_global.inicio_monitor,
             'ultima_verificacao_bem_sucedida': monitor_global.ultima_verificacao_bem_sucedida,
-            'tempo_desde_ultima_verificacao_min': tempo_desde_ultima_verificacao
+            'tempo_desde_ultima_verificacao_min': tempo_desde_ultima_verificacao,
+            'despacho': CONTADORES_DESPACHO.como_dict(),
+            'modo': monitor_global.modo,
+            'despertares': monitor_global.despertares,
+            'notificacoes_recebidas': monitor_global.notificacoes_recebidas,
+            'temporizador': monitor_global.temporizador.status() if monitor_global.temporizador else None,
+            'lideranca': status_lideranca()
         }
-    return {'ativo': False}
+    return {'ativo': False, 'lideranca': status_lideranca()}
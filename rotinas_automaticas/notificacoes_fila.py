@@ -0,0 +1,127 @@
+"""
+Notificações da Fila de Execução
+================================
+
+Despertar do monitor por eventos em vez de polling:
+- A trigger da FilaExecucao (migração 0015) faz NOTIFY no canal fila_execucao
+  quando um item fica PENDENTE ou RECOVERY (inserido, reagendado, recovery),
+  com id, status, data e horário do item no payload
+- OuvinteFila escuta o canal (LISTEN) em uma conexão dedicada e bloqueia até
+  uma notificação chegar ou o tempo limite (próximo vencimento) passar
+- despertar() interrompe a espera a partir de outra thread (pipe no mesmo
+  select); a conexão só é usada e fechada pela thread dona do ouvinte
+- Os payloads alimentam o temporizador da fila (temporizador_fila)
+
+Uso:
+    ouvinte = OuvinteFila()
+    notificacoes = ouvinte.aguardar(temporizador.segundos_ate_proximo() or 300)
+    ouvinte.despertar()  # de outra thread, ex.: parada do monitor
+    ouvinte.encerrar()   # na thread dona, ao final
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import json
+import select
+import logging
+import threading
+
+from django.db import connections
+
+logger = logging.getLogger('scheduler_notificacoes')
+
+CANAL_FILA = 'fila_execucao'
+
+
+class OuvinteFila:
+    """LISTEN no canal da fila em uma conexão dedicada (fora do ciclo de close_old_connections)"""
+
+    def __init__(self, canal=CANAL_FILA):
+        self.canal = canal
+        self.conexao = None
+        # Pipe de despertar: outra thread interrompe o select sem tocar na conexão
+        self.leitura_despertar, self.escrita_despertar = os.pipe()
+        os.set_blocking(self.leitura_despertar, False)
+        os.set_blocking(self.escrita_despertar, False)
+        self.trava_despertar = threading.Lock()
+
+    def _conectar(self):
+        self.conexao = connections.create_connection('default')
+        self.conexao.ensure_connection()
+        self.conexao.set_autocommit(True)
+        with self.conexao.cursor() as cursor:
+            cursor.execute(f'LISTEN {self.canal}')
+        logger.info(f"👂 Escutando notificações do canal {self.canal}")
+
+    def garantir_conexao(self):
+        """Conecta e inicia o LISTEN, se ainda não estiver escutando"""
+        try:
+            if self.conexao is None:
+                self._conectar()
+        except Exception:
+            self.fechar()
+            raise
+
+    def aguardar(self, timeout):
+        """Bloqueia até chegar notificação ou passar o timeout; retorna os payloads recebidos
+
+        Uma falha de conexão fecha a conexão e é repassada; a próxima chamada reconecta.
+        """
+        try:
+            if self.conexao is None:
+                self._conectar()
+            bruta = self.conexao.connection
+            if not bruta.notifies:
+                prontos, _, _ = select.select([bruta, self.leitura_despertar], [], [], max(timeout, 0))
+                if self.leitura_despertar in prontos:
+                    self._esvaziar_despertar()
+            bruta.poll()
+            notificacoes = []
+            while bruta.notifies:
+                notificacao = bruta.notifies.pop(0)
+                try:
+                    notificacoes.append(json.loads(notificacao.payload))
+                except ValueError:
+                    notificacoes.append({'payload': notificacao.payload})
+            return notificacoes
+        except Exception:
+            self.fechar()
+            raise
+
+    def despertar(self):
+        """Interrompe o aguardar em andamento (ou o próximo); seguro a partir de qualquer thread"""
+        with self.trava_despertar:
+            if self.escrita_despertar is None:
+                return
+            try:
+                os.write(self.escrita_despertar, b'\0')
+            except BlockingIOError:
+                pass  # Pipe cheio: o despertar já está pendente
+
+    def _esvaziar_despertar(self):
+        try:
+            while os.read(self.leitura_despertar, 512):
+                pass
+        except BlockingIOError:
+            pass
+
+    def encerrar(self):
+        """Fecha a conexão e o pipe de despertar (na thread dona do ouvinte)"""
+        self.fechar()
+        with self.trava_despertar:
+            if self.escrita_despertar is not None:
+                os.close(self.escrita_despertar)
+                os.close(self.leitura_despertar)
+                self.escrita_despertar = self.leitura_despertar = None
+
+    def fechar(self):
+        """Fecha só a conexão do LISTEN; a próxima espera reconecta"""
+        if self.conexao is not None:
+            try:
+                self.conexao.close()
+            except Exception as e:
+                logger.warning(f"Erro ao fechar a conexão do LISTEN: {e}")
+            self.conexao = None
+
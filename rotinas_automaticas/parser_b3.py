@@ -0,0 +1,268 @@
+"""
+Parser Vetorizado - B3 TradeInformationConsolidatedFile
+=======================================================
+
+Converte o arquivo TradeInformationConsolidatedFile da B3 em blocos colunares
+(arrays NumPy), sem o parse linha a linha com Decimal:
+- Leitura em blocos de bytes, com o offset final de cada bloco
+- Split do bloco inteiro de uma vez e separação por coluna
+- Filtro de MaxPric vazio, conversão de datas e classificação FII/Ação
+  como operações de array (busca binária na referência ordenada)
+- Validação numérica vetorizada, preservando o texto decimal original para
+  não perder precisão nas colunas numeric do banco
+
+Requer NumPy; sem ele, numpy_disponivel() retorna False e as rotinas usam
+o parse com csv.reader.
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import io
+from datetime import datetime
+
+# Importação condicional: sem NumPy as rotinas continuam com o parse csv.reader
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .carga_bulk import COLUNAS_ATIVOS_PRECOS
+
+# Estrutura do arquivo:
+# RptDt;TckrSymb;ISIN;SgmtNm;MinPric;MaxPric;TradAvrgPric;LastPric;OscnPctg;AdjstdQt;AdjstdQtTax;RefPric;TradQty;FinInstrmQty;NtlFinVol
+TOTAL_COLUNAS_TRADE = 15
+INDICE_RPTDT = 0
+INDICE_TICKER = 1
+INDICE_MINPRIC = 4
+INDICE_MAXPRIC = 5
+INDICE_LASTPRIC = 7
+INDICE_NTLFINVOL = 14
+
+# Tamanho aproximado de cada bloco lido do arquivo (~80 mil linhas)
+BYTES_POR_BLOCO = 8 * 1024 * 1024
+
+FORMATOS_DATA = ['%Y-%m-%d', '%d/%m/%Y', '%Y%m%d']
+
+
+def numpy_disponivel():
+    """Indica se o parser vetorizado pode ser usado"""
+    return np is not None
+
+
+def pular_cabecalho(arquivo):
+    """Posiciona o arquivo (binário) após o preâmbulo e o cabeçalho; retorna o cabeçalho ou None"""
+    for _ in range(5):
+        linha = arquivo.readline()
+        if not linha:
+            break
+        campos = linha.decode('utf-8', errors='ignore').rstrip('\r\n').split(';')
+        if campos[0].strip().lower() == 'rptdt':
+            return campos
+
+    # Sem cabeçalho reconhecido: processar desde o início
+    arquivo.seek(0)
+    return None
+
+
+def ler_blocos(caminho, bytes_por_bloco=BYTES_POR_BLOCO, offset_inicial=0):
+    """Lê o arquivo em blocos de linhas completas
+
+    Gera tuplas (linhas, offset_final), com offset_final sendo a posição em bytes
+    logo após a última linha do bloco, o que permite retomar a leitura dali.
+    """
+    with open(caminho, 'rb') as arquivo:
+        if offset_inicial:
+            arquivo.seek(offset_inicial)
+        else:
+            pular_cabecalho(arquivo)
+
+        while True:
+            linhas = arquivo.readlines(bytes_por_bloco)
+            if not linhas:
+                break
+            yield linhas, arquivo.tell()
+
+
+def montar_array_tickers(tickers):
+    """Converte um conjunto de tickers em array ordenado para pertence()"""
+    return np.array(sorted(tickers), dtype=str)
+
+
+def dividir_campos(linhas):
+    """Divide as linhas do bloco em colunas (listas de texto), com todas as linhas em TOTAL_COLUNAS_TRADE campos"""
+    texto = b''.join(linhas).decode('utf-8', errors='ignore').replace('\r', '').strip('\n')
+    if not texto:
+        return [], 0
+
+    linhas_texto = texto.split('\n')
+
+    # Caminho rápido: cada linha com exatamente TOTAL_COLUNAS_TRADE campos (o total do
+    # bloco não basta: uma linha com campo a menos e outra com campo a mais se compensam)
+    delimitadores = TOTAL_COLUNAS_TRADE - 1
+    if all(linha.count(';') == delimitadores for linha in linhas_texto):
+        return ';'.join(linhas_texto).split(';'), len(linhas_texto)
+
+    # Linhas irregulares: completar/truncar linha a linha
+    campos = []
+    total_linhas = 0
+    for linha in linhas_texto:
+        if not linha:
+            continue
+        partes = linha.split(';')[:TOTAL_COLUNAS_TRADE]
+        partes.extend([''] * (TOTAL_COLUNAS_TRADE - len(partes)))
+        campos.extend(partes)
+        total_linhas += 1
+    return campos, total_linhas
+
+
+def converter_datas(coluna):
+    """Converte a coluna RptDt em datetime64[D]; valores inválidos viram NaT"""
+    try:
+        return coluna.astype('datetime64[D]')
+    except ValueError:
+        pass
+
+    # Formatos alternativos (DD/MM/YYYY, YYYYMMDD) ou valores inválidos no bloco
+    datas = np.full(len(coluna), np.datetime64('NaT'), dtype='datetime64[D]')
+    for posicao, valor in enumerate(coluna.tolist()):
+        for formato in FORMATOS_DATA:
+            try:
+                datas[posicao] = datetime.strptime(valor, formato).date()
+                break
+            except ValueError:
+                continue
+    return datas
+
+
+def converter_decimais(coluna):
+    """Normaliza a vírgula decimal e valida a coluna; retorna (texto, invalidos)
+
+    Vazio vira '' (NULL na gravação); texto não numérico é marcado como inválido.
+    """
+    if not len(coluna):
+        return coluna, np.zeros(0, dtype=bool)
+
+    texto = np.char.replace(np.char.strip(coluna), ',', '.')
+    vazio = texto == ''
+    try:
+        valores = np.where(vazio, 'nan', texto).astype(np.float64)
+    except ValueError:
+        valores = np.array([_converter_float(valor) for valor in texto.tolist()], dtype=np.float64)
+        valores[vazio] = np.nan
+    return texto, ~vazio & ~np.isfinite(valores)
+
+
+def _converter_float(valor):
+    """Conversão individual usada quando o bloco tem valores inválidos"""
+    try:
+        return float(valor) if valor else np.nan
+    except ValueError:
+        return np.nan
+
+
+def pertence(valores, referencia):
+    """Verifica, como operação de array, quais valores estão na referência ordenada"""
+    if not len(referencia) or not len(valores):
+        return np.zeros(len(valores), dtype=bool)
+    posicoes = np.searchsorted(referencia, valores)
+    posicoes[posicoes == len(referencia)] = 0
+    return referencia[posicoes] == valores
+
+
+def parsear_bloco(linhas, tickers_fii, tickers_acao, fonte='B3'):
+    """Converte um bloco de linhas em colunas prontas para gravação em organizesee_ativosprecos
+
+    tickers_fii e tickers_acao são arrays de montar_array_tickers. Retorna um dict com
+    'colunas' (arrays na ordem de COLUNAS_ATIVOS_PRECOS, só linhas aceitas), 'total_linhas',
+    'linhas_aceitas', 'tickers_desconhecidos' e 'data_minima'.
+    """
+    campos, total_linhas = dividir_campos(linhas)
+    if not total_linhas:
+        return {'colunas': None, 'total_linhas': 0, 'linhas_aceitas': 0,
+                'tickers_desconhecidos': [], 'data_minima': None}
+
+    def coluna(indice, selecao):
+        # Arrays object são baratos de montar; a conversão para texto só ocorre nas linhas selecionadas
+        return np.array(campos[indice::TOTAL_COLUNAS_TRADE], dtype=object)[selecao].astype(str)
+
+    # Filtro barato antes de qualquer conversão: MaxPric e ticker preenchidos
+    max_pric = np.array(campos[INDICE_MAXPRIC::TOTAL_COLUNAS_TRADE], dtype=object)
+    tickers = np.array(campos[INDICE_TICKER::TOTAL_COLUNAS_TRADE], dtype=object)
+    selecao = np.flatnonzero((max_pric != '') & (tickers != ''))
+
+    tickers = np.char.upper(np.char.strip(tickers[selecao].astype(str)))
+    datas = converter_datas(np.char.strip(coluna(INDICE_RPTDT, selecao)))
+    com_max = np.char.strip(max_pric[selecao].astype(str)) != ''
+
+    # Mesma ordem de filtros do parse linha a linha: data, MaxPric, ticker, classificação, valores
+    candidatas = ~np.isnat(datas) & com_max & (tickers != '')
+    eh_fii = pertence(tickers, tickers_fii)
+    eh_acao = ~eh_fii & pertence(tickers, tickers_acao)
+    conhecidas = candidatas & (eh_fii | eh_acao)
+    tickers_desconhecidos = tickers[candidatas & ~conhecidas].tolist()
+
+    # Conversão numérica só nas linhas com ticker conhecido
+    selecao = selecao[conhecidas]
+    low, low_invalido = converter_decimais(coluna(INDICE_MINPRIC, selecao))
+    high, high_invalido = converter_decimais(coluna(INDICE_MAXPRIC, selecao))
+    close, close_invalido = converter_decimais(coluna(INDICE_LASTPRIC, selecao))
+    volume, volume_invalido = converter_decimais(coluna(INDICE_NTLFINVOL, selecao))
+    aceitas = (close != '') & ~(low_invalido | high_invalido | close_invalido | volume_invalido)
+
+    tickers_aceitos = tickers[conhecidas][aceitas]
+    colunas = {
+        'tipo': np.where(eh_fii[conhecidas][aceitas], 'FII', 'Acao'),
+        'ticker': tickers_aceitos,
+        'open': close[aceitas],  # Arquivo não tem open específico: usar LastPric, como no parse csv
+        'high': high[aceitas],
+        'low': low[aceitas],
+        'close': close[aceitas],
+        'volume': volume[aceitas],
+        'data': datas[conhecidas][aceitas],
+        'fonte': np.full(len(tickers_aceitos), fonte),
+    }
+
+    datas_aceitas = colunas['data']
+    return {
+        'colunas': [colunas[nome] for nome in COLUNAS_ATIVOS_PRECOS],
+        'total_linhas': total_linhas,
+        'linhas_aceitas': len(tickers_aceitos),
+        'tickers_desconhecidos': tickers_desconhecidos,
+        'data_minima': datas_aceitas.min().astype(object) if len(datas_aceitas) else None,
+    }
+
+
+def _colunas_texto(colunas, nulo):
+    """Converte as colunas do bloco em listas de texto, com `nulo` no lugar de vazios"""
+    textos = []
+    for valores in colunas:
+        if valores.dtype.kind == 'M':
+            textos.append(np.datetime_as_string(valores, unit='D').tolist())
+        else:
+            textos.append(np.where(valores == '', nulo, valores).tolist())
+    return textos
+
+
+def montar_buffer_copy_bloco(bloco):
+    """Monta o buffer do COPY (formato texto) direto das colunas do bloco"""
+    buffer = io.StringIO()
+    if not bloco['linhas_aceitas']:
+        return buffer
+
+    colunas = list(bloco['colunas'])
+    # Escapar barra invertida e tabulação no único campo livre (ticker)
+    posicao_ticker = COLUNAS_ATIVOS_PRECOS.index('ticker')
+    colunas[posicao_ticker] = np.char.replace(
+        np.char.replace(colunas[posicao_ticker], '\\', '\\\\'), '\t', '\\t'
+    )
+
+    buffer.write('\n'.join(map('\t'.join, zip(*_colunas_texto(colunas, '\\N')))))
+    buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def linhas_do_bloco(bloco):
+    """Converte as colunas do bloco em tuplas para INSERT parametrizado (vazio vira None)"""
+    return list(zip(*_colunas_texto(bloco['colunas'], None)))
@@ -0,0 +1,63 @@
+"""
+Pool de Processos das Rotinas de Carga
+======================================
+
+ProcessPoolExecutor compartilhado pelas cargas que processam um arquivo por processo:
+- Processos filhos iniciados por spawn (ou forkserver), nunca por fork: o processo
+  do servidor/scheduler tem threads (monitor, ouvinte da fila, eleição) e um fork
+  herdaria locks e conexões em estado indefinido
+- Cada filho executa django.setup() no initializer, antes de receber tarefas
+- Filhos marcados por variável de ambiente para que o AppConfig não inicie
+  scheduler, monitor ou eleição de liderança neles
+
+Este módulo não importa models: o initializer é importado pelo filho antes do django.setup().
+
+Uso:
+    with criar_pool_processos(workers) as pool:
+        futuro = pool.submit(funcao_do_modulo, argumentos)
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+# Variável de ambiente que identifica um processo filho do pool de carga
+VARIAVEL_PROCESSO_CARGA = 'ROTINAS_PROCESSO_CARGA'
+
+METODOS_INICIO = ('spawn', 'forkserver')
+
+
+def eh_processo_carga():
+    """True quando o processo atual é um filho do pool de carga"""
+    return os.environ.get(VARIAVEL_PROCESSO_CARGA) == '1'
+
+
+def _inicializar_processo():
+    """Initializer dos filhos: marca o processo e configura o Django"""
+    os.environ[VARIAVEL_PROCESSO_CARGA] = '1'
+
+    import django
+    django.setup()
+
+
+def criar_pool_processos(workers):
+    """ProcessPoolExecutor com filhos iniciados por spawn/forkserver e Django configurado"""
+    metodo = getattr(settings, 'CARGA_PROCESSOS_METODO_INICIO', 'spawn')
+    if metodo not in METODOS_INICIO:
+        print(f"Metodo de inicio de processos invalido: {metodo}. Usando spawn")
+        metodo = 'spawn'
+
+    # Filhos abrem conexões próprias; as do processo principal são reabertas sob demanda
+    connections.close_all()
+
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context(metodo),
+        initializer=_inicializar_processo
+    )
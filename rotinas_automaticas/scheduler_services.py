@@ -18,9 +18,12 @@ import requests
 import subprocess
 import logging
 import pytz
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, date, time, timedelta
 from typing import List, Dict, Any, Optional
 from django.db import transaction, connection
+from django.db.utils import OperationalError
 from django.utils import timezone
 from django.conf import settings
 from croniter import croniter
@@ -29,10 +32,19 @@ from .models import (
     SchedulerRotina, FilaExecucao, CargaDiariaRotinas, 
     LogScheduler, GrupoDiasExecucao, RegistroExecucao
 )
+from . import servico_carga, calendario_b3, indice_arquivos
 
 # Configurar timezone Brasil
 BRAZIL_TZ = pytz.timezone('America/Sao_Paulo')
 
+# Tentativas de reivindicar um item da fila em caso de falha de serialização
+TENTATIVAS_REIVINDICACAO = 3
+
+# Atraso do despacho gravado na reivindicação: início real menos data + horário planejados (Brasília)
+SQL_ATRASO_DESPACHO = (
+    "atraso_despacho_segundos = EXTRACT(EPOCH FROM (%s - ((data_execucao + horario_execucao) AT TIME ZONE 'America/Sao_Paulo')))"
+)
+
 # Configurar logging
 logger = logging.getLogger(__name__)
 
@@ -217,6 +229,11 @@ class CargaDiariaService:
         elif rotina.tipo_execucao == 'DIARIO':
             # Verificar grupo de dias
             if rotina.grupo_dias:
+                # Grupos da B3 seguem o calendário de pregões (feriados incluídos)
+                if rotina.grupo_dias.nome == 'PREGAO_B3':
+                    return calendario_b3.eh_dia_pregao(data_execucao)
+                if rotina.grupo_dias.nome == 'D_MAIS_1':
+                    return calendario_b3.eh_dia_pregao(data_execucao - timedelta(days=1))
                 dia_semana = data_execucao.weekday()  # 0=Segunda, 6=Domingo
                 dias_permitidos = rotina.grupo_dias.dias_da_semana_ativados()
                 return dia_semana in dias_permitidos
@@ -238,6 +255,10 @@ class CargaDiariaService:
             return "Mensal - não é primeiro dia do mês"
         
         if rotina.tipo_execucao == 'DIARIO' and rotina.grupo_dias:
+            if rotina.grupo_dias.nome == 'PREGAO_B3':
+                return "Sem pregão na B3 nesta data"
+            if rotina.grupo_dias.nome == 'D_MAIS_1':
+                return "Sem pregão na B3 no dia anterior"
             dia_semana = data_execucao.weekday()
             dias_permitidos = rotina.grupo_dias.dias_da_semana_ativados()
             if dia_semana not in dias_permitidos:
@@ -363,6 +384,54 @@ class CargaDiariaService:
             self.logger.log('ERROR', 'CargaDiaria', f'Erro ao gerar log estruturado: {e}')
 
 
+class ContadoresDespacho:
+    """Contadores do despacho de itens da fila neste processo (compartilhados entre threads)
+    
+    Um item só é executado por quem venceu a reivindicação; execucoes_duplicadas
+    conta itens que começaram a executar enquanto já estavam em execução aqui.
+    """
+    
+    def __init__(self):
+        self.reivindicacoes = 0
+        self.disputas_perdidas = 0
+        self.execucoes = 0
+        self.execucoes_duplicadas = 0
+        self.em_execucao = set()
+        self.trava = threading.Lock()
+    
+    def reivindicado(self):
+        with self.trava:
+            self.reivindicacoes += 1
+    
+    def perdido(self):
+        with self.trava:
+            self.disputas_perdidas += 1
+    
+    def iniciar(self, id_item):
+        with self.trava:
+            self.execucoes += 1
+            if id_item in self.em_execucao:
+                self.execucoes_duplicadas += 1
+            self.em_execucao.add(id_item)
+    
+    def finalizar(self, id_item):
+        with self.trava:
+            self.em_execucao.discard(id_item)
+    
+    def como_dict(self):
+        with self.trava:
+            return {
+                'reivindicacoes': self.reivindicacoes,
+                'disputas_perdidas': self.disputas_perdidas,
+                'execucoes': self.execucoes,
+                'execucoes_duplicadas': self.execucoes_duplicadas,
+                'em_execucao': len(self.em_execucao),
+            }
+
+
+CONTADORES_DESPACHO = ContadoresDespacho()
+
+
 class ExecutorRotinas:
     """Serviço responsável pela execução das rotinas na fila"""
     
@@ -419,25 +488,116 @@ class ExecutorRotinas:
             
             except Exception as e:
                 self.logger.log('ERROR', 'Executor', f'Erro ao corrigir rotina travada: {e}')
-                
+
         return resultado
+
+    def liberar_execucoes_expiradas(self) -> int:
+        """Volta para PENDENTE os itens EXECUTANDO além do timeout da rotina
+
+        Itens dentro do timeout podem estar rodando em outro processo (pools de despacho
+        do líder anterior, outro dyno) e não são tocados.
+        """
+        from django.db.models import DateTimeField, ExpressionWrapper, F, Q
+
+        expiracao = ExpressionWrapper(
+            timezone.now() - F('scheduler_rotina__rotina_definicao__timeout_segundos') * timedelta(seconds=1),
+            output_field=DateTimeField()
+        )
+        liberados = FilaExecucao.objects.filter(status='EXECUTANDO').filter(
+            Q(iniciado_em__isnull=True) | Q(iniciado_em__lt=expiracao)
+        ).update(status='PENDENTE', atualizado_em=timezone.now())
+        if liberados:
+            self.logger.log('WARNING', 'Executor', f'{liberados} item(ns) EXECUTANDO além do timeout voltaram para PENDENTE')
+        return liberados
+
+    def reivindicar_proximo(self, tipos_rotina: List[str] = None) -> Optional[FilaExecucao]:
+        """Reivindica o próximo item vencido da fila, passando-o para EXECUTANDO
+        
+        Um único UPDATE sobre o SELECT ... FOR UPDATE SKIP LOCKED do próximo item:
+        itens travados por outro worker (thread, processo ou dyno) são pulados, então
+        cada item é reivindicado por um só executor. Retorna None se a fila está vazia.
+        """
+        agora = timezone.now()
+        agora_brasil = agora.astimezone(BRAZIL_TZ)
+        tabela_fila = FilaExecucao._meta.db_table
+        tabela_rotina = SchedulerRotina._meta.db_table
+        
+        filtro_tipo = ''
+        parametros = [agora, agora, agora, agora_brasil.date(), agora_brasil.time()]
+        if tipos_rotina:
+            filtro_tipo = f"AND scheduler_rotina_id IN (SELECT id FROM {tabela_rotina} WHERE tipo_rotina = ANY(%s))"
+            parametros.append(list(tipos_rotina))
+        
+        sql = f"""
+            UPDATE {tabela_fila}
+               SET status = 'EXECUTANDO', iniciado_em = %s, atualizado_em = %s, {SQL_ATRASO_DESPACHO}
+             WHERE id = (
+                SELECT id FROM {tabela_fila}
+                 WHERE status IN ('PENDENTE', 'RECOVERY')
+                   AND data_execucao <= %s AND horario_execucao <= %s
+                   {filtro_tipo}
+                 ORDER BY data_execucao, horario_execucao, prioridade DESC
+                 LIMIT 1
+                   FOR UPDATE SKIP LOCKED
+             )
+            RETURNING id
+        """
+        
+        linha = self._executar_reivindicacao(sql, parametros)
+        if linha is None:
+            return None
+        CONTADORES_DESPACHO.reivindicado()
+        return FilaExecucao.objects.select_related('scheduler_rotina__rotina_definicao').get(pk=linha[0])
     
-    def executar_fila(self, limite_execucoes: int = None) -> Dict[str, Any]:
-        """Executa rotinas pendentes na fila"""
-        agora = timezone.now().astimezone(BRAZIL_TZ)
-        data_atual = agora.date()
-        hora_atual = agora.time()
+    def reivindicar_item(self, item_fila: FilaExecucao) -> bool:
+        """Reivindica um item específico: transição condicional PENDENTE/RECOVERY -> EXECUTANDO
         
-        # Buscar rotinas pendentes que devem ser executadas
-        fila_query = FilaExecucao.objects.filter(
-            status='PENDENTE',
-            data_execucao__lte=data_atual
-        ).filter(
-            horario_execucao__lte=hora_atual
-        ).order_by('data_execucao', 'horario_execucao', '-prioridade')  # Prioridade decrescente
+        Só um executor vence o UPDATE ... WHERE id = ? AND status IN (...) RETURNING;
+        os demais (outra thread do monitor, outro worker do gunicorn) recebem False
+        e não executam o item.
+        """
+        agora = timezone.now()
+        sql = f"""
+            UPDATE {FilaExecucao._meta.db_table}
+               SET status = 'EXECUTANDO', iniciado_em = %s, atualizado_em = %s, {SQL_ATRASO_DESPACHO}
+             WHERE id = %s AND status IN ('PENDENTE', 'RECOVERY')
+            RETURNING id, atraso_despacho_segundos
+        """
+        linha = self._executar_reivindicacao(sql, [agora, agora, agora, item_fila.pk])
+        if linha is None:
+            CONTADORES_DESPACHO.perdido()
+            return False
         
-        if limite_execucoes:
-            fila_query = fila_query[:limite_execucoes]
+        CONTADORES_DESPACHO.reivindicado()
+        item_fila.status = 'EXECUTANDO'
+        item_fila.iniciado_em = agora
+        item_fila.atraso_despacho_segundos = float(linha[1]) if linha[1] is not None else None
+        return True
+    
+    def _executar_reivindicacao(self, sql: str, parametros: list) -> Optional[tuple]:
+        """Executa o UPDATE de reivindicação e retorna a linha do RETURNING (ou None)"""
+        # Com isolamento serializable, reivindicações concorrentes podem falhar por serialização
+        for tentativa in range(TENTATIVAS_REIVINDICACAO):
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(sql, parametros)
+                    return cursor.fetchone()
+            except OperationalError as e:
+                if tentativa + 1 == TENTATIVAS_REIVINDICACAO:
+                    raise
+                self.logger.log('DEBUG', 'Executor', f'Reivindicação concorrente, tentando de novo: {e}')
+    
+    def executar_fila(self, limite_execucoes: int = None, workers_por_tipo: Dict[str, int] = None) -> Dict[str, Any]:
+        """Executa rotinas pendentes na fila com um pool de workers por tipo de rotina
+        
+        Cada worker reivindica o próximo item vencido do seu tipo (reivindicar_proximo),
+        executa e volta à fila até ela esvaziar ou o limite de execuções ser atingido.
+        Um download longo da CVM não bloqueia as cargas da B3 que estão atrás dele, e
+        vários processos podem esvaziar a mesma fila sem execução duplicada.
+        """
+        workers_por_tipo = workers_por_tipo or getattr(settings, 'SCHEDULER_WORKERS_POR_TIPO', {})
+        tipos = [tipo for tipo, _ in SchedulerRotina.TIPO_ROTINA_CHOICES]
+        workers = [tipo for tipo in tipos for _ in range(max(workers_por_tipo.get(tipo, 1), 1))]
         
         resultado = {
             'total_executadas': 0,
@@ -445,21 +605,72 @@ class ExecutorRotinas:
             'total_erro': 0,
             'execucoes': []
         }
+        trava = threading.Lock()
+        vagas = {'restantes': limite_execucoes}
+        
+        def reservar_vaga():
+            with trava:
+                if vagas['restantes'] is None:
+                    return True
+                if vagas['restantes'] <= 0:
+                    return False
+                vagas['restantes'] -= 1
+                return True
         
-        for item_fila in fila_query:
-            resultado_execucao = self._executar_rotina(item_fila)
-            resultado['execucoes'].append(resultado_execucao)
-            resultado['total_executadas'] += 1
-            
-            if resultado_execucao['sucesso']:
-                resultado['total_sucesso'] += 1
-            else:
-                resultado['total_erro'] += 1
+        def devolver_vaga():
+            with trava:
+                if vagas['restantes'] is not None:
+                    vagas['restantes'] += 1
+        
+        def worker(tipo):
+            try:
+                while reservar_vaga():
+                    item_fila = self.reivindicar_proximo([tipo])
+                    if item_fila is None:
+                        devolver_vaga()
+                        return
+                    resultado_execucao = self._executar_rotina(item_fila, reivindicado=True)
+                    with trava:
+                        resultado['execucoes'].append(resultado_execucao)
+                        resultado['total_executadas'] += 1
+                        if resultado_execucao['sucesso']:
+                            resultado['total_sucesso'] += 1
+                        else:
+                            resultado['total_erro'] += 1
+            finally:
+                # Cada thread tem a sua conexão de banco
+                connection.close()
+        
+        with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+            for futuro in [pool.submit(worker, tipo) for tipo in workers]:
+                futuro.result()
         
         return resultado
     
-    def _executar_rotina(self, item_fila: FilaExecucao) -> Dict[str, Any]:
-        """Executa uma rotina específica"""
+    def _executar_rotina(self, item_fila: FilaExecucao, reivindicado: bool = False) -> Dict[str, Any]:
+        """Executa uma rotina específica
+        
+        Sem reivindicado (item já passado para EXECUTANDO por reivindicar_proximo), o
+        item é reivindicado aqui; se outro executor já o reivindicou, não é executado.
+        """
+        rotina = item_fila.scheduler_rotina
+        
+        # Marcar como executando (transição atômica: um só executor vence)
+        if not reivindicado and not self.reivindicar_item(item_fila):
+            self.logger.log('INFO', 'Executor', 
+                           f'Item já reivindicado por outro executor: {rotina.rotina_definicao.nome_exibicao}', 
+                           fila_execucao=item_fila)
+            return {'sucesso': False, 'item_fila': item_fila, 'erro': 'Item já reivindicado por outro executor',
+                    'reivindicado_por_outro': True}
+        
+        CONTADORES_DESPACHO.iniciar(item_fila.pk)
+        try:
+            return self._executar_item(item_fila)
+        finally:
+            CONTADORES_DESPACHO.finalizar(item_fila.pk)
+    
+    def _executar_item(self, item_fila: FilaExecucao) -> Dict[str, Any]:
+        """Executa um item já reivindicado e grava o resultado"""
         rotina = item_fila.scheduler_rotina
         
         # Log detalhado com horário atual e horário programado
@@ -470,11 +681,6 @@ class ExecutorRotinas:
                        f'Horário programado: {item_fila.horario_execucao}', 
                        fila_execucao=item_fila)
         
-        # Marcar como executando
-        item_fila.status = 'EXECUTANDO'
-        item_fila.iniciado_em = timezone.now()
-        item_fila.save()
-        
         try:
             with transaction.atomic():
                 if rotina.tipo_rotina == 'CARGA_ARQUIVO':
@@ -548,47 +754,54 @@ class ExecutorRotinas:
             resultados = []
             sucessos = 0
             erros = 0
+            workers = max(1, min(getattr(settings, 'CARGA_ARQUIVOS_WORKERS', 1), len(arquivos_encontrados)))
             
-            self.logger.log('INFO', 'Executor', f"Iniciando carga de {len(arquivos_encontrados)} arquivo(s)")
+            self.logger.log('INFO', 'Executor', f"Iniciando carga de {len(arquivos_encontrados)} arquivo(s) "
+                                                f"com {workers} em paralelo")
             
-            for i, arquivo in enumerate(arquivos_encontrados, 1):
+            item_fila.arquivo_processado = ', '.join(os.path.basename(arquivo) for arquivo in arquivos_encontrados)[:500]
+            item_fila.save()
+            
+            # Por padrão a carga roda em processos (servico_carga, um por arquivo: parse e
+            # gravação disputariam o GIL em threads); com CARGA_ARQUIVOS_VIA_ENDPOINT e endpoint
+            # configurado, chama a API em threads. Logs e a fila ficam na thread principal.
+            if rotina.endpoint_url and getattr(settings, 'CARGA_ARQUIVOS_VIA_ENDPOINT', False):
+                concluidos = self._carregar_arquivos_via_endpoint(rotina, arquivos_encontrados, workers)
+            else:
+                concluidos = self._carregar_arquivos_local(arquivos_encontrados, workers)
+            
+            # Continua processando outros arquivos mesmo se um falhar
+            for arquivo, resultado, erro_msg in concluidos:
                 nome_arquivo = os.path.basename(arquivo)
-                
-                try:
-                    self.logger.log('DEBUG', 'Executor', f"Processando arquivo {i}/{len(arquivos_encontrados)}: {nome_arquivo}")
-                    
-                    item_fila.arquivo_processado = arquivo
-                    item_fila.save()
-                    
-                    # Chamar endpoint API se configurado
-                    if rotina.endpoint_url:
-                        resultado = self._chamar_endpoint_carga(rotina, arquivo)
-                        resultados.append({
-                            'arquivo': nome_arquivo,
-                            'status': 'sucesso',
-                            'resultado': resultado
-                        })
-                        sucessos += 1
-                        self.logger.log('INFO', 'Executor', f"Carga concluída com sucesso: {nome_arquivo}")
-                    
-                except Exception as e:
+                if erro_msg is None:
+                    resultados.append({
+                        'arquivo': nome_arquivo,
+                        'status': 'sucesso',
+                        'resultado': resultado
+                    })
+                    sucessos += 1
+                    self.logger.log('INFO', 'Executor', f"Carga concluída com sucesso: {nome_arquivo}")
+                else:
                     erros += 1
-                    erro_msg = str(e)
                     self.logger.log('ERROR', 'Executor', f"Erro na carga do arquivo {nome_arquivo}: {erro_msg}")
                     resultados.append({
                         'arquivo': nome_arquivo,
                         'status': 'erro',
                         'erro': erro_msg
                     })
-                    # Continua processando outros arquivos mesmo se um falhar
-            
-            # Retornar resultado consolidado
-            status_final = 'success' if sucessos > 0 else ('warning' if erros == 0 else 'partial_success')
             
             self.logger.log('INFO', 'Executor', f"Carga finalizada: {sucessos} sucessos, {erros} erros, {len(arquivos_encontrados)} total")
             
+            # Arquivos com erro levam a rotina para recovery: os arquivos concluídos já foram movidos
+            # para processados e os com erro retomam do checkpoint do último lote confirmado
+            if erros > 0:
+                arquivos_com_erro = [detalhe['arquivo'] for detalhe in resultados if detalhe['status'] == 'erro']
+                raise Exception(f"{erros} de {len(arquivos_encontrados)} arquivo(s) com erro na carga: "
+                                f"{', '.join(arquivos_com_erro)}")
+            
+            # Retornar resultado consolidado
             return {
-                'status': status_final,
+                'status': 'success',
                 'arquivos_processados': len(arquivos_encontrados),
                 'sucessos': sucessos,
                 'erros': erros,
@@ -662,115 +875,37 @@ class ExecutorRotinas:
     
     def _encontrar_arquivo_por_mascara(self, mascara: str, pasta: str = None) -> Optional[str]:
         """Encontra arquivo baseado na máscara"""
-        import glob
-        
-        if pasta is None:
+        if not pasta:
             pasta = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+        if not os.path.isdir(pasta):
+            return None
         
         # Substituir data atual na máscara se necessário
         hoje = timezone.now().astimezone(BRAZIL_TZ).date()
-        mascara_processada = mascara.replace('*YYYYMMDD*', hoje.strftime('%Y%m%d'))
-        mascara_processada = mascara_processada.replace('*DDMMYYYY*', hoje.strftime('%d%m%Y'))
-        
-        caminho_busca = os.path.join(pasta, mascara_processada)
-        arquivos = glob.glob(caminho_busca)
+        mascara_processada = indice_arquivos.aplicar_data(mascara, hoje)
         
-        if arquivos:
-            # Retornar o mais recente
-            return max(arquivos, key=os.path.getctime)
-        
-        return None
+        # Retornar o mais recente
+        return indice_arquivos.obter_indice(pasta).mais_recente(mascara_processada)
     
     def _encontrar_arquivos_ultimos_dias(self, mascara: str, pasta: str = None, dias: int = 3) -> List[str]:
-        """Encontra todos os arquivos baseados na máscara para os últimos N dias úteis"""
-        import glob
-        from datetime import timedelta
+        """Encontra todos os arquivos baseados na máscara para os últimos N pregões da B3
         
-        if pasta is None:
+        A pasta é lida uma vez (índice em cache até o mtime da pasta mudar) e a
+        máscara é filtrada em memória nas datas dos pregões.
+        """
+        if not pasta:
             pasta = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+        if not os.path.isdir(pasta):
+            self.logger.log('WARNING', 'Executor', f"Pasta de origem não encontrada: {pasta}")
+            return []
         
-        arquivos_encontrados = []
         hoje = timezone.now().astimezone(BRAZIL_TZ).date()
+        datas = calendario_b3.pregoes_anteriores(dias, hoje)
         
-        self.logger.log('DEBUG', 'Executor', f"Buscando arquivos para {dias} dias úteis com máscara: {mascara}")
-        
-        # Verificar se a máscara tem placeholders de data
-        tem_placeholder_data = ('*YYYYMMDD*' in mascara or '*DDMMYYYY*' in mascara)
-        
-        if tem_placeholder_data:
-            # Buscar arquivos para os últimos N dias úteis específicos
-            dias_verificados = 0
-            delta = 0
-            
-            while dias_verificados < dias and delta <= 15:  # Máximo 15 dias para trás
-                data_busca = hoje - timedelta(days=delta)
-                
-                # Verificar se é dia útil (segunda a sexta)
-                if data_busca.weekday() < 5:  # 0=segunda, 4=sexta
-                    # Substituir datas na máscara
-                    mascara_processada = mascara.replace('*YYYYMMDD*', data_busca.strftime('%Y%m%d'))
-                    mascara_processada = mascara_processada.replace('*DDMMYYYY*', data_busca.strftime('%d%m%Y'))
-                    
-                    caminho_busca = os.path.join(pasta, mascara_processada)
-                    arquivos_data = glob.glob(caminho_busca)
-                    
-                    if arquivos_data:
-                        self.logger.log('DEBUG', 'Executor', f"Encontrados {len(arquivos_data)} arquivo(s) para {data_busca}: {[os.path.basename(a) for a in arquivos_data]}")
-                        arquivos_encontrados.extend(arquivos_data)
-                    else:
-                        self.logger.log('DEBUG', 'Executor', f"Nenhum arquivo encontrado para {data_busca} (normal, nem todos os dias têm dados)")
-                    
-                    dias_verificados += 1
-                
-                delta += 1
-        else:
-            # Para máscaras simples (como TradeInformationConsolidatedFile*.csv),
-            # buscar todos os arquivos e filtrar pelos últimos N dias úteis
-            caminho_busca = os.path.join(pasta, mascara)
-            todos_arquivos = glob.glob(caminho_busca)
-            
-            if todos_arquivos:
-                # Filtrar arquivos pelos últimos N dias úteis baseado na data do arquivo
-                arquivos_com_data = []
-                
-                for arquivo in todos_arquivos:
-                    # Tentar extrair data do nome do arquivo (formato: YYYYMMDD)
-                    nome = os.path.basename(arquivo)
-                    import re
-                    match = re.search(r'(\d{8})', nome)  # Buscar 8 dígitos consecutivos
-                    
-                    if match:
-                        try:
-                            data_str = match.group(1)
-                            data_arquivo = datetime.strptime(data_str, '%Y%m%d').date()
-                            arquivos_com_data.append((arquivo, data_arquivo))
-                            self.logger.log('DEBUG', 'Executor', f"Arquivo {nome} data extraída: {data_arquivo}")
-                        except ValueError:
-                            self.logger.log('DEBUG', 'Executor', f"Não foi possível extrair data válida de: {nome}")
-                    else:
-                        self.logger.log('DEBUG', 'Executor', f"Padrão de data não encontrado em: {nome}")
-                
-                # Filtrar pelos últimos N dias úteis
-                if arquivos_com_data:
-                    dias_verificados = 0
-                    delta = 0
-                    
-                    while dias_verificados < dias and delta <= 15:
-                        data_busca = hoje - timedelta(days=delta)
-                        
-                        if data_busca.weekday() < 5:  # Dia útil
-                            arquivos_desta_data = [arq for arq, data in arquivos_com_data if data == data_busca]
-                            if arquivos_desta_data:
-                                arquivos_encontrados.extend(arquivos_desta_data)
-                                self.logger.log('DEBUG', 'Executor', f"Encontrados {len(arquivos_desta_data)} arquivo(s) para {data_busca}")
-                            
-                            dias_verificados += 1
-                        
-                        delta += 1
-        
-        # Retornar arquivos ordenados por data (mais antigos primeiro)
-        arquivos_ordenados = sorted(set(arquivos_encontrados))  # Remove duplicatas
-        self.logger.log('INFO', 'Executor', f"Total de arquivos encontrados: {len(arquivos_ordenados)} para {dias} dias úteis")
+        # Retornar arquivos ordenados (mais antigos primeiro)
+        arquivos_ordenados = indice_arquivos.obter_indice(pasta).arquivos_por_datas(mascara, datas)
+        self.logger.log('INFO', 'Executor', f"Total de arquivos encontrados: {len(arquivos_ordenados)} para {dias} dias úteis "
+                        f"({datas[0]} a {datas[-1]}) com máscara: {mascara}")
         
         return arquivos_ordenados
     
@@ -797,6 +932,38 @@ class ExecutorRotinas:
             'arquivo': arquivo
         }
     
+    def _carregar_arquivos_via_endpoint(self, rotina, arquivos: List[str], workers: int) -> List[tuple]:
+        """Chama a API de carga de cada arquivo em um pool de threads; retorna [(arquivo, resultado, erro)]"""
+        concluidos = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futuros = {pool.submit(self._chamar_endpoint_carga, rotina, arquivo): arquivo for arquivo in arquivos}
+            for futuro in as_completed(futuros):
+                try:
+                    concluidos.append((futuros[futuro], futuro.result(), None))
+                except Exception as e:
+                    concluidos.append((futuros[futuro], None, str(e)))
+        return concluidos
+    
+    def _carregar_arquivos_local(self, arquivos: List[str], workers: int) -> List[tuple]:
+        """Carrega os arquivos com um processo por arquivo (servico_carga); retorna [(arquivo, resultado, erro)]"""
+        por_nome = {os.path.basename(arquivo): arquivo for arquivo in arquivos}
+        resultados = servico_carga.carregar_arquivos_por_arquivo(list(por_nome), workers=workers)
+        
+        concluidos = []
+        for nome, resultado in resultados.items():
+            arquivo = por_nome[nome]
+            if not resultado.sucesso:
+                concluidos.append((arquivo, None, resultado.mensagem))
+                continue
+            concluidos.append((arquivo, {
+                'status_code': None,
+                'response': f"{resultado.linhas_inseridas} inseridas, {resultado.linhas_atualizadas} atualizadas, "
+                            f"{resultado.linhas_rejeitadas} rejeitadas em {resultado.duracao_segundos:.1f}s",
+                'stdout': f"Carga de arquivo concluida: {', '.join(resultado.arquivos_processados)}",
+                'arquivo': arquivo
+            }, None))
+        return concluidos
+    
     def _agendar_recovery(self, item_fila: FilaExecucao):
         """Agenda tentativa de recovery"""
         rotina = item_fila.scheduler_rotina
@@ -805,10 +972,11 @@ class ExecutorRotinas:
         item_fila.tentativa_atual += 1
         item_fila.ultima_tentativa_em = timezone.now()
         
-        # Agendar para daqui X minutos
+        # Agendar para daqui X minutos (no horário de Brasília, como o executar_fila compara)
         delay_minutos = rotina.delay_recovery_minutos * item_fila.tentativa_atual
-        novo_horario = timezone.now() + timedelta(minutes=delay_minutos)
+        novo_horario = (timezone.now() + timedelta(minutes=delay_minutos)).astimezone(BRAZIL_TZ)
         
+        item_fila.data_execucao = novo_horario.date()
         item_fila.horario_execucao = novo_horario.time()
         item_fila.save()
         
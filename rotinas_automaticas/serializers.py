@@ -78,7 +78,7 @@ class FilaExecucaoSerializer(serializers.ModelSerializer):
             'id', 'scheduler_rotina', 'nome_rotina', 'tipo_rotina',
             'data_execucao', 'horario_execucao', 'status',
             'prioridade', 'iniciado_em', 'finalizado_em',
-            'duracao_segundos', 'tentativa_atual', 'max_tentativas',
+            'duracao_segundos', 'atraso_despacho_segundos', 'tentativa_atual', 'max_tentativas',
             'codigo_retorno', 'erro_detalhes'
         ]
     
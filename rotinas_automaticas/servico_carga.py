@@ -0,0 +1,346 @@
+"""
+Serviço de Carga de Arquivos
+============================
+
+Ponto único para carregar um arquivo baixado (static/downloadbruto), usado pela
+view de arquivos estáticos e pelo ExecutorRotinas:
+- Identifica as rotinas de carga pelo registro de cargas (máscara do nome do
+  arquivo -> classe); um arquivo pode alimentar mais de uma tabela: as cargas
+  rodam na ordem de registro e os resultados são somados
+- Feeds declarativos (EspecificacaoCarga) rodam no MotorCarga; novos feeds só
+  precisam ser registrados com registrar_especificacao()
+- Modo 'processo' (padrão): chama a classe de carga no próprio processo, sem
+  novo interpretador, sem novo django.setup() e reaproveitando a conexão
+- Modo 'subprocesso': executa o script de rotinas_individuais em um
+  interpretador separado, para isolamento (com timeout)
+- carregar_arquivos(): vários arquivos ao mesmo tempo, um processo por arquivo
+  (cada um com conexão e transações próprias); carregar_arquivos_por_arquivo()
+  devolve o resultado de cada arquivo
+- carregar_zip(): membros de um zip baixado lidos direto do zip pelas cargas
+  declarativas, sem cópia extraída em disco
+
+Configuração: CARGA_ARQUIVOS_EXECUCAO, CARGA_ARQUIVOS_TIMEOUT_SEGUNDOS e CARGA_ARQUIVOS_WORKERS.
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import sys
+import json
+import shutil
+import fnmatch
+import zipfile
+import subprocess
+from collections import namedtuple
+from concurrent.futures import as_completed
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections
+
+from .carga_b3_trade_information import (
+    CargaB3TradeInformation, ResultadoCarga, STATUS_SUCESSO, STATUS_PARCIAL, STATUS_ERRO
+)
+from .carga_bulk import TABELA_ATIVOS_PRECOS
+from .carga_declarativa import MotorCarga, arquivo_em_fluxo
+from .carga_b3_trade_detalhada import CargaB3TradeDetalhada, ESPECIFICACAO_TRADE_REGULAR, ESPECIFICACAO_TRADE_AFTER
+from .carga_b3_instruments import CargaB3Instruments, ESPECIFICACAO_INSTRUMENTOS
+from .carga_cvm import ESPECIFICACOES_CVM
+from .processos_carga import criar_pool_processos
+
+MODO_EXECUCAO_PROCESSO = 'processo'
+MODO_EXECUCAO_SUBPROCESSO = 'subprocesso'
+MODOS_EXECUCAO = [MODO_EXECUCAO_PROCESSO, MODO_EXECUCAO_SUBPROCESSO]
+
+# Script de linha de comando dos feeds declarativos (recebe --carga=<nome>)
+SCRIPT_CARGA_DECLARATIVA = 'carga_declarativa.py'
+
+# Carga registrada: classe instanciada com o nome do arquivo (e a especificação, se declarativa)
+CargaRegistrada = namedtuple(
+    'CargaRegistrada', ['nome', 'mascara_arquivo', 'classe', 'script', 'especificacao', 'tabela_destino']
+)
+
+# Registro de cargas, na ordem de execução para um mesmo arquivo
+REGISTRO_CARGAS = []
+
+
+def registrar_carga(nome, mascara_arquivo, classe, script, tabela_destino):
+    """Registra uma rotina de carga própria (classe com executar_carga() -> ResultadoCarga)"""
+    REGISTRO_CARGAS.append(CargaRegistrada(nome, mascara_arquivo, classe, script, None, tabela_destino))
+
+
+def registrar_especificacao(especificacao, classe=MotorCarga):
+    """Registra um feed declarativo, executado pelo MotorCarga (ou subclasse)"""
+    REGISTRO_CARGAS.append(CargaRegistrada(
+        especificacao.nome, especificacao.mascara_arquivo, classe, SCRIPT_CARGA_DECLARATIVA, especificacao,
+        especificacao.tabela
+    ))
+
+
+# A carga detalhada do pregão regular vem antes da carga de preços, que move o arquivo para processados
+registrar_especificacao(ESPECIFICACAO_TRADE_REGULAR, CargaB3TradeDetalhada)
+registrar_carga(
+    'b3_ativos_precos', 'TradeInformationConsolidatedFile_*',
+    CargaB3TradeInformation, 'carga_b3_TradeInformationConsolidatedFile_sem_emoji.py', TABELA_ATIVOS_PRECOS
+)
+registrar_especificacao(ESPECIFICACAO_TRADE_AFTER, CargaB3TradeDetalhada)
+registrar_especificacao(ESPECIFICACAO_INSTRUMENTOS, CargaB3Instruments)
+for especificacao_cvm in ESPECIFICACOES_CVM:
+    registrar_especificacao(especificacao_cvm)
+
+# Prefixo da linha com o resultado em JSON impressa pelo script de linha de comando
+PREFIXO_RESULTADO = 'RESULTADO_CARGA='
+
+
+def identificar_carga(nome_arquivo):
+    """Retorna as cargas registradas para o arquivo (na ordem de execução), ou None se o tipo não é suportado"""
+    cargas = [carga for carga in REGISTRO_CARGAS if fnmatch.fnmatch(nome_arquivo, carga.mascara_arquivo)]
+    return cargas or None
+
+
+def tabelas_destino(nome_arquivo):
+    """Tabelas destino de todas as cargas registradas para o arquivo (vazio se o tipo não é suportado)"""
+    return [carga.tabela_destino for carga in identificar_carga(nome_arquivo) or []]
+
+
+def obter_carga(nome):
+    """Carga registrada pelo nome (None se não existir)"""
+    return next((carga for carga in REGISTRO_CARGAS if carga.nome == nome), None)
+
+
+def tipos_suportados():
+    return list(dict.fromkeys(carga.mascara_arquivo for carga in REGISTRO_CARGAS))
+
+
+def instanciar_carga(carga, nome_arquivo, **opcoes):
+    """Instância da rotina de carga registrada para o arquivo"""
+    if carga.especificacao is not None:
+        opcoes['especificacao'] = carga.especificacao
+    return carga.classe(nome_arquivo, **opcoes)
+
+
+def carregar_arquivo(nome_arquivo, modo_execucao=None):
+    """Carrega um arquivo da pasta downloadbruto e retorna o ResultadoCarga"""
+    modo_execucao = modo_execucao or getattr(settings, 'CARGA_ARQUIVOS_EXECUCAO', MODO_EXECUCAO_PROCESSO)
+    cargas = identificar_carga(nome_arquivo)
+    if cargas is None:
+        return ResultadoCarga(status=STATUS_ERRO, mensagem=f'Tipo de arquivo não suportado para carga: {nome_arquivo}')
+
+    resultados = []
+    for carga in cargas:
+        if modo_execucao == MODO_EXECUCAO_SUBPROCESSO:
+            resultados.append(_carregar_em_subprocesso(carga, nome_arquivo))
+        else:
+            resultados.append(instanciar_carga(carga, nome_arquivo).executar_carga())
+    return combinar_resultados(resultados)
+
+
+def carregar_arquivos_por_arquivo(nomes_arquivos, workers=None, modo_execucao=None):
+    """Carrega vários arquivos ao mesmo tempo (um processo por arquivo); retorna {nome: ResultadoCarga}
+
+    Os maiores arquivos são despachados primeiro, para equilibrar os processos.
+    """
+    workers = min(workers or getattr(settings, 'CARGA_ARQUIVOS_WORKERS', 2), len(nomes_arquivos))
+    if workers <= 1:
+        return {nome: carregar_arquivo(nome, modo_execucao) for nome in nomes_arquivos}
+
+    pasta_origem = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+    nomes_arquivos = sorted(
+        nomes_arquivos,
+        key=lambda nome: os.path.getsize(os.path.join(pasta_origem, nome))
+        if os.path.exists(os.path.join(pasta_origem, nome)) else 0,
+        reverse=True
+    )
+    print(f"Carregando {len(nomes_arquivos)} arquivo(s) com {workers} processos em paralelo")
+
+    resultados = {}
+    with criar_pool_processos(workers) as pool:
+        futuros = {pool.submit(_carregar_arquivo_em_processo, nome, modo_execucao): nome for nome in nomes_arquivos}
+        for futuro in as_completed(futuros):
+            nome = futuros[futuro]
+            try:
+                resultados[nome] = futuro.result()
+            except Exception as e:
+                print(f"Erro ao carregar arquivo {nome} em paralelo: {e}")
+                resultados[nome] = ResultadoCarga(
+                    status=STATUS_ERRO, mensagem=f'{nome}: {e}', arquivos_com_erro=[nome]
+                )
+    return resultados
+
+
+def carregar_arquivos(nomes_arquivos, workers=None, modo_execucao=None):
+    """Carrega vários arquivos ao mesmo tempo (um processo por arquivo) e soma os resultados"""
+    if not nomes_arquivos:
+        return ResultadoCarga(status=STATUS_ERRO, mensagem='Nenhum arquivo para carregar')
+
+    paralelo = min(workers or getattr(settings, 'CARGA_ARQUIVOS_WORKERS', 2), len(nomes_arquivos)) > 1
+    inicio = datetime.now()
+    resultado = combinar_resultados(list(
+        carregar_arquivos_por_arquivo(nomes_arquivos, workers, modo_execucao).values()
+    ))
+    if paralelo:
+        # Arquivos em paralelo: duração e taxa pelo tempo total, não pela soma dos processos
+        resultado.duracao_segundos = (datetime.now() - inicio).total_seconds()
+        if resultado.duracao_segundos:
+            resultado.linhas_por_segundo = resultado.linhas_processadas / resultado.duracao_segundos
+    return resultado
+
+
+def arquivos_por_sistema(sistema):
+    """Arquivos da pasta downloadbruto com carga declarativa do sistema (ex: 'CVM')"""
+    pasta_origem = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+    if not os.path.exists(pasta_origem):
+        return []
+    return sorted(
+        nome for nome in os.listdir(pasta_origem)
+        if any(carga.especificacao is not None and carga.especificacao.sistema == sistema
+               for carga in identificar_carga(nome) or [])
+    )
+
+
+def carregar_arquivos_cvm(workers=None, modo_execucao=None):
+    """Carrega em paralelo todos os CSVs da CVM presentes na pasta downloadbruto"""
+    arquivos = arquivos_por_sistema('CVM')
+    if not arquivos:
+        return ResultadoCarga(status=STATUS_ERRO, mensagem='Nenhum arquivo da CVM encontrado para carga')
+    return carregar_arquivos(arquivos, workers=workers, modo_execucao=modo_execucao)
+
+
+def membros_registrados(zip_ref):
+    """Membros do zip com carga registrada: [(ZipInfo, nome do arquivo, cargas)]"""
+    membros = []
+    for membro in zip_ref.infolist():
+        if membro.is_dir():
+            continue
+        nome = os.path.basename(membro.filename)
+        cargas = identificar_carga(nome)
+        if cargas is not None:
+            membros.append((membro, nome, cargas))
+    return membros
+
+
+def extrair_membro(zip_ref, membro, nome, pasta_destino):
+    """Extrai um único membro do zip para a pasta (sem a estrutura de diretórios do zip)"""
+    os.makedirs(pasta_destino, exist_ok=True)
+    with zip_ref.open(membro) as origem, open(os.path.join(pasta_destino, nome), 'wb') as destino:
+        shutil.copyfileobj(origem, destino)
+
+
+def carregar_zip(arquivo_zip, nome_zip='', modo_execucao=None):
+    """Carrega os membros de um zip que têm carga registrada e retorna o ResultadoCarga
+
+    arquivo_zip é um caminho ou um arquivo binário com seek (ex: SpooledTemporaryFile
+    do download). Membros de feeds declarativos são lidos do zip em streaming pelo
+    MotorCarga, sem extração; membros cuja carga precisa do arquivo em disco são
+    extraídos (só eles) em downloadbruto e carregados por carregar_arquivo().
+    Os demais membros são ignorados.
+    """
+    pasta_origem = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
+    resultados = []
+    with zipfile.ZipFile(arquivo_zip) as zip_ref:
+        membros = membros_registrados(zip_ref)
+        print(f"{nome_zip or 'zip'}: {len(membros)} de {len(zip_ref.infolist())} membros com carga registrada")
+        for membro, nome, cargas in membros:
+            if any(carga.especificacao is None for carga in cargas):
+                extrair_membro(zip_ref, membro, nome, pasta_origem)
+                resultados.append(carregar_arquivo(nome, modo_execucao))
+                continue
+            info_arquivo = arquivo_em_fluxo(
+                nome,
+                lambda membro=membro: zip_ref.open(membro),
+                membro.file_size,
+                datetime(*membro.date_time, tzinfo=dt_timezone.utc),
+                origem=nome_zip
+            )
+            for carga in cargas:
+                resultados.append(instanciar_carga(carga, nome).executar_carga(arquivos=[dict(info_arquivo)]))
+
+    if not resultados:
+        return ResultadoCarga(status=STATUS_ERRO, mensagem=f'Nenhum membro com carga registrada em {nome_zip or "zip"}')
+    return combinar_resultados(resultados)
+
+
+def _carregar_arquivo_em_processo(nome_arquivo, modo_execucao):
+    """Worker do pool de processos: carrega um arquivo com conexão própria"""
+    try:
+        return carregar_arquivo(nome_arquivo, modo_execucao)
+    finally:
+        connections.close_all()
+
+
+def combinar_resultados(resultados):
+    """Soma os resultados das cargas de um mesmo arquivo em um único ResultadoCarga"""
+    if len(resultados) == 1:
+        return resultados[0]
+
+    sucessos = sum(1 for resultado in resultados if resultado.sucesso)
+    if sucessos == len(resultados):
+        status = STATUS_SUCESSO
+    elif sucessos == 0 and all(resultado.status == STATUS_ERRO for resultado in resultados):
+        status = STATUS_ERRO
+    else:
+        status = STATUS_PARCIAL
+
+    combinado = ResultadoCarga(status=status, mensagem=' | '.join(resultado.mensagem for resultado in resultados))
+    for resultado in resultados:
+        combinado.arquivos_processados.extend(resultado.arquivos_processados)
+        combinado.arquivos_com_erro.extend(resultado.arquivos_com_erro)
+        combinado.arquivos_ignorados.extend(resultado.arquivos_ignorados)
+        combinado.linhas_processadas += resultado.linhas_processadas
+        combinado.linhas_inseridas += resultado.linhas_inseridas
+        combinado.linhas_atualizadas += resultado.linhas_atualizadas
+        combinado.linhas_rejeitadas += resultado.linhas_rejeitadas
+        combinado.linhas_ignoradas += resultado.linhas_ignoradas
+        combinado.tickers_nao_carregados += resultado.tickers_nao_carregados
+        combinado.duracao_segundos += resultado.duracao_segundos
+    if combinado.duracao_segundos:
+        combinado.linhas_por_segundo = combinado.linhas_processadas / combinado.duracao_segundos
+    saidas = [resultado.saida for resultado in resultados if resultado.saida]
+    combinado.saida = '\n'.join(saidas) if saidas else None
+    return combinado
+
+
+def _carregar_em_subprocesso(carga, nome_arquivo):
+    """Executa o script de carga em outro interpretador e reconstrói o ResultadoCarga da saída"""
+    pasta_rotinas = os.path.join(settings.BASE_DIR, 'rotinas_individuais')
+    script_path = os.path.join(pasta_rotinas, carga.script)
+    argumentos = [sys.executable, script_path, nome_arquivo]
+    if carga.especificacao is not None:
+        argumentos.append(f'--carga={carga.nome}')
+    timeout = getattr(settings, 'CARGA_ARQUIVOS_TIMEOUT_SEGUNDOS', 300)
+    inicio = datetime.now()
+
+    try:
+        processo = subprocess.run(
+            argumentos,
+            cwd=pasta_rotinas,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            encoding='utf-8',
+            errors='ignore'  # Ignorar caracteres não UTF-8
+        )
+    except subprocess.TimeoutExpired:
+        return ResultadoCarga(
+            status=STATUS_ERRO,
+            mensagem=f'Timeout na execução da carga para arquivo {nome_arquivo} ({timeout} segundos)',
+            duracao_segundos=(datetime.now() - inicio).total_seconds()
+        )
+
+    resultado = None
+    for linha in reversed(processo.stdout.splitlines()):
+        if linha.startswith(PREFIXO_RESULTADO):
+            resultado = ResultadoCarga(**json.loads(linha[len(PREFIXO_RESULTADO):]))
+            break
+
+    if resultado is None:
+        # Script terminou sem imprimir o resultado (erro antes ou durante o django.setup)
+        resultado = ResultadoCarga(
+            status=STATUS_SUCESSO if processo.returncode == 0 else STATUS_ERRO,
+            mensagem=f'Carga em subprocesso finalizada com código {processo.returncode}'
+        )
+
+    resultado.saida = processo.stdout + (processo.stderr or '')
+    resultado.duracao_segundos = (datetime.now() - inicio).total_seconds()
+    return resultado
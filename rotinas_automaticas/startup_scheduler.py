@@ -162,8 +162,12 @@ def verificar_integridade_scheduler():
         logger.error(f"Erro na verificação de integridade: {e}", exc_info=True)
         return False
 
-def inicializar_scheduler():
-    """Função principal de inicialização do scheduler"""
+def inicializar_scheduler(continuar=None):
+    """Função principal de inicialização do scheduler
+    
+    continuar: chamado entre as etapas; falso interrompe a inicialização (liderança perdida)
+    """
+    continuar = continuar or (lambda: True)
     print(f"\n🔧 Inicializando sistema de scheduler...")
     
     # Fechar conexões antigas para evitar problemas
@@ -208,6 +212,10 @@ def inicializar_scheduler():
             print(f"⚠️ Erro de conexão com banco de dados: {str(db_err)}")
             print("   Continuando inicialização...")
         
+        if not continuar():
+            print("🛑 Liderança perdida: carga de startup fica com o novo líder")
+            return False
+        
         # Carregar rotinas diárias com substituição automática
         carregar_rotinas_diarias_startup()
         
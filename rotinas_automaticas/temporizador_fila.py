@@ -0,0 +1,131 @@
+"""
+Temporizador da Fila de Execução
+================================
+
+Vencimentos dos itens pendentes da fila em memória (heap), para o monitor
+dormir exatamente até o próximo item e despachá-lo pelo id:
+- Carregado dos itens PENDENTE/RECOVERY e atualizado item a item pelas
+  notificações da fila (notificacoes_fila), sem consultar a fila a cada ciclo
+- Vencimento = data + horário planejados (Brasília); itens de datas passadas
+  vencem no horário de hoje, como no filtro do executor
+- Reagendar um item só grava o novo vencimento; a entrada antiga do heap é
+  descartada quando chega ao topo
+- Itens que saíram da fila sem notificação (executados, removidos) são
+  descartados no despacho, pela reivindicação atômica do executor
+
+Uso:
+    temporizador = TemporizadorFila()
+    temporizador.recarregar()
+    temporizador.aplicar_notificacao({'id': 10, 'status': 'PENDENTE', ...})
+    ids = temporizador.retirar_vencidos()
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import heapq
+import threading
+from datetime import datetime
+
+import pytz
+
+from .models import FilaExecucao
+
+BRAZIL_TZ = pytz.timezone('America/Sao_Paulo')
+
+STATUS_AGENDAVEIS = ('PENDENTE', 'RECOVERY')
+
+
+def calcular_vencimento(data_execucao, horario_execucao, hoje=None):
+    """Instante (Brasília) em que o item vence"""
+    hoje = hoje or datetime.now(BRAZIL_TZ).date()
+    return BRAZIL_TZ.localize(datetime.combine(max(data_execucao, hoje), horario_execucao))
+
+
+class TemporizadorFila:
+    """Heap de (vencimento, id) dos itens pendentes da fila (compartilhável entre threads)"""
+
+    def __init__(self):
+        self.heap = []
+        self.vencimentos = {}  # id -> vencimento vigente
+        self.carregado_em = None
+        self.trava = threading.Lock()
+
+    def recarregar(self):
+        """Recarrega todos os itens pendentes da fila"""
+        hoje = datetime.now(BRAZIL_TZ).date()
+        itens = FilaExecucao.objects.filter(status__in=STATUS_AGENDAVEIS).values_list(
+            'id', 'data_execucao', 'horario_execucao'
+        )
+        vencimentos = {id_item: calcular_vencimento(data, horario, hoje) for id_item, data, horario in itens}
+        with self.trava:
+            self.vencimentos = vencimentos
+            self.heap = [(vencimento, id_item) for id_item, vencimento in vencimentos.items()]
+            heapq.heapify(self.heap)
+            self.carregado_em = datetime.now(BRAZIL_TZ)
+        return len(vencimentos)
+
+    def invalidar(self):
+        """Força a recarga completa na próxima verificação (ex.: notificações perdidas)"""
+        with self.trava:
+            self.carregado_em = None
+
+    def agendar(self, id_item, data_execucao, horario_execucao):
+        vencimento = calcular_vencimento(data_execucao, horario_execucao)
+        with self.trava:
+            if self.vencimentos.get(id_item) == vencimento:
+                return
+            self.vencimentos[id_item] = vencimento
+            heapq.heappush(self.heap, (vencimento, id_item))
+
+    def remover(self, id_item):
+        with self.trava:
+            self.vencimentos.pop(id_item, None)
+
+    def aplicar_notificacao(self, notificacao):
+        """Atualiza o item a partir do payload da trigger da fila (id, status, data e horário)"""
+        try:
+            id_item = int(notificacao['id'])
+            if notificacao.get('status') not in STATUS_AGENDAVEIS:
+                self.remover(id_item)
+                return
+            data_execucao = datetime.strptime(notificacao['data_execucao'], '%Y-%m-%d').date()
+            horario_execucao = datetime.strptime(notificacao['horario_execucao'].split('.')[0], '%H:%M:%S').time()
+        except (KeyError, TypeError, ValueError):
+            # Payload desconhecido: a recarga completa resolve
+            self.invalidar()
+            return
+        self.agendar(id_item, data_execucao, horario_execucao)
+
+    def retirar_vencidos(self, agora=None):
+        """Retira e retorna os ids vencidos até agora, em ordem de vencimento"""
+        agora = agora or datetime.now(BRAZIL_TZ)
+        vencidos = []
+        with self.trava:
+            while self.heap and self.heap[0][0] <= agora:
+                vencimento, id_item = heapq.heappop(self.heap)
+                # Entrada de um vencimento antigo (item reagendado ou removido)
+                if self.vencimentos.get(id_item) != vencimento:
+                    continue
+                del self.vencimentos[id_item]
+                vencidos.append(id_item)
+        return vencidos
+
+    def segundos_ate_proximo(self, agora=None):
+        """Segundos até o próximo vencimento (None se não houver itens)"""
+        agora = agora or datetime.now(BRAZIL_TZ)
+        with self.trava:
+            while self.heap and self.vencimentos.get(self.heap[0][1]) != self.heap[0][0]:
+                heapq.heappop(self.heap)
+            if not self.heap:
+                return None
+            return max((self.heap[0][0] - agora).total_seconds(), 0.0)
+
+    def status(self):
+        with self.trava:
+            proximo = min(self.vencimentos.values()) if self.vencimentos else None
+            return {
+                'itens': len(self.vencimentos),
+                'proximo_vencimento': proximo,
+                'carregado_em': self.carregado_em,
+            }
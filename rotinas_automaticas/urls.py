@@ -6,6 +6,8 @@ urlpatterns = [
     path('api/download_cvm/', views.download_cvm, name='download_cvm'),
     path('api/download_b3/', views.download_b3, name='download_b3'),
     path('api/download_b3/<int:dias>/', views.download_b3, name='download_b3_dias'),
+    path('api/backfill_b3/', views.backfill_b3_view, name='backfill_b3'),
+    path('api/backfill_b3/<int:backfill_id>/', views.backfill_b3_view, name='backfill_b3_progresso'),
     path('api/static_arquivos/', views.static_arquivos, name='static_arquivos'),
     path('api/grafico_tabela_precos/', views.grafico_tabela_precos, name='grafico_tabela_precos'),
     
@@ -1,15 +1,32 @@
 import os
 import requests
+import tempfile
+import threading
 import zipfile
-from datetime import datetime, timedelta
+from dataclasses import asdict
+from datetime import datetime
 from django.shortcuts import render
 from django.conf import settings
+from django.db import connection
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from rest_framework import status
 
-def job_download_arquivos_CVM(pasta_destino='static/downloadbruto'):
-    """Job para download de arquivos da CVM"""
+from . import servico_carga, cache_downloads, download_b3 as downloader_b3, backfill_b3, calendario_b3
+from .models import BackfillB3
+
+# Tamanho dos blocos gravados no arquivo temporário durante o download dos zips
+BYTES_POR_BLOCO_DOWNLOAD = 1024 * 1024
+
+def job_download_arquivos_CVM(pasta_destino='static/downloadbruto', carregar=None):
+    """Job para download de arquivos da CVM
+
+    Cada zip é baixado em blocos para um arquivo temporário (em memória até
+    CVM_DOWNLOAD_MEMORIA_BYTES) e só os membros com carga registrada são usados:
+    com carregar=True (padrão: CVM_CARGA_DIRETA_ZIP) eles vão direto do zip para
+    as tabelas, sem cópia extraída; com carregar=False são extraídos na pasta.
+    A requisição é condicional (cache_downloads): zip não republicado não é baixado.
+    """
     urls = [
         # Ações
         "https://dados.cvm.gov.br/dados/CIA_ABERTA/DOC/FCA/DADOS/fca_cia_aberta_2025.zip",
@@ -18,24 +35,63 @@ def job_download_arquivos_CVM(pasta_destino='static/downloadbruto'):
         "https://dados.cvm.gov.br/dados/FII/DOC/INF_ANUAL/DADOS/inf_anual_fii_2024.zip",
         "https://dados.cvm.gov.br/dados/FII/DOC/INF_MENSAL/DADOS/inf_mensal_fii_2025.zip"
     ]
+    if carregar is None:
+        carregar = getattr(settings, 'CVM_CARGA_DIRETA_ZIP', True)
+    resultados_carga = {}
+    estatisticas_cache = cache_downloads.EstatisticasCache()
+
+    def baixar_zip(url, entrada_cache):
+        """Baixa o zip em blocos para um arquivo temporário, sem carregar a resposta inteira em memória
+
+        Retorna (arquivo_zip, resposta, tamanho); arquivo_zip é None se o cache indica conteúdo inalterado.
+        """
+        with requests.get(url, stream=True, timeout=60,
+                          headers=cache_downloads.cabecalhos_condicionais(entrada_cache)) as resposta:
+            if cache_downloads.conteudo_inalterado(entrada_cache, resposta):
+                return None, resposta, entrada_cache.tamanho_bytes
+            resposta.raise_for_status()
+
+            arquivo_zip = tempfile.SpooledTemporaryFile(max_size=getattr(settings, 'CVM_DOWNLOAD_MEMORIA_BYTES', 32 * 1024 * 1024))
+            tamanho = 0
+            try:
+                for bloco in resposta.iter_content(chunk_size=BYTES_POR_BLOCO_DOWNLOAD):
+                    arquivo_zip.write(bloco)
+                    tamanho += len(bloco)
+            except Exception:
+                arquivo_zip.close()
+                raise
+        arquivo_zip.seek(0)
+        print(f"[OK] Baixado: {url.split('/')[-1]} ({tamanho:,} bytes)")
+        return arquivo_zip, resposta, tamanho
 
     def baixar_e_extrair(url):
-        nome_arquivo_zip = os.path.join(pasta_destino, url.split('/')[-1])
+        nome_arquivo_zip = url.split('/')[-1]
 
         print(f"\n[DOWNLOAD] Baixando: {url}")
-        resposta = requests.get(url)
-        with open(nome_arquivo_zip, "wb") as f:
-            f.write(resposta.content)
-        print(f"[OK] Salvo em: {nome_arquivo_zip}")
+        entrada_cache = cache_downloads.obter_entrada(url)
+        arquivo_zip, resposta, tamanho = baixar_zip(url, entrada_cache)
+        if arquivo_zip is None:
+            print(f"[CACHE] Conteúdo inalterado desde {entrada_cache.baixado_em:%d/%m/%Y %H:%M}: {nome_arquivo_zip}")
+            estatisticas_cache.acerto(entrada_cache)
+            return
+        estatisticas_cache.falha()
 
-        print("[EXTRACT] Extraindo arquivos...")
-        with zipfile.ZipFile(nome_arquivo_zip, "r") as zip_ref:
-            zip_ref.extractall(pasta_destino)
-        print(f"[OK] Extraído em: {pasta_destino}")
+        with arquivo_zip:
+            if carregar:
+                print("[CARGA] Carregando membros direto do zip...")
+                resultado = servico_carga.carregar_zip(arquivo_zip, nome_arquivo_zip)
+                resultados_carga[nome_arquivo_zip] = asdict(resultado)
+                print(f"[OK] {resultado.mensagem}")
+                if not resultado.sucesso:
+                    return  # Sem cache: a próxima execução baixa e tenta de novo
+            else:
+                print("[EXTRACT] Extraindo membros com carga registrada...")
+                with zipfile.ZipFile(arquivo_zip) as zip_ref:
+                    for membro, nome, _ in servico_carga.membros_registrados(zip_ref):
+                        servico_carga.extrair_membro(zip_ref, membro, nome, pasta_destino)
+                print(f"[OK] Extraído em: {pasta_destino}")
 
-        if os.path.exists(nome_arquivo_zip):
-            os.remove(nome_arquivo_zip)
-            print(f"🗑️ Zip removido: {nome_arquivo_zip}")
+        cache_downloads.registrar_download(url, url, resposta, tamanho, nome_arquivo_zip)
 
     # Cria a pasta se necessário
     os.makedirs(pasta_destino, exist_ok=True)
@@ -57,18 +113,24 @@ def job_download_arquivos_CVM(pasta_destino='static/downloadbruto'):
         arquivos_extraidos.append(arq)
 
     # Retornar resultado da execução
+    print(f"[CACHE] Acertos: {estatisticas_cache.acertos} | Downloads: {estatisticas_cache.falhas}")
     print("\n🎉 Download e processamento de arquivos CVM concluído!")
     return {
         'status': 'sucesso',
         'mensagem': 'Download e processamento de arquivos CVM concluído',
         'pasta_destino': pasta_destino,
         'urls_processadas': urls_processadas,
-        'arquivos_extraidos': arquivos_extraidos
+        'arquivos_extraidos': arquivos_extraidos,
+        'resultados_carga': resultados_carga,
+        'cache': estatisticas_cache.como_dict()
     }
 
 def job_baixar_arquivos_b3(n_dias=3):
     """
     Job para fazer download dos arquivos da B3
+
+    Datas e tipos de arquivo são baixados em paralelo (download_b3): sessão HTTP
+    compartilhada, B3_DOWNLOAD_WORKERS workers e taxa limitada por host.
     """
     print(f"[SEARCH] Iniciando job_baixar_arquivos_b3 para {n_dias} dias úteis")
     
@@ -77,37 +139,30 @@ def job_baixar_arquivos_b3(n_dias=3):
         DOWNLOAD_DIR = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
         os.makedirs(DOWNLOAD_DIR, exist_ok=True)
         
-        # Headers para simular um navegador
-        HEADERS = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
-            "Accept": "application/json, text/plain, */*",
-        }
-        
-        # Lista de arquivos disponíveis para download
-        ARQUIVOS = [
-            "InstrumentsConsolidatedFile",           # Instrumentos (BVBG.028.02)
-            "TradeInformationConsolidatedFile",      # Boletim de Negociação (BVBG.086.01)
-            "TradeInformationConsolidatedAfterHoursFile"  # Pós-mercado
-        ]
-        
         # Gerar lista dos últimos n dias úteis
         datas = get_ultimos_dias_uteis(n_dias)
         
         total_downloads = 0
         downloads_sucesso = 0
         arquivos_baixados = []
-        
-        # Baixar arquivos para cada data
-        for data in datas:
-            print(f"\n📅 Processando data: {data}")
-            for arquivo in ARQUIVOS:
-                print(f"⬇️ Baixando {arquivo} para {data}...")
-                total_downloads += 1
-                
-                resultado_download = baixar_arquivo_b3(arquivo, data, DOWNLOAD_DIR, HEADERS)
-                if resultado_download['sucesso']:
-                    downloads_sucesso += 1
+        arquivos_ja_carregados = []
+        estatisticas_cache = cache_downloads.EstatisticasCache()
+        
+        # Baixar arquivos de todas as datas em paralelo
+        inicio = datetime.now()
+        for data, arquivo, resultado_download in downloader_b3.baixar_arquivos_b3(
+            datas, DOWNLOAD_DIR, estatisticas_cache=estatisticas_cache
+        ):
+            total_downloads += 1
+            if resultado_download['sucesso']:
+                downloads_sucesso += 1
+                if resultado_download['ja_carregado']:
+                    arquivos_ja_carregados.append(resultado_download['nome_arquivo'])
+                else:
                     arquivos_baixados.append(resultado_download['nome_arquivo'])
+            else:
+                print(f"[ERROR] {arquivo} {data}: {resultado_download['erro']}")
+        duracao_segundos = (datetime.now() - inicio).total_seconds()
         
         resultado = {
             'status': 'sucesso',
@@ -117,10 +172,15 @@ def job_baixar_arquivos_b3(n_dias=3):
             'datas': datas,
             'downloads_sucesso': downloads_sucesso,
             'total_downloads': total_downloads,
-            'arquivos_baixados': arquivos_baixados
+            'arquivos_baixados': arquivos_baixados,
+            'arquivos_ja_carregados': arquivos_ja_carregados,
+            'cache': estatisticas_cache.como_dict(),
+            'duracao_segundos': duracao_segundos
         }
         
-        print(f"[OK] Downloads concluídos: {downloads_sucesso}/{total_downloads} arquivos salvos em {DOWNLOAD_DIR}")
+        print(f"[CACHE] Acertos: {estatisticas_cache.acertos} | Downloads: {estatisticas_cache.falhas}")
+        print(f"[OK] Downloads concluídos: {downloads_sucesso}/{total_downloads} arquivos salvos em {DOWNLOAD_DIR} "
+              f"({duracao_segundos:.1f}s)")
         return resultado
         
     except Exception as e:
@@ -132,65 +192,8 @@ def job_baixar_arquivos_b3(n_dias=3):
         return erro
 
 def get_ultimos_dias_uteis(n=3):
-    """Gera lista dos últimos n dias úteis (excluindo sábado e domingo), incluindo D0 (hoje) se for dia útil"""
-    dias_uteis = []
-    hoje = datetime.now()
-    
-    # Incluir D0 (hoje) se for dia útil
-    if hoje.weekday() < 5:  # 0=segunda, 1=terça, 2=quarta, 3=quinta, 4=sexta
-        dias_uteis.append(hoje.strftime("%Y-%m-%d"))
-    
-    delta = 1
-    while len(dias_uteis) < n:
-        dia = hoje - timedelta(days=delta)
-        if dia.weekday() < 5:  # 0=segunda, 1=terça, 2=quarta, 3=quinta, 4=sexta
-            dias_uteis.append(dia.strftime("%Y-%m-%d"))
-        delta += 1
-    return dias_uteis[::-1]  # do mais antigo para o mais recente
-
-def baixar_arquivo_b3(nome_arquivo, data, download_dir, headers):
-    """Realiza o download em duas etapas: obter token e depois o arquivo"""
-    try:
-        # Passo 1: Obter token
-        print(f"🔑 Solicitando token para: {nome_arquivo}")
-        url_token = f"https://arquivos.b3.com.br/api/download/requestname?fileName={nome_arquivo}&date={data}"
-        
-        response = requests.get(url_token, headers=headers, timeout=30)
-        
-        if response.status_code != 200:
-            print(f"[ERROR] Erro ao obter token: {response.status_code}")
-            return {'sucesso': False, 'erro': f'Erro ao obter token: {response.status_code}'}
-        
-        dados = response.json()
-        token = dados.get("token")
-        
-        if not token:
-            print(f"[ERROR] Token não encontrado na resposta")
-            return {'sucesso': False, 'erro': 'Token não encontrado na resposta'}
-        
-        nome_completo = f"{dados['file']['name']}{dados['file']['extension']}"
-        print(f"[OK] Token obtido para: {nome_completo}")
-        
-        # Passo 2: Download do arquivo
-        url_download = f"https://arquivos.b3.com.br/api/download/?token={token}"
-        
-        arquivo_response = requests.get(url_download, headers=headers, timeout=60)
-        
-        if arquivo_response.status_code != 200:
-            print(f"[ERROR] Erro ao baixar arquivo: {arquivo_response.status_code}")
-            return {'sucesso': False, 'erro': f'Erro ao baixar arquivo: {arquivo_response.status_code}'}
-        
-        # Salvar arquivo
-        caminho_arquivo = os.path.join(download_dir, nome_completo)
-        with open(caminho_arquivo, "wb") as arquivo:
-            arquivo.write(arquivo_response.content)
-        
-        print(f"[OK] Arquivo salvo: {nome_completo}")
-        return {'sucesso': True, 'nome_arquivo': nome_completo}
-        
-    except Exception as e:
-        print(f"[ERROR] Erro no download de {nome_arquivo}: {str(e)}")
-        return {'sucesso': False, 'erro': str(e)}
+    """Gera lista dos últimos n pregões da B3 (sem fins de semana e feriados), incluindo D0 (hoje) se houver pregão"""
+    return calendario_b3.ultimos_pregoes(n)  # do mais antigo para o mais recente
 
 @api_view(['GET', 'POST'])
 def download_cvm(request):
@@ -247,6 +250,74 @@ def download_b3(request, dias=None):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _executar_backfill_em_thread(backfill_id, workers=None):
+    """Executa o backfill fora da requisição (conexão de banco própria da thread)"""
+    try:
+        backfill_b3.executar_backfill(BackfillB3.objects.get(pk=backfill_id), workers=workers)
+    except Exception as e:
+        print(f"[ERROR] Erro no backfill {backfill_id}: {str(e)}")
+    finally:
+        connection.close()
+
+
+@api_view(['GET', 'POST'])
+def backfill_b3_view(request, backfill_id=None):
+    """Endpoint do backfill histórico da B3
+
+    POST {"inicio": "YYYY-MM-DD", "fim": "YYYY-MM-DD", "arquivos": [...], "workers": N}
+        cria e inicia um backfill em segundo plano; {"retomar": id} retoma um interrompido
+    GET /api/backfill_b3/<id>/ devolve o progresso; sem id, os últimos backfills
+    """
+    try:
+        if request.method == 'GET':
+            if backfill_id is not None:
+                backfill = BackfillB3.objects.filter(pk=backfill_id).first()
+                if backfill is None:
+                    return Response({'error': f'Backfill {backfill_id} não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+                return Response(backfill_b3.progresso_backfill(backfill), status=status.HTTP_200_OK)
+            return Response({
+                'backfills': [backfill_b3.progresso_backfill(backfill) for backfill in BackfillB3.objects.all()[:20]]
+            }, status=status.HTTP_200_OK)
+
+        retomar = request.data.get('retomar')
+        if retomar:
+            backfill = BackfillB3.objects.filter(pk=retomar).first()
+            if backfill is None:
+                return Response({'error': f'Backfill {retomar} não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        else:
+            try:
+                inicio = datetime.strptime(request.data.get('inicio', ''), '%Y-%m-%d').date()
+                fim = datetime.strptime(request.data.get('fim') or datetime.now().strftime('%Y-%m-%d'), '%Y-%m-%d').date()
+                backfill = backfill_b3.criar_backfill(inicio, fim, request.data.get('arquivos'))
+            except ValueError as e:
+                return Response({
+                    'error': f'Parâmetros inválidos: {str(e)}',
+                    'exemplo': {'inicio': '2024-01-01', 'fim': '2024-12-31'}
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+        if backfill.status == 'EXECUTANDO':
+            return Response({
+                'error': f'Backfill {backfill.id} já está em execução',
+                'backfill': backfill_b3.progresso_backfill(backfill)
+            }, status=status.HTTP_409_CONFLICT)
+
+        workers = request.data.get('workers')
+        threading.Thread(
+            target=_executar_backfill_em_thread, args=(backfill.id, int(workers) if workers else None), daemon=True
+        ).start()
+
+        return Response({
+            'message': f'Backfill {backfill.id} iniciado ({backfill.data_inicio} a {backfill.data_fim})',
+            'acompanhamento': f'/api/backfill_b3/{backfill.id}/',
+            'backfill': backfill_b3.progresso_backfill(backfill)
+        }, status=status.HTTP_202_ACCEPTED)
+
+    except Exception as e:
+        return Response({
+            'error': f'Erro ao executar backfill B3: {str(e)}'
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 def listar_arquivos_static():
     """Função para listar arquivos na pasta static"""
     try:
@@ -424,12 +495,13 @@ def deletar_todos_arquivos_static():
         return erro
 
 
-def executar_carga_arquivo(nome_arquivo):
-    """Executa carga de arquivo específico baseado no tipo"""
+def executar_carga_arquivo(nome_arquivo, modo_execucao=None):
+    """Executa carga de arquivo específico baseado no tipo
+    
+    Por padrão a carga roda no próprio processo; CARGA_ARQUIVOS_EXECUCAO='subprocesso'
+    (ou modo_execucao) executa o script em um interpretador separado.
+    """
     try:
-        import subprocess
-        import sys
-        
         # Caminho da pasta static
         STATIC_DIR = os.path.join(settings.BASE_DIR, 'static', 'downloadbruto')
         caminho_arquivo = os.path.join(STATIC_DIR, nome_arquivo)
@@ -442,77 +514,31 @@ def executar_carga_arquivo(nome_arquivo):
                 'pasta_buscada': STATIC_DIR
             }
         
-        # Determinar qual script de carga usar baseado no nome do arquivo
-        script_carga = None
-        
-        if 'TradeInformationConsolidatedFile' in nome_arquivo:
-            script_carga = 'carga_b3_TradeInformationConsolidatedFile_sem_emoji.py'
-        elif 'InstrumentsConsolidatedFile' in nome_arquivo:
-            # Usar o mesmo script para InstrumentsConsolidatedFile por enquanto
-            script_carga = 'carga_b3_TradeInformationConsolidatedFile_sem_emoji.py'
-        else:
+        # Determinar qual rotina de carga usar baseado no nome do arquivo
+        if servico_carga.identificar_carga(nome_arquivo) is None:
             return {
                 'status': 'erro',
                 'mensagem': f'Tipo de arquivo não suportado para carga: {nome_arquivo}',
                 'arquivo_solicitado': nome_arquivo,
-                'tipos_suportados': ['TradeInformationConsolidatedFile', 'InstrumentsConsolidatedFile']
+                'tipos_suportados': servico_carga.tipos_suportados()
             }
         
-        # Caminho para o script de carga
-        pasta_rotinas = os.path.join(settings.BASE_DIR, 'rotinas_individuais')
-        script_path = os.path.join(pasta_rotinas, script_carga)
-        
-        if not os.path.exists(script_path):
-            return {
-                'status': 'erro',
-                'mensagem': f'Script de carga não encontrado: {script_carga}',
-                'script_esperado': script_path
-            }
-        
-        print(f"[CARGA] Executando carga para arquivo: {nome_arquivo}")
-        print(f"[CARGA] Script: {script_path}")
-        
-        # Executar script de carga passando o nome do arquivo como argumento
-        resultado_processo = subprocess.run(
-            [sys.executable, script_path, nome_arquivo],  # Passar nome do arquivo como argumento
-            cwd=pasta_rotinas,
-            capture_output=True,
-            text=True,
-            timeout=300,  # 5 minutos de timeout
-            encoding='utf-8',
-            errors='ignore'  # Ignorar caracteres não UTF-8
-        )
-        
-        # Analisar resultado
-        if resultado_processo.returncode == 0:
-            # Sucesso
-            return {
-                'status': 'sucesso',
-                'mensagem': f'Carga do arquivo {nome_arquivo} executada com sucesso',
-                'arquivo_processado': nome_arquivo,
-                'script_utilizado': script_carga,
-                'codigo_retorno': resultado_processo.returncode,
-                'saida_stdout': resultado_processo.stdout,
-                'saida_stderr': resultado_processo.stderr if resultado_processo.stderr else None
-            }
-        else:
-            # Erro na execução
-            return {
-                'status': 'erro',
-                'mensagem': f'Erro na execução da carga para arquivo {nome_arquivo}',
-                'arquivo_processado': nome_arquivo,
-                'script_utilizado': script_carga,
-                'codigo_retorno': resultado_processo.returncode,
-                'saida_stdout': resultado_processo.stdout,
-                'saida_stderr': resultado_processo.stderr
-            }
-            
-    except subprocess.TimeoutExpired:
-        return {
-            'status': 'erro',
-            'mensagem': f'Timeout na execução da carga para arquivo {nome_arquivo} (5 minutos)',
-            'arquivo_processado': nome_arquivo
+        modo_execucao = modo_execucao or getattr(settings, 'CARGA_ARQUIVOS_EXECUCAO', servico_carga.MODO_EXECUCAO_PROCESSO)
+        print(f"[CARGA] Executando carga para arquivo: {nome_arquivo} (modo {modo_execucao})")
+        
+        resultado = servico_carga.carregar_arquivo(nome_arquivo, modo_execucao=modo_execucao)
+        resposta = {
+            'status': 'sucesso' if resultado.sucesso else 'erro',
+            'mensagem': (f'Carga do arquivo {nome_arquivo} executada com sucesso' if resultado.sucesso
+                         else f'Erro na execução da carga para arquivo {nome_arquivo}: {resultado.mensagem}'),
+            'arquivo_processado': nome_arquivo,
+            'modo_execucao': modo_execucao,
+            'resultado': asdict(resultado)
         }
+        if resultado.saida is not None:
+            resposta['saida_stdout'] = resposta['resultado'].pop('saida')
+        return resposta
+            
     except Exception as e:
         return {
             'status': 'erro',
@@ -586,6 +612,27 @@ def static_arquivos(request):
                         'resultado': resultado
                     }, status=status.HTTP_400_BAD_REQUEST)
             
+            elif acao == 'carga_cvm':
+                # Carga em paralelo de todos os CSVs da CVM da pasta (uma transação por arquivo)
+                workers = request.data.get('workers')
+                resultado = servico_carga.carregar_arquivos_cvm(workers=int(workers) if workers else None)
+                resposta = {
+                    'status': 'sucesso' if resultado.sucesso else 'erro',
+                    'mensagem': resultado.mensagem,
+                    'resultado': asdict(resultado)
+                }
+                
+                if resultado.sucesso:
+                    return Response({
+                        'message': 'Carga dos arquivos CVM executada com sucesso',
+                        'resultado': resposta
+                    }, status=status.HTTP_200_OK)
+                else:
+                    return Response({
+                        'error': resultado.mensagem,
+                        'resultado': resposta
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            
             elif acao == 'listar':
                 # Executar listagem via POST
                 resultado = listar_arquivos_static()
@@ -597,11 +644,12 @@ def static_arquivos(request):
             
             else:
                 return Response({
-                    'error': f'Ação "{acao}" não reconhecida. Ações disponíveis: "deletar_todos", "carga", "listar"',
-                    'acoes_disponiveis': ['deletar_todos', 'carga', 'listar'],
+                    'error': f'Ação "{acao}" não reconhecida. Ações disponíveis: "deletar_todos", "carga", "carga_cvm", "listar"',
+                    'acoes_disponiveis': ['deletar_todos', 'carga', 'carga_cvm', 'listar'],
                     'exemplos': {
                         'deletar_todos': {'acao': 'deletar_todos'},
                         'carga': {'acao': 'carga', 'arquivo': 'TradeInformationConsolidatedFile_20250910_1.csv'},
+                        'carga_cvm': {'acao': 'carga_cvm', 'workers': 4},
                         'listar': {'acao': 'listar'}
                     }
                 }, status=status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Rotina de Carga: Feeds Declarativos (linha de comando)
+======================================================
+
+Ponto de entrada em linha de comando das cargas declaradas para o MotorCarga
+(rotinas_automaticas.carga_declarativa): B3 InstrumentsConsolidatedFile,
+TradeInformation detalhado (regular e after-hours) e arquivos da CVM (FCA e FII).
+Também é o script usado pelo modo de execução em subprocesso (servico_carga),
+que lê o resultado da última linha da saída (prefixo RESULTADO_CARGA=).
+
+Uso: script.py [arquivo] [--carga=nome] [--modo=copy|executemany] [--forcar] [--listar]
+     script.py --cvm [--workers=N]
+     Sem --carga, executa os feeds registrados para o nome do arquivo.
+     --cvm carrega em paralelo todos os CSVs da CVM da pasta downloadbruto.
+
+Autor: Sistema Automatizado
+Data: 17/10/2026
+"""
+
+import os
+import sys
+import json
+from dataclasses import asdict
+
+# Configuração do Django
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'servicos.settings')
+
+import django
+django.setup()
+
+from rotinas_automaticas import servico_carga
+from rotinas_automaticas.carga_b3_trade_information import ResultadoCarga, STATUS_ERRO
+
+
+def main():
+    """Função principal; o código de saída é 0 apenas se a carga terminou com sucesso"""
+    try:
+        arquivo_especifico = None
+        nome_carga = None
+        carga_cvm = False
+        workers = None
+        opcoes = {}
+        for argumento in sys.argv[1:]:
+            if argumento.startswith('--carga='):
+                nome_carga = argumento.split('=', 1)[1]
+            elif argumento.startswith('--modo='):
+                opcoes['modo_insercao'] = argumento.split('=', 1)[1]
+            elif argumento == '--forcar':
+                # Recarregar mesmo se o conteúdo já consta no ledger de arquivos
+                opcoes['forcar_recarga'] = True
+            elif argumento == '--cvm':
+                carga_cvm = True
+            elif argumento.startswith('--workers='):
+                workers = int(argumento.split('=', 1)[1])
+            elif argumento == '--listar':
+                for carga in servico_carga.REGISTRO_CARGAS:
+                    if carga.especificacao is not None:
+                        print(f"{carga.nome:45} {carga.mascara_arquivo:45} {carga.especificacao.tabela}")
+                return 0
+            elif arquivo_especifico is None:
+                arquivo_especifico = argumento
+
+        if carga_cvm:
+            resultado = servico_carga.carregar_arquivos_cvm(workers=workers)
+            print(servico_carga.PREFIXO_RESULTADO + json.dumps(asdict(resultado)))
+            return 0 if resultado.sucesso else 1
+
+        if nome_carga:
+            carga = servico_carga.obter_carga(nome_carga)
+            cargas = [carga] if carga is not None and carga.especificacao is not None else []
+        elif arquivo_especifico:
+            cargas = [carga for carga in servico_carga.identificar_carga(arquivo_especifico) or []
+                      if carga.especificacao is not None]
+        else:
+            cargas = []
+
+        if not cargas:
+            resultado = ResultadoCarga(
+                status=STATUS_ERRO,
+                mensagem=f"Nenhuma carga declarativa para: {nome_carga or arquivo_especifico or '(informe --carga ou arquivo)'}"
+            )
+            print(resultado.mensagem)
+        else:
+            resultado = servico_carga.combinar_resultados([
+                servico_carga.instanciar_carga(carga, arquivo_especifico, **opcoes).executar_carga()
+                for carga in cargas
+            ])
+        print(servico_carga.PREFIXO_RESULTADO + json.dumps(asdict(resultado)))
+        return 0 if resultado.sucesso else 1
+    except KeyboardInterrupt:
+        print("\nProcesso interrompido pelo usuario")
+        return 1
+    except Exception as e:
+        print(f"\nErro fatal: {e}")
+        import traceback
+        traceback.print_exc()
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
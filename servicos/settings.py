@@ -218,3 +218,64 @@ CORS_ALLOW_METHODS = [
     'POST',
     'PUT',
 ]
+
+# Configurações das rotinas de carga
+# Modo de inserção em organizesee_ativosprecos: 'copy' (COPY FROM STDIN), 'staging' (arquivo bruto
+# via COPY + classificação em SQL) ou 'executemany' (fallback)
+CARGA_B3_MODO_INSERCAO = os.environ.get('CARGA_B3_MODO_INSERCAO', 'copy')
+
+# Parser dos modos copy/executemany: 'vetorizado' (blocos colunares com NumPy) ou 'csv' (csv.reader linha a linha)
+CARGA_B3_PARSER = os.environ.get('CARGA_B3_PARSER', 'vetorizado')
+
+# Arquivos de carga processados em paralelo (um processo por arquivo na carga e no executor da fila; requisições simultâneas com CARGA_ARQUIVOS_VIA_ENDPOINT)
+CARGA_ARQUIVOS_WORKERS = int(os.environ.get('CARGA_ARQUIVOS_WORKERS', '2'))
+
+# Início dos processos de carga: 'spawn' ou 'forkserver' (fork não é usado: o servidor tem threads ativas)
+CARGA_PROCESSOS_METODO_INICIO = os.environ.get('CARGA_PROCESSOS_METODO_INICIO', 'spawn')
+
+# Download da CVM: zips baixados em arquivo temporário (em memória até este tamanho) e membros
+# carregados direto do zip, sem extração em disco (False: só extrai os membros com carga registrada)
+CVM_DOWNLOAD_MEMORIA_BYTES = int(os.environ.get('CVM_DOWNLOAD_MEMORIA_BYTES', str(32 * 1024 * 1024)))
+CVM_CARGA_DIRETA_ZIP = os.environ.get('CVM_CARGA_DIRETA_ZIP', 'True').lower() == 'true'
+
+# Download da B3: arquivos baixados em paralelo com sessão HTTP compartilhada (keep-alive)
+# e taxa máxima de requisições por host
+B3_DOWNLOAD_WORKERS = int(os.environ.get('B3_DOWNLOAD_WORKERS', '4'))
+B3_DOWNLOAD_REQUISICOES_POR_SEGUNDO = float(os.environ.get('B3_DOWNLOAD_REQUISICOES_POR_SEGUNDO', '5'))
+
+# Calendário da B3: fechamentos extraordinários além dos feriados calculados (YYYY-MM-DD separados por vírgula)
+B3_FERIADOS_ADICIONAIS = [data.strip() for data in os.environ.get('B3_FERIADOS_ADICIONAIS', '').split(',') if data.strip()]
+
+# Índice em disco dos tickers de referência (FII e Ações), reconstruído quando as tabelas mudam
+INDICE_TICKERS_CAMINHO = os.environ.get(
+    'INDICE_TICKERS_CAMINHO', os.path.join(BASE_DIR, 'static', 'cache', 'indice_tickers.idx')
+)
+
+# Execução da carga de arquivos (views e scheduler): 'processo' chama a rotina no próprio
+# processo; 'subprocesso' executa o script em um interpretador separado (isolamento)
+CARGA_ARQUIVOS_EXECUCAO = os.environ.get('CARGA_ARQUIVOS_EXECUCAO', 'processo')
+CARGA_ARQUIVOS_TIMEOUT_SEGUNDOS = int(os.environ.get('CARGA_ARQUIVOS_TIMEOUT_SEGUNDOS', '300'))
+# Scheduler: chamar o endpoint HTTP da rotina em vez do serviço de carga local
+CARGA_ARQUIVOS_VIA_ENDPOINT = os.environ.get('CARGA_ARQUIVOS_VIA_ENDPOINT', 'False').lower() == 'true'
+
+# Executor da fila: workers por tipo de rotina; cada um reivindica o próximo item com
+# SELECT ... FOR UPDATE SKIP LOCKED (vários processos podem esvaziar a mesma fila)
+SCHEDULER_WORKERS_POR_TIPO = {
+    'DOWNLOAD_ARQUIVO': int(os.environ.get('SCHEDULER_WORKERS_DOWNLOAD', '1')),
+    'CARGA_ARQUIVO': int(os.environ.get('SCHEDULER_WORKERS_CARGA', '2')),
+    'CHAMADA_API': int(os.environ.get('SCHEDULER_WORKERS_API', '2')),
+    'EXECUCAO_SCRIPT': int(os.environ.get('SCHEDULER_WORKERS_SCRIPT', '1')),
+    'COMANDO_SISTEMA': int(os.environ.get('SCHEDULER_WORKERS_COMANDO', '1')),
+}
+
+# Liderança do monitor: um só processo do cluster (advisory lock do PostgreSQL) roda o
+# monitor e a limpeza de startup; heartbeat a cada intervalo, lease renovado a cada heartbeat
+SCHEDULER_LIDERANCA_ATIVA = os.environ.get('SCHEDULER_LIDERANCA_ATIVA', 'True').lower() == 'true'
+LIDERANCA_INTERVALO_SEGUNDOS = int(os.environ.get('LIDERANCA_INTERVALO_SEGUNDOS', '5'))
+LIDERANCA_LEASE_SEGUNDOS = int(os.environ.get('LIDERANCA_LEASE_SEGUNDOS', '30'))
+
+# Monitor: 'notificacao' bloqueia no LISTEN da fila (NOTIFY da trigger da FilaExecucao) até o
+# próximo vencimento; 'polling' volta a consultar a fila a cada 5 segundos
+SCHEDULER_MONITOR_MODO = os.environ.get('SCHEDULER_MONITOR_MODO', 'notificacao')
+SCHEDULER_ESPERA_MAXIMA_SEGUNDOS = int(os.environ.get('SCHEDULER_ESPERA_MAXIMA_SEGUNDOS', '300'))
+SCHEDULER_VARREDURA_MINUTOS = int(os.environ.get('SCHEDULER_VARREDURA_MINUTOS', '15'))